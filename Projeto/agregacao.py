@@ -0,0 +1,41 @@
+import pandas as pd
+
+METRICAS = ('populacao', 'pib', 'idh')
+NIVEIS = ('regiao', 'estado', 'mesorregiao', 'microrregiao')
+
+# Estatísticas calculadas numa única passada do groupby
+FUNCOES = {'soma': 'sum', 'media': 'mean', 'contagem': 'count', 'minimo': 'min', 'maximo': 'max'}
+
+
+def _origem(dados, metrica: str, nivel: str):
+    """Escolhe a tabela mais granular que tem a métrica e o nível pedidos"""
+    for tabela, apelidos in (('municipios', {}), ('estados', {'estado': 'sigla'})):
+        df = getattr(dados, tabela)
+        coluna_nivel = apelidos.get(nivel, nivel)
+        if metrica in df.columns and coluna_nivel in df.columns:
+            return df, coluna_nivel
+    return None, None
+
+
+def agregar_tabela(df: pd.DataFrame, metrica: str, coluna_nivel: str) -> pd.DataFrame:
+    """soma/média/contagem/mínimo/máximo de uma métrica por grupo, vetorizado"""
+    agregado = df.groupby(coluna_nivel, observed=True, sort=True)[metrica].agg(list(FUNCOES.values()))
+    agregado.columns = list(FUNCOES)
+    return agregado
+
+
+def agregar(dados, metrica: str, nivel: str):
+    """Agregado de uma métrica por nível territorial, calculado uma vez por versão.
+
+    Retorna None quando a combinação não existe no conjunto carregado.
+    """
+    df, coluna_nivel = _origem(dados, metrica, nivel)
+    if df is None:
+        return None
+
+    return dados.memo(('agregado', metrica, nivel), lambda: agregar_tabela(df, metrica, coluna_nivel))
+
+
+def combinacoes(dados):
+    """Pares (métrica, nível) disponíveis no conjunto atual"""
+    return [(m, n) for m in METRICAS for n in NIVEIS if _origem(dados, m, n)[0] is not None]
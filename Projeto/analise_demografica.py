@@ -1,11 +1,15 @@
 import pandas as pd
 import numpy as np
 
+import correlacao
+import series
+from estatisticas import Resumo
+
 class AnaliseDemografica:
     def __init__(self):
         pass
     
-    def criar_ranking_pib(self, pib_data):
+    def criar_ranking_pib(self, pib_data, limite=20):
         """Cria ranking de municípios por PIB"""
         if not pib_data:
             return []
@@ -20,23 +24,50 @@ class AnaliseDemografica:
         colunas_numericas = df.select_dtypes(include=[np.number]).columns
         
         if len(colunas_numericas) > 0:
-            coluna_ordenar = colunas_numericas[0]
-            df_sorted = df.sort_values(coluna_ordenar, ascending=False)
-            return df_sorted.head(20).to_dict('records')
+            coluna_ordenar = 'pib' if 'pib' in colunas_numericas else colunas_numericas[0]
+            valores = df[coluna_ordenar].to_numpy(dtype='float64')
+            
+            # Seleciona o top-N sem ordenar a tabela inteira
+            if limite < len(valores):
+                topo = np.argpartition(-valores, limite - 1)[:limite] if limite > 0 else np.empty(0, dtype=int)
+            else:
+                topo = np.arange(len(valores))
+            topo = topo[np.argsort(-valores[topo], kind='stable')]
+            return df.iloc[topo].to_dict('records')
         
-        return pib_data[:20]  # Retorna primeiros 20 se não houver números
+        return pib_data[:limite]  # Retorna primeiros N se não houver números
     
     def analisar_correlacao_pib_idh(self, pib_data, idh_data):
-        """Analisa correlação entre PIB e IDH (versão simplificada)"""
+        """Analisa correlação entre PIB e IDH (Pearson, calculada com NumPy)"""
         if not pib_data or not idh_data:
             return {'correlacao': 0, 'mensagem': 'Dados insuficientes'}
         
-        # Simulação sem scipy
+        df = pd.DataFrame(pib_data) if isinstance(pib_data, list) else pib_data
+        
+        # Junta os dados de IDH pelo município quando vierem separados
+        if 'idh' not in df.columns:
+            df_idh = pd.DataFrame(idh_data) if isinstance(idh_data, list) else idh_data
+            chave = 'codigo' if 'codigo' in df.columns and 'codigo' in df_idh.columns else 'municipio'
+            df = df.merge(df_idh[[chave, 'idh']], on=chave)
+        
+        resultado = correlacao.analisar(df[['pib', 'idh']], metodos=('pearson',))
+        if 'pearson' not in resultado:
+            return {'correlacao': 0, 'mensagem': 'Dados insuficientes'}
+        
+        valor = float(resultado['pearson']['matriz'][0, 1])
+        if abs(valor) > 0.7:
+            interpretacao = 'Forte correlação positiva'
+        elif abs(valor) > 0.5:
+            interpretacao = 'Correlação positiva moderada'
+        elif abs(valor) > 0.3:
+            interpretacao = 'Correlação positiva fraca'
+        else:
+            interpretacao = 'Correlação muito fraca ou inexistente'
+        
         return {
-            'correlacao': 0.65,
-            'interpretacao': 'Correlação positiva moderada',
-            'amostra': len(pib_data),
-            'observacao': 'Análise baseada em dados simulados'
+            'correlacao': valor,
+            'interpretacao': interpretacao,
+            'amostra': resultado['amostra']
         }
     
     def comparar_estados(self, estados_data, ibge_client=None):
@@ -66,7 +97,7 @@ class AnaliseDemografica:
         return regioes
     
     def calcular_estatisticas_descritivas(self, dados):
-        """Calcula estatísticas descritivas sem scipy"""
+        """Calcula estatísticas descritivas sem scipy (quantis exatos até 200 valores)"""
         if not dados:
             return {}
         
@@ -77,32 +108,32 @@ class AnaliseDemografica:
         
         estatisticas = {}
         for coluna in df.select_dtypes(include=[np.number]).columns:
-            valores = df[coluna].dropna()
+            # Resumo incremental (Welford + esboço de quantis), mesclável entre partições
+            resumo = Resumo.de_valores(df[coluna].to_numpy(dtype='float64', na_value=np.nan))
             
-            if len(valores) > 0:
-                estatisticas[coluna] = {
-                    'media': float(valores.mean()),
-                    'mediana': float(valores.median()),
-                    'desvio_padrao': float(valores.std()),
-                    'minimo': float(valores.min()),
-                    'maximo': float(valores.max()),
-                    'q1': float(valores.quantile(0.25)),
-                    'q3': float(valores.quantile(0.75)),
-                    'contagem': len(valores)
-                }
+            if resumo.contagem > 0:
+                estatisticas[coluna] = resumo.para_dict()
         
         return estatisticas
     
-    def calcular_tendencia_simples(self, valores):
-        """Calcula tendência simples sem scipy"""
+    def calcular_tendencia(self, valores, anos=None, janela=series.JANELA_PADRAO):
+        """Calcula CAGR, inclinação e médias móveis de uma série (anos consecutivos se omitidos)"""
+        valores = np.asarray(valores, dtype='float64')
         if len(valores) < 2:
-            return 0
+            return {'cagr': None, 'inclinacao': None, 'medias_moveis': []}
         
-        # Tendência simples: (último - primeiro) / primeiro
-        primeiro = valores[0]
-        ultimo = valores[-1]
+        anos = np.arange(len(valores)) if anos is None else np.asarray(anos)
         
-        if primeiro == 0:
-            return 0
+        # Uma série é uma matriz de uma linha para o mesmo cálculo vetorizado da API
+        matriz = np.full((1, anos.max() - anos.min() + 1), np.nan)
+        matriz[0, anos - anos.min()] = valores
+        todos_anos = np.arange(anos.min(), anos.max() + 1)
         
-        return (ultimo - primeiro) / primeiro
\ No newline at end of file
+        def nativo(valor):
+            return None if np.isnan(valor) else float(valor)
+        
+        return {
+            'cagr': nativo(series.cagr(todos_anos, matriz)[0]),
+            'inclinacao': nativo(series.inclinacao(todos_anos, matriz)[0]),
+            'medias_moveis': [nativo(v) for v in series.medias_moveis(matriz, janela)[0]]
+        }
\ No newline at end of file
@@ -0,0 +1,409 @@
+import abc
+import atexit
+import importlib.util
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import agregacao
+from dados import COLUNAS_RANKING, UFS
+
+# Quartis das estatísticas descritivas (q1, mediana, q3)
+QUANTIS = (0.25, 0.5, 0.75)
+
+
+class BackendIndisponivel(RuntimeError):
+    """Backend pedido em DADOS_BACKEND que não pode ser usado neste ambiente"""
+
+
+class BackendMemoria:
+    """Análises sobre o conjunto em memória: índices, resumos e groupby do pandas"""
+
+    nome = 'memoria'
+
+    def publicar(self, conjunto):
+        """Ouvinte da base: monta os índices e as estatísticas de cada versão nova antes de servi-la"""
+        conjunto.indexar()
+
+    def ranking(self, dados, coluna: str, limite=None, deslocamento=0, estado=None, regiao=None):
+        """Retorna (posições da página, total) em ordem decrescente da coluna"""
+        return dados.rankings[coluna].fatia(limite, deslocamento, estado=estado, regiao=regiao)
+
+    def estatisticas(self, dados, estado=None, regiao=None) -> dict:
+        """Resumo de cada métrica no recorte, mesclando as partições por estado"""
+        estatisticas = dados.estatisticas
+
+        # Partições do recorte pedido: um estado, os estados de uma região ou todos
+        particoes = None
+        if estado:
+            particoes = {estado}
+        elif regiao:
+            particoes = {sigla for sigla, (_, nome_regiao) in UFS.items() if nome_regiao == regiao}
+
+        # Recorte vazio (região sem estados) não pode cair na mesma chave do Brasil (None)
+        chave = None if particoes is None else frozenset(particoes)
+        resultado = {}
+        for metrica in estatisticas.metricas:
+            resumo = dados.memo(('estatisticas', metrica, chave),
+                                lambda: estatisticas.resumo(metrica, particoes))
+            if resumo.contagem > 0:
+                resultado[metrica] = resumo.para_dict()
+        return resultado
+
+    def agregar(self, dados, metrica: str, nivel: str):
+        return agregacao.agregar(dados, metrica, nivel)
+
+    def correlacao(self, dados, x: str, y: str):
+        """(coeficiente de Pearson, linhas da tabela)"""
+        municipios = dados.municipios
+        return float(municipios[x].corr(municipios[y])), len(municipios)
+
+
+class _BackendSQL(abc.ABC):
+    """Análises empurradas para um banco embutido, gravado num arquivo por versão do conjunto.
+
+    O processo que publica as versões (o pai, no gunicorn com preload) grava o
+    banco de cada versão nova ao publicá-la, fora das requisições, com a coluna
+    `posicao` (linha no DataFrame): o ranking devolve posições e os registros
+    continuam saindo do conjunto já serializado. Os workers só abrem o arquivo
+    da versão que servem, para leitura, com uma conexão por thread. Os índices e
+    as estatísticas em memória do conjunto não são montados com estes backends.
+    """
+
+    nome = None
+    extensao = None
+
+    # Versões anteriores mantidas em disco para requisições que ainda as usam
+    VERSOES_MANTIDAS = 2
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.pid = os.getpid()
+        self._gravados = []
+        self._travas = {}
+        self._local = threading.local()
+        atexit.register(self.fechar)
+
+    @abc.abstractmethod
+    def _conectar(self, caminho: str):
+        """Conexão de escrita para gravar o banco de uma versão"""
+
+    @abc.abstractmethod
+    def _abrir(self, caminho: str):
+        """Conexão só de leitura para as consultas"""
+
+    @abc.abstractmethod
+    def _carregar(self, conexao, tabela: str, df: pd.DataFrame):
+        """Cria a tabela no banco com as linhas do DataFrame"""
+
+    def _trava(self):
+        # Uma por processo: a do pai pode ter sido herdada no fork no meio de uma gravação
+        return self._travas.setdefault(os.getpid(), threading.Lock())
+
+    def _arquivo(self, versao: int, pid: int = None) -> str:
+        return os.path.join(self.diretorio, f'brasil-dados-{pid or self.pid}-v{versao}.{self.extensao}')
+
+    def publicar(self, conjunto):
+        """Ouvinte da base: grava o banco de cada versão nova no processo que publica"""
+        if os.getpid() == self.pid:
+            self._gravar(conjunto)
+
+    def _gravar(self, conjunto) -> str:
+        """Grava o banco da versão (uma vez por processo) e o troca atomicamente pelo arquivo final"""
+        pid = os.getpid()
+        caminho = self._arquivo(conjunto.versao, pid)
+        with self._trava():
+            if (pid, conjunto.versao) in self._gravados:
+                return caminho
+
+            temporario = f'{caminho}.tmp'
+            _remover(temporario)
+            conexao = self._conectar(temporario)
+            try:
+                for tabela in ('estados', 'municipios'):
+                    self._carregar(conexao, tabela, _tabela_sql(getattr(conjunto, tabela)))
+            finally:
+                conexao.close()
+            os.replace(temporario, caminho)
+
+            gravados = [gravado for gravado in self._gravados if gravado[0] == pid] + [(pid, conjunto.versao)]
+            for _, versao in gravados[:-self.VERSOES_MANTIDAS - 1]:
+                _remover(self._arquivo(versao, pid))
+            self._gravados = gravados[-self.VERSOES_MANTIDAS - 1:]
+        return caminho
+
+    def fechar(self):
+        """Apaga os bancos gravados por este processo"""
+        pid = os.getpid()
+        with self._trava():
+            for dono, versao in self._gravados:
+                if dono == pid:
+                    _remover(self._arquivo(versao, pid))
+            self._gravados = [gravado for gravado in self._gravados if gravado[0] != pid]
+
+    def _consultar(self, dados, sql: str, parametros=()):
+        """Executa a consulta no banco da versão do conjunto pedido"""
+        return self._executar(dados, sql, parametros).fetchall()
+
+    def _executar(self, dados, sql: str, parametros=()):
+        local = self._local
+        chave = (os.getpid(), dados.versao)
+        if getattr(local, 'chave', None) != chave:
+            # Conexão herdada do processo pai não é fechada aqui: é dele
+            if getattr(local, 'conexao', None) is not None and local.chave[0] == chave[0]:
+                local.conexao.close()
+
+            # Sem o arquivo do pai (gravação em andamento neste processo, ou versão que não veio
+            # dele), o processo grava o próprio, uma vez por versão
+            caminho = self._arquivo(dados.versao)
+            if not os.path.exists(caminho):
+                caminho = self._gravar(dados)
+            local.conexao, local.chave = self._abrir(caminho), chave
+        return local.conexao.execute(sql, parametros)
+
+    def _metricas(self, dados) -> list:
+        """Colunas de ranking presentes na tabela de municípios do banco, lidas do esquema"""
+        return dados.memo(('metricas', self.nome), lambda: [
+            coluna[0] for coluna in self._executar(dados, 'SELECT * FROM municipios LIMIT 0').description
+            if coluna[0] in COLUNAS_RANKING
+        ])
+
+    def ranking(self, dados, coluna: str, limite=None, deslocamento=0, estado=None, regiao=None):
+        """ORDER BY coluna DESC com LIMIT/OFFSET; empates na ordem das linhas, como no índice"""
+        filtro, parametros = _filtros(f'{coluna} IS NOT NULL', estado=estado, regiao=regiao)
+        total = self._consultar(dados, f'SELECT COUNT(*) FROM municipios WHERE {filtro}', parametros)[0][0]
+
+        pagina = f'LIMIT {int(limite)} OFFSET {int(deslocamento)}' if limite is not None else \
+            f'LIMIT {total} OFFSET {int(deslocamento)}'
+        linhas = self._consultar(
+            dados, f'SELECT posicao FROM municipios WHERE {filtro} ORDER BY {coluna} DESC, posicao {pagina}', parametros
+        )
+        return np.array([linha[0] for linha in linhas], dtype='int64'), int(total)
+
+    def estatisticas(self, dados, estado=None, regiao=None) -> dict:
+        """Contagem, média, desvio, extremos e quartis de cada métrica, calculados no banco"""
+        resultado = {}
+        for metrica in self._metricas(dados):
+            filtro, parametros = _filtros(f'{metrica} IS NOT NULL', estado=estado, regiao=regiao)
+            resumo = self._resumo(dados, metrica, filtro, parametros)
+            if resumo['contagem'] > 0:
+                resultado[metrica] = resumo
+        return resultado
+
+    def _resumo(self, dados, coluna: str, filtro: str, parametros) -> dict:
+        # Duas passadas: a média primeiro, depois a soma dos quadrados dos desvios
+        contagem, media, minimo, maximo = self._consultar(
+            dados, f'SELECT COUNT({coluna}), AVG({coluna}), MIN({coluna}), MAX({coluna}) '
+                   f'FROM municipios WHERE {filtro}', parametros
+        )[0]
+        if contagem == 0:
+            return {'contagem': 0}
+
+        quadrados = self._consultar(
+            dados, f'SELECT SUM(({coluna} - ?) * ({coluna} - ?)) FROM municipios WHERE {filtro}',
+            (media, media) + parametros
+        )[0][0]
+
+        q1, mediana, q3 = (self._quantil(dados, coluna, filtro, parametros, contagem, q) for q in QUANTIS)
+        return {
+            'media': float(media),
+            'mediana': mediana,
+            'desvio_padrao': float(np.sqrt(quadrados / (contagem - 1))) if contagem > 1 else float('nan'),
+            'minimo': float(minimo),
+            'maximo': float(maximo),
+            'q1': q1,
+            'q3': q3,
+            'contagem': int(contagem)
+        }
+
+    def _quantil(self, dados, coluna: str, filtro: str, parametros, contagem: int, q: float) -> float:
+        """Quantil com interpolação linear (como no pandas): os dois vizinhos via ORDER BY/OFFSET"""
+        posicao = q * (contagem - 1)
+        inferior = int(np.floor(posicao))
+        vizinhos = [linha[0] for linha in self._consultar(
+            dados, f'SELECT {coluna} FROM municipios WHERE {filtro} ORDER BY {coluna} LIMIT 2 OFFSET {inferior}',
+            parametros
+        )]
+        if len(vizinhos) == 1:
+            return float(vizinhos[0])
+        return float(vizinhos[0] + (vizinhos[1] - vizinhos[0]) * (posicao - inferior))
+
+    def agregar(self, dados, metrica: str, nivel: str):
+        """GROUP BY do nível com soma/média/contagem/mínimo/máximo; None se a combinação não existe"""
+        df, coluna_nivel = agregacao._origem(dados, metrica, nivel)
+        if df is None:
+            return None
+        tabela = 'municipios' if df is dados.municipios else 'estados'
+
+        linhas = self._consultar(
+            dados, f'SELECT {coluna_nivel}, SUM({metrica}), AVG({metrica}), COUNT({metrica}), MIN({metrica}), '
+                   f'MAX({metrica}) FROM {tabela} WHERE {coluna_nivel} IS NOT NULL GROUP BY {coluna_nivel}'
+        )
+        agregado = pd.DataFrame([linha[1:] for linha in linhas], index=[linha[0] for linha in linhas],
+                                columns=list(agregacao.FUNCOES))
+        agregado.index.name = coluna_nivel
+
+        # Mesma ordem do groupby em memória: a das categorias, ou alfabética
+        if isinstance(df[coluna_nivel].dtype, pd.CategoricalDtype):
+            ordem = [c for c in df[coluna_nivel].cat.categories if c in agregado.index]
+        else:
+            ordem = sorted(agregado.index)
+        agregado = agregado.loc[ordem]
+        agregado['contagem'] = agregado['contagem'].astype('int64')
+        return agregado
+
+    def correlacao(self, dados, x: str, y: str):
+        """Pearson em duas passadas (médias, depois covariância e variâncias) sobre os pares completos"""
+        filtro = f'{x} IS NOT NULL AND {y} IS NOT NULL'
+        total, media_x, media_y = self._consultar(
+            dados, f'SELECT (SELECT COUNT(*) FROM municipios), AVG({x}), AVG({y}) FROM municipios WHERE {filtro}'
+        )[0]
+        if media_x is None:
+            return float('nan'), int(total)
+
+        covariancia, variancia_x, variancia_y = self._consultar(
+            dados, f'SELECT SUM(({x} - ?) * ({y} - ?)), SUM(({x} - ?) * ({x} - ?)), SUM(({y} - ?) * ({y} - ?)) '
+                   f'FROM municipios WHERE {filtro}',
+            (media_x, media_y, media_x, media_x, media_y, media_y)
+        )[0]
+        denominador = np.sqrt(variancia_x * variancia_y)
+        return (float(covariancia / denominador) if denominador > 0 else float('nan')), int(total)
+
+
+class BackendSQLite(_BackendSQL):
+    nome = 'sqlite'
+    extensao = 'sqlite'
+
+    def _conectar(self, caminho: str):
+        # O arquivo temporário só vira o banco da versão depois de completo: sem journal nem fsync
+        conexao = sqlite3.connect(caminho)
+        conexao.execute('PRAGMA journal_mode=OFF')
+        conexao.execute('PRAGMA synchronous=OFF')
+        return conexao
+
+    def _abrir(self, caminho: str):
+        # O banco de uma versão nunca muda depois de gravado: sem travas de arquivo
+        return sqlite3.connect(f'{Path(caminho).as_uri()}?mode=ro&immutable=1', uri=True)
+
+    def _carregar(self, conexao, tabela: str, df: pd.DataFrame):
+        conexao.execute(f"CREATE TABLE {tabela} ({', '.join(df.columns)})")
+        conexao.executemany(
+            f"INSERT INTO {tabela} VALUES ({', '.join('?' * len(df.columns))})",
+            df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        )
+
+        # Índices dos filtros e dos rankings (ordem decrescente, desempate pela posição)
+        for coluna in ('estado', 'regiao', 'sigla'):
+            if coluna in df.columns:
+                conexao.execute(f'CREATE INDEX {tabela}_{coluna} ON {tabela} ({coluna})')
+        if tabela == 'municipios':
+            for coluna in COLUNAS_RANKING:
+                if coluna in df.columns:
+                    conexao.execute(f'CREATE INDEX {tabela}_{coluna}_ranking ON {tabela} ({coluna} DESC, posicao)')
+        conexao.commit()
+
+
+class BackendDuckDB(_BackendSQL):
+    """DuckDB colunar: quantis e desvio padrão saem de agregados nativos numa passada"""
+
+    nome = 'duckdb'
+    extensao = 'duckdb'
+
+    def _conectar(self, caminho: str):
+        # duckdb é opcional e só é importado quando o backend abre um arquivo
+        import duckdb
+        return duckdb.connect(caminho)
+
+    def _abrir(self, caminho: str):
+        import duckdb
+        return duckdb.connect(caminho, read_only=True)
+
+    def _carregar(self, conexao, tabela: str, df: pd.DataFrame):
+        conexao.register('_carga', df)
+        try:
+            conexao.execute(f'CREATE TABLE {tabela} AS SELECT * FROM _carga')
+        finally:
+            conexao.unregister('_carga')
+
+    def _resumo(self, dados, coluna: str, filtro: str, parametros) -> dict:
+        contagem, media, desvio, minimo, maximo, q1, mediana, q3 = self._consultar(
+            dados, f'SELECT COUNT({coluna}), AVG({coluna}), STDDEV_SAMP({coluna}), MIN({coluna}), MAX({coluna}), '
+                   f'QUANTILE_CONT({coluna}, 0.25), QUANTILE_CONT({coluna}, 0.5), QUANTILE_CONT({coluna}, 0.75) '
+                   f'FROM municipios WHERE {filtro}', parametros
+        )[0]
+        if contagem == 0:
+            return {'contagem': 0}
+
+        return {
+            'media': float(media),
+            'mediana': float(mediana),
+            'desvio_padrao': float(desvio) if desvio is not None else float('nan'),
+            'minimo': float(minimo),
+            'maximo': float(maximo),
+            'q1': float(q1),
+            'q3': float(q3),
+            'contagem': int(contagem)
+        }
+
+
+BACKENDS = {'memoria': BackendMemoria, 'sqlite': BackendSQLite, 'duckdb': BackendDuckDB}
+
+
+def _tabela_sql(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas escalares prontas para o banco: categorias como texto, NaN como NULL e a posição da linha"""
+    colunas = {'posicao': np.arange(len(df), dtype='int64')}
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(serie.dtype):
+            colunas[coluna] = serie.astype(object).where(serie.notna(), None)
+        elif pd.api.types.is_float_dtype(serie.dtype):
+            colunas[coluna] = serie.astype('Float64')
+        elif pd.api.types.is_integer_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+            colunas[coluna] = serie
+    return pd.DataFrame(colunas)
+
+
+def _remover(caminho: str):
+    for sufixo in ('', '.wal', '-journal'):
+        try:
+            os.remove(caminho + sufixo)
+        except FileNotFoundError:
+            pass
+
+
+def _filtros(condicao: str, **filtros):
+    """Cláusula WHERE com os filtros de igualdade informados, como parâmetros"""
+    clausulas, parametros = [condicao], ()
+    for coluna, valor in filtros.items():
+        if valor is not None:
+            clausulas.append(f'{coluna} = ?')
+            parametros += (valor,)
+    return ' AND '.join(clausulas), parametros
+
+
+def configurar(ambiente=os.environ, base=None):
+    """Backend das análises conforme DADOS_BACKEND (memoria | sqlite | duckdb); memoria por padrão.
+
+    Os bancos dos backends SQL ficam em DADOS_BACKEND_CAMINHO (diretório, padrão o
+    temporário do sistema). Com a base informada, a versão atual é preparada já
+    aqui (índices em memória ou banco gravado) e as próximas quando cada uma for publicada.
+    """
+    nome = (ambiente.get('DADOS_BACKEND') or 'memoria').lower()
+    if nome not in BACKENDS:
+        raise BackendIndisponivel(f"DADOS_BACKEND inválido: {nome} (use {', '.join(BACKENDS)})")
+    if nome == 'duckdb' and importlib.util.find_spec('duckdb') is None:
+        raise BackendIndisponivel('DADOS_BACKEND=duckdb requer o pacote duckdb')
+
+    if nome == 'memoria':
+        backend = BackendMemoria()
+    else:
+        backend = BACKENDS[nome](ambiente.get('DADOS_BACKEND_CAMINHO') or tempfile.gettempdir())
+    if base is not None:
+        backend.publicar(base.atual)
+        base.ao_atualizar(backend.publicar)
+    return backend
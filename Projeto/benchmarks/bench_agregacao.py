@@ -0,0 +1,49 @@
+"""Escalabilidade do motor de agregação regional em granularidade municipal
+
+Uso: python benchmarks/bench_agregacao.py [--max-fator F] [--repeticoes R]
+"""
+import argparse
+import timeit
+
+import pandas as pd
+
+from sintetico import TOTAL_MUNICIPIOS, gerar_municipios
+
+import agregacao
+
+
+def agregacao_antiga(df: pd.DataFrame, metrica: str):
+    """Laço antigo: .apply na coluna de região aninhada, uma vez por região"""
+    distribuicao = {}
+    for regiao in df['regiao'].apply(lambda x: x['nome']).unique():
+        dados_regiao = df[df['regiao'].apply(lambda x: x['nome']) == regiao]
+        distribuicao[regiao] = (dados_regiao[metrica].sum(), dados_regiao[metrica].mean(), len(dados_regiao))
+    return distribuicao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-fator', type=int, default=20, help='Maior múltiplo de 5.570 linhas (ex.: anos)')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    fatores = [f for f in (1, 2, 5, 10, 20, 50) if f <= args.max_fator]
+    print(f"{'linhas':>9} {'motor (ms)':>11} {'ns/linha':>9} {'antigo (ms)':>12}")
+
+    for fator in fatores:
+        df = gerar_municipios(TOTAL_MUNICIPIOS * fator)
+        tempo = min(timeit.repeat(lambda: agregacao.agregar_tabela(df, 'pib', 'regiao'),
+                                  number=1, repeat=args.repeticoes))
+
+        # O laço antigo só é medido nas escalas menores: é O(regiões × linhas) em Python
+        antigo = ''
+        if fator <= 5:
+            aninhado = df.assign(regiao=[{'nome': r} for r in df['regiao'].astype(str)])
+            tempo_antigo = min(timeit.repeat(lambda: agregacao_antiga(aninhado, 'pib'), number=1, repeat=2))
+            antigo = f"{tempo_antigo * 1000:.2f}"
+
+        print(f"{len(df):>9} {tempo * 1000:>11.2f} {tempo / len(df) * 1e9:>9.1f} {antigo:>12}")
+
+
+if __name__ == '__main__':
+    main()
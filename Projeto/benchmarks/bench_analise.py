@@ -0,0 +1,90 @@
+"""Micro-benchmarks de cada método de AnaliseDemografica, por escala do conjunto
+
+Uso: python benchmarks/bench_analise.py [--escalas exemplo,brasil,serie] [--repeticoes R]
+
+'frio' mede a primeira chamada numa versão nova dos dados (sem memo);
+'quente' mede as chamadas seguintes na mesma versão.
+"""
+import argparse
+import time
+
+from sintetico import ESCALAS, ambiente, gerar_escala
+
+import analise_demografica
+from dados import Conjunto
+
+
+def cronometrar(funcao) -> float:
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def metodos_api(analise):
+    """Métodos usados pelos endpoints (recebem a versão do conjunto)"""
+    return {
+        'criar_ranking_pib': lambda d: analise.criar_ranking_pib(d, limite=20),
+        'criar_ranking_pib (colunar)': lambda d: analise.criar_ranking_pib(d, limite=20, colunar=True),
+        'criar_ranking_pib (estado)': lambda d: analise.criar_ranking_pib(d, limite=20, estado='SP'),
+        'analisar_correlacao_pib_idh': lambda d: analise.analisar_correlacao_pib_idh(d),
+        'comparar_estados': lambda d: analise.comparar_estados(d),
+        'analisar_distribuicao_regional': lambda d: analise.analisar_distribuicao_regional(d),
+        'calcular_estatisticas_descritivas': lambda d: analise.calcular_estatisticas_descritivas(d),
+        'calcular_estatisticas_descritivas (regiao)':
+            lambda d: analise.calcular_estatisticas_descritivas(d, regiao='Sudeste'),
+        'calcular_tendencias': lambda d: analise.calcular_tendencias(d, 'pib', limite=20)
+    }
+
+
+def metodos_modulo(analise):
+    """Métodos de analise_demografica.py (recebem listas de registros)"""
+    return {
+        'criar_ranking_pib': lambda d: analise.criar_ranking_pib(d.registros('municipios'), limite=20),
+        'analisar_correlacao_pib_idh':
+            lambda d: analise.analisar_correlacao_pib_idh(d.registros('municipios'), d.registros('municipios')),
+        'comparar_estados': lambda d: analise.comparar_estados(d.registros('estados')),
+        'analisar_distribuicao_regional': lambda d: analise.analisar_distribuicao_regional(),
+        'calcular_estatisticas_descritivas':
+            lambda d: analise.calcular_estatisticas_descritivas(d.registros('municipios')),
+        'calcular_tendencia':
+            lambda d: analise.calcular_tendencia(d.municipios['pib'].tolist())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escalas', default=','.join(ESCALAS), help=f"Entre {', '.join(ESCALAS)}")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    # recursos.py define a AnaliseDemografica usada pelos endpoints, sobre o backend de DADOS_BACKEND
+    import backends
+    import recursos
+
+    grupos = [('api', metodos_api(recursos.AnaliseDemografica(backends.configurar()))),
+              ('modulo', metodos_modulo(analise_demografica.AnaliseDemografica()))]
+
+    print(ambiente())
+    for escala in args.escalas.split(','):
+        estados, municipios = gerar_escala(escala)
+        print(f"\n{escala}: {len(estados)} estados, {len(municipios)} linhas de municípios, "
+              f"melhor de {args.repeticoes}")
+        print(f"{'método':<52} {'frio (ms)':>10} {'quente (ms)':>12}")
+
+        for grupo, metodos in grupos:
+            for nome, metodo in metodos.items():
+                frio, quente = [], []
+                for versao in range(args.repeticoes):
+                    dados = Conjunto(estados, municipios, versao)
+                    # O módulo recebe registros prontos: a conversão não entra na medida
+                    if grupo == 'modulo':
+                        dados.registros('municipios')
+                        dados.registros('estados')
+                    frio.append(cronometrar(lambda: metodo(dados)))
+                    quente.append(cronometrar(lambda: metodo(dados)))
+
+                print(f"{grupo + '.' + nome:<52} {min(frio) * 1000:>10.3f} {min(quente) * 1000:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
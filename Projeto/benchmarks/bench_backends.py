@@ -0,0 +1,129 @@
+"""Backends das análises (memoria, sqlite, duckdb): tempos e conferência dos resultados
+
+Uso: python benchmarks/bench_backends.py [--escalas exemplo,brasil,serie] [--backends memoria,sqlite,duckdb]
+                                         [--repeticoes R]
+
+'publicação' é a gravação do banco de uma versão nova (feita uma vez, quando a versão é
+publicada, fora das requisições); 'consulta' é o melhor tempo da consulta depois dela. Os resultados de cada backend SQL são conferidos
+contra o backend em memória (quartis contra o quantil exato do NumPy, já que a memória usa
+um esboço KLL) e o script termina com erro se algum divergir.
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sintetico import ESCALAS, ambiente, gerar_escala
+
+import backends
+from dados import Conjunto
+
+TOLERANCIA = 1e-9
+
+
+def consultas():
+    """Chamadas de cada backend, como feitas pelos endpoints"""
+    return {
+        'ranking': lambda b, d: b.ranking(d, 'pib', 20),
+        'ranking (estado)': lambda b, d: b.ranking(d, 'pib', 20, estado='SP'),
+        'ranking (pagina 50)': lambda b, d: b.ranking(d, 'idh', 20, 1000, regiao='Nordeste'),
+        'estatisticas': lambda b, d: b.estatisticas(d),
+        'estatisticas (regiao)': lambda b, d: b.estatisticas(d, regiao='Sudeste'),
+        'agregar (estado)': lambda b, d: b.agregar(d, 'pib', 'estado'),
+        'agregar (regiao)': lambda b, d: b.agregar(d, 'populacao', 'regiao'),
+        'correlacao': lambda b, d: b.correlacao(d, 'pib', 'idh')
+    }
+
+
+def proximos(a, b) -> bool:
+    return np.allclose(np.asarray(a, dtype='float64'), np.asarray(b, dtype='float64'),
+                       rtol=TOLERANCIA, atol=0, equal_nan=True)
+
+
+def conferir(nome: str, resultado, referencia, dados) -> bool:
+    """Compara o resultado de um backend SQL com o do backend em memória"""
+    if nome.startswith('ranking'):
+        return resultado[1] == referencia[1] and np.array_equal(resultado[0], referencia[0])
+    if nome.startswith('agregar'):
+        return list(resultado.index) == list(referencia.index) and proximos(resultado, referencia)
+    if nome == 'correlacao':
+        return resultado[1] == referencia[1] and proximos(resultado[0], referencia[0])
+
+    # Estatísticas: momentos e extremos iguais; quartis exatos contra o NumPy
+    filtro = {'regiao': 'Sudeste'} if 'regiao' in nome else {}
+    mascara = dados.mascara('municipios', **filtro)
+    if set(resultado) != set(referencia):
+        return False
+    for metrica, resumo in resultado.items():
+        valores = dados.valores('municipios', metrica)
+        valores = valores[~np.isnan(valores) & (True if mascara is None else mascara)]
+        exatos = dict(zip(('q1', 'mediana', 'q3'), np.quantile(valores, backends.QUANTIS)))
+        for chave, valor in resumo.items():
+            esperado = exatos[chave] if chave in exatos else referencia[metrica][chave]
+            if not proximos(valor, esperado):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escalas', default='exemplo,brasil,serie', help=f"Entre {', '.join(ESCALAS)}")
+    parser.add_argument('--backends', default=','.join(backends.BACKENDS))
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='bench-backends-')
+    instancias = {}
+    for nome in args.backends.split(','):
+        try:
+            instancias[nome] = backends.configurar({'DADOS_BACKEND': nome, 'DADOS_BACKEND_CAMINHO': diretorio})
+        except backends.BackendIndisponivel as erro:
+            print(f'{nome}: ignorado ({erro})')
+    referencia = backends.BackendMemoria()
+
+    print(ambiente())
+    divergencias = []
+    versao = 0
+    for escala in args.escalas.split(','):
+        estados, municipios = gerar_escala(escala)
+        print(f"\n{escala}: {len(estados)} estados, {len(municipios)} linhas de municípios, "
+              f"melhor de {args.repeticoes}")
+        print(f"{'consulta':<28} {'backend':<10} {'publicação (ms)':>16} {'consulta (ms)':>14} {'confere':>8}")
+
+        for nome, consulta in consultas().items():
+            for nome_backend, backend in instancias.items():
+                publicacao, tempos = [], []
+                for _ in range(args.repeticoes):
+                    versao += 1
+                    dados = Conjunto(estados, municipios, versao)
+                    inicio = time.perf_counter()
+                    backend.publicar(dados)
+                    publicacao.append(time.perf_counter() - inicio)
+                    resultado = consulta(backend, dados)
+                    for _ in range(args.repeticoes):
+                        inicio = time.perf_counter()
+                        consulta(backend, dados)
+                        tempos.append(time.perf_counter() - inicio)
+
+                confere = '-'
+                if nome_backend != 'memoria':
+                    confere = 'sim' if conferir(nome, resultado, consulta(referencia, dados), dados) else 'NÃO'
+                    if confere == 'NÃO':
+                        divergencias.append((escala, nome, nome_backend))
+
+                print(f"{nome:<28} {nome_backend:<10} {min(publicacao) * 1000:>16.3f} "
+                      f"{min(tempos) * 1000:>14.3f} {confere:>8}")
+
+    for backend in instancias.values():
+        if hasattr(backend, 'fechar'):
+            backend.fechar()
+
+    if divergencias:
+        print('\nDivergências:', ', '.join('/'.join(d) for d in divergencias))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""IBGEClient contra um IBGE simulado local: concorrência, caches e coalescência
+
+Uso: python benchmarks/bench_ibge_client.py [--latencia-ms L] [--repeticoes R]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sintetico import ambiente, gerar_estados
+
+from ibge_client import IBGEClient
+
+
+class IBGESimulado(BaseHTTPRequestHandler):
+    """Responde JSON com latência fixa, ETag e suporte a GET condicional"""
+    latencia = 0.02
+    requisicoes = 0
+    nao_modificadas = 0
+    estados = []
+    _trava = threading.Lock()
+
+    def do_GET(self):
+        time.sleep(self.latencia)
+        etag = '"v1"'
+        with self._trava:
+            IBGESimulado.requisicoes += 1
+            if self.headers.get('If-None-Match') == etag:
+                IBGESimulado.nao_modificadas += 1
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        if self.path.rstrip('/').endswith('localidades/estados'):
+            corpo = self.estados
+        else:
+            corpo = [{'id': i, 'nome': f'Município {i}'} for i in range(200)]
+
+        bruto = json.dumps(corpo).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(bruto)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(bruto)
+
+    def log_message(self, *args):
+        pass
+
+
+def medir(descricao, funcao, repeticoes, preparar=None):
+    """Melhor tempo e requisições ao IBGE simulado por execução"""
+    tempos, requisicoes = [], []
+    for _ in range(repeticoes):
+        contexto = preparar() if preparar else None
+        antes = IBGESimulado.requisicoes
+        inicio = time.perf_counter()
+        funcao(contexto)
+        tempos.append(time.perf_counter() - inicio)
+        requisicoes.append(IBGESimulado.requisicoes - antes)
+    print(f"{descricao:<46} {min(tempos) * 1000:>10.2f} {max(requisicoes):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencia-ms', type=float, default=20, help='Latência simulada do IBGE por requisição')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    IBGESimulado.latencia = args.latencia_ms / 1000
+    IBGESimulado.estados = [{'id': int(e['id']), 'sigla': e['sigla'], 'nome': e['nome']}
+                            for e in gerar_estados().astype(object).to_dict('records')]
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), IBGESimulado)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{servidor.server_port}'
+
+    def cliente(**opcoes):
+        return IBGEClient(url, requisicoes_por_segundo=10_000, **opcoes)
+
+    print(ambiente())
+    print(f"IBGE simulado com {args.latencia_ms:.0f} ms por requisição, melhor de {args.repeticoes}\n")
+    print(f"{'cenário':<46} {'tempo (ms)':>10} {'requisições':>12}")
+
+    ids = [str(e['id']) for e in IBGESimulado.estados]
+    medir('27 estados, sequencial (1 conexão)',
+          lambda c: c.get_municipios_todos_estados(ids), args.repeticoes, lambda: cliente(max_concorrencia=1))
+    medir('27 estados, paralelo (8 conexões)',
+          lambda c: c.get_municipios_todos_estados(ids), args.repeticoes, lambda: cliente(max_concorrencia=8))
+
+    quente = cliente()
+    quente.get_estados()
+    medir('1.000 leituras do cache em memória',
+          lambda _: [quente.get_estados() for _ in range(1000)], args.repeticoes)
+
+    def coalescer(c):
+        threads = [threading.Thread(target=c.get_estados) for _ in range(32)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    medir('32 threads pedindo a mesma chave (frio)', coalescer, args.repeticoes, cliente)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'cache.sqlite3')
+        cliente(caminho_cache=caminho).get_municipios_todos_estados(ids)
+
+        medir('27 estados do cache em disco (novo processo)',
+              lambda c: c.get_municipios_todos_estados(ids), args.repeticoes,
+              lambda: cliente(caminho_cache=caminho))
+
+        # TTL zero: tudo vencido, servido do disco e revalidado em segundo plano (304)
+        antes = IBGESimulado.nao_modificadas
+        medir('27 estados vencidos (revalidação em 2º plano)',
+              lambda c: c.get_municipios_todos_estados(ids), 1,
+              lambda: cliente(caminho_cache=caminho, ttl=0))
+        limite = time.monotonic() + 5
+        while IBGESimulado.nao_modificadas - antes < len(ids) and time.monotonic() < limite:
+            time.sleep(0.01)
+        print(f"{'  respostas 304 da revalidação':<46} {'':>10} {IBGESimulado.nao_modificadas - antes:>12}")
+
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Tempo de inicialização do worker: imports por módulo (-X importtime) em cada etapa do app
+
+Uso: python benchmarks/bench_importacao.py [--repeticoes R] [--modulos N]
+
+Cada cenário roda num interpretador novo (sem nada em sys.modules), como um
+worker que acabou de subir. 'total' é o tempo de parede do cenário (melhor de R);
+a tabela traz, da última rodada, cada módulo do projeto e cada pacote de terceiros
+(no ponto em que foi importado pela primeira vez), pelo tempo acumulado com as
+dependências; a biblioteca padrão fica de fora.
+"""
+import argparse
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+
+from sintetico import ambiente
+
+PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cenários: (descrição, código medido); o app só monta a API na primeira requisição ou com API_PRELOAD
+CENARIOS = [
+    ('import app', 'import app'),
+    ('create_app()', 'import app; app.create_app()'),
+    ('create_app() + 1a requisição', "import app; app.create_app().test_client().get('/health')"),
+    ('create_app(API_PRELOAD=1)', "import app; app.create_app({'API_PRELOAD': '1'})"),
+    ('import recursos (tudo de uma vez)', 'import recursos')
+]
+
+# Dependências do dashboard, quando instaladas (o Plotly só é importado ao desenhar um gráfico)
+DASHBOARD = ('streamlit', 'plotly.express')
+
+# Módulos do projeto: os .py da pasta Projeto
+PROPRIOS = frozenset(nome[:-3] for nome in os.listdir(PROJETO) if nome.endswith('.py'))
+
+# Biblioteca padrão e ganchos do site, que não são do app
+IGNORADOS = sys.stdlib_module_names | {'sitecustomize', 'usercustomize'}
+
+_LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| \s*(\S+)$')
+
+
+def medir(codigo: str):
+    """(tempo total em s, [(módulo, tipo, acumulado em s, próprio em s)] do projeto e dos pacotes)"""
+    programa = ('import time; _inicio = time.perf_counter()\n'
+                f'{codigo}\n'
+                'print(time.perf_counter() - _inicio)')
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', programa], cwd=PROJETO,
+                               capture_output=True, text=True, check=True,
+                               env={**os.environ, 'IBGE_CARGA': '', 'DADOS_COMPARTILHADOS': ''})
+
+    # A linha do pacote raiz (ex.: pandas) acumula todos os submódulos importados por ele
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        casamento = _LINHA.match(linha)
+        if not casamento:
+            continue
+        proprio, acumulado, nome = casamento.groups()
+        if nome in PROPRIOS:
+            tipo = 'projeto'
+        elif '.' not in nome and not nome.startswith('_') and nome not in IGNORADOS:
+            tipo = 'pacote'
+        else:
+            continue
+        modulos.append((nome, tipo, int(acumulado) / 1e6, int(proprio) / 1e6))
+
+    return float(resultado.stdout.strip().splitlines()[-1]), modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--modulos', type=int, default=12, help='Módulos listados por cenário')
+    args = parser.parse_args()
+
+    cenarios = list(CENARIOS)
+    for modulo in DASHBOARD:
+        if importlib.util.find_spec(modulo.split('.')[0]) is not None:
+            cenarios.append((f'dashboard: import {modulo}', f'import {modulo}'))
+
+    print(ambiente())
+    print(f"\n{'cenário':<40} {'total (ms)':>11} {'módulos':>8}")
+    detalhes = []
+    for descricao, codigo in cenarios:
+        tempos, modulos = [], []
+        for _ in range(args.repeticoes):
+            total, modulos = medir(codigo)
+            tempos.append(total)
+        print(f"{descricao:<40} {min(tempos) * 1000:>11.1f} {len(modulos):>8}")
+        detalhes.append((descricao, modulos))
+
+    for descricao, modulos in detalhes:
+        print(f"\n{descricao}")
+        print(f"  {'módulo':<28} {'tipo':<8} {'acumulado (ms)':>15} {'próprio (ms)':>13}")
+        for nome, tipo, acumulado, proprio in sorted(modulos, key=lambda m: -m[2])[:args.modulos]:
+            print(f"  {nome:<28} {tipo:<8} {acumulado * 1000:>15.1f} {proprio * 1000:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Tempo de inicialização: snapshot mapeado x JSON x API do IBGE (servidor local)
+
+Uso: python benchmarks/bench_inicializacao.py [--municipios N] [--repeticoes R]
+"""
+import argparse
+import functools
+import json
+import os
+import tempfile
+import threading
+import timeit
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from sintetico import TOTAL_MUNICIPIOS, gerar_estados, gerar_municipios
+
+from carregador import ClienteFixtures, carregar_ibge
+from dados import Conjunto, montar_estados, montar_municipios
+from ibge_client import IBGEClient
+import snapshot
+
+
+def gravar_json(caminho, dados):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+
+
+def gravar_fixtures(diretorio, estados, municipios):
+    """Respostas no formato do IBGE, um JSON por endpoint (como em fixtures/ibge)"""
+    def gravar(endpoint, dados):
+        caminho = os.path.join(diretorio, f'{endpoint}.json')
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        gravar_json(caminho, dados)
+
+    gravar('localidades/estados', [
+        {'id': int(e['id']), 'sigla': e['sigla'], 'nome': e['nome'], 'regiao': {'nome': e['regiao']}}
+        for e in estados.astype(object).to_dict('records')
+    ])
+
+    registros = municipios.astype(object).to_dict('records')
+    for e in estados.itertuples():
+        gravar(f'projecoes/populacao/{e.id}', {'projecao': {'populacao': int(e.populacao)}})
+        gravar(f'localidades/estados/{e.id}/municipios',
+               [{'id': m['codigo'], 'nome': m['municipio']} for m in registros if m['estado'] == e.sigla])
+
+    for endpoint, coluna in (('contasnacionais/municipios/pib', 'pib'), ('indicadores-sociais/municipios/idh', 'idh')):
+        gravar(endpoint, [{'municipio': {'id': m['codigo']}, 'valor': m[coluna]} for m in registros])
+    gravar('educacao/municipios/matriculas', [])
+    gravar('saude/municipios/estabelecimentos', [])
+
+
+class Fixtures(SimpleHTTPRequestHandler):
+    """Serve a árvore de fixtures como se fosse a API (endpoint -> endpoint.json)"""
+
+    def translate_path(self, path):
+        return super().translate_path(path.split('?')[0]) + '.json'
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--municipios', type=int, default=TOTAL_MUNICIPIOS)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    estados, municipios = gerar_estados(), gerar_municipios(args.municipios)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_snapshot = os.path.join(diretorio, 'dados.snapshot')
+        caminho_json = os.path.join(diretorio, 'dados.json')
+        raiz_fixtures = os.path.join(diretorio, 'ibge')
+
+        snapshot.gravar(caminho_snapshot, Conjunto(estados, municipios, versao=1), origem='benchmark')
+        gravar_json(caminho_json, {
+            'estados': estados.astype(object).to_dict('records'),
+            'municipios': municipios.astype(object).to_dict('records')
+        })
+        gravar_fixtures(raiz_fixtures, estados, municipios)
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Fixtures, directory=raiz_fixtures))
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{servidor.server_port}'
+
+        def por_json():
+            with open(caminho_json, encoding='utf-8') as arquivo:
+                bruto = json.load(arquivo)
+            return montar_estados(bruto['estados']), montar_municipios(bruto['municipios'])
+
+        def por_api():
+            # Cliente novo a cada rodada: sem cache em memória, como num boot
+            with IBGEClient(url, requisicoes_por_segundo=1000) as cliente:
+                return carregar_ibge(cliente)
+
+        cenarios = [
+            ('snapshot (mmap)', lambda: snapshot.abrir(caminho_snapshot)[:2]),
+            ('snapshot (mmap, sem checksum)', lambda: snapshot.abrir(caminho_snapshot, verificar=False)[:2]),
+            ('JSON de registros', por_json),
+            ('fixtures IBGE (disco)', lambda: carregar_ibge(ClienteFixtures(raiz_fixtures))),
+            ('API IBGE (servidor local)', por_api)
+        ]
+
+        print(f"{len(municipios)} municípios, snapshot de {os.path.getsize(caminho_snapshot) / 1024:.0f} KiB")
+        print(f"{'origem':<32} {'leitura (ms)':>13} {'até servir (ms)':>16}")
+        for descricao, carregar in cenarios:
+            leitura = min(timeit.repeat(carregar, number=1, repeat=args.repeticoes))
+            total = min(timeit.repeat(lambda: Conjunto(*carregar(), versao=1), number=1, repeat=args.repeticoes))
+            print(f"{descricao:<32} {leitura * 1000:>13.2f} {total * 1000:>16.2f}")
+
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compara a serialização por linhas e por colunas em 5.570 municípios
+
+Uso: python benchmarks/bench_serializacao.py [--municipios N] [--repeticoes R]
+"""
+import argparse
+import json
+import timeit
+
+from sintetico import TOTAL_MUNICIPIOS, gerar_estados, gerar_municipios
+
+from dados import Conjunto
+import serializacao
+
+CAMPOS = ('municipio', 'estado', 'pib', 'idh')
+
+
+def medir(descricao, funcao, repeticoes):
+    tempos = timeit.repeat(funcao, number=1, repeat=repeticoes)
+    tamanho = len(funcao())
+    print(f"{descricao:<32} {min(tempos) * 1000:>9.2f} ms {tamanho / 1024:>10.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--municipios', type=int, default=TOTAL_MUNICIPIOS)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    dados = Conjunto(gerar_estados(), gerar_municipios(args.municipios), versao=1)
+
+    def linhas_json():
+        registros = dados.registros('municipios', CAMPOS)
+        return serializacao._serializar_json({'dados': registros})
+
+    def linhas_to_dict_json():
+        # Caminho antigo: to_dict('records') a cada requisição
+        registros = dados.municipios[list(CAMPOS)].astype(object).to_dict('records')
+        return json.dumps({'dados': registros}, default=serializacao._padrao).encode('utf-8')
+
+    print(f"{args.municipios} municípios, melhor de {args.repeticoes} execuções\n")
+    print(f"{'formato':<32} {'tempo':>12} {'tamanho':>14}")
+    medir('linhas + to_dict + json', linhas_to_dict_json, args.repeticoes)
+    medir('linhas + json', linhas_json, args.repeticoes)
+
+    if serializacao.orjson is None:
+        print('\norjson não instalado: formatos rápidos ignorados')
+        return
+
+    def linhas_orjson():
+        return serializacao._serializar_orjson({'dados': dados.registros('municipios', CAMPOS)})
+
+    def colunas_orjson():
+        return serializacao._serializar_orjson({'dados': dados.colunas('municipios', CAMPOS)})
+
+    medir('linhas + orjson', linhas_orjson, args.repeticoes)
+    medir('colunas (?format=columns) + orjson', colunas_orjson, args.repeticoes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Teste de carga em processo de todos os endpoints GET da API
+
+Uso: python benchmarks/carga.py [--escala brasil] [--concorrencia C] [--requisicoes N]
+                                [--modo cliente|servidor] [--sem-cache]
+
+'cliente' usa o test client do Flask (sem rede); 'servidor' sobe o app num
+servidor local com threads e usa HTTP de verdade.
+"""
+import argparse
+import re
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+from sintetico import ESCALAS, ambiente, gerar_escala, rss_pico_mb
+
+# Parâmetros de exemplo dos endpoints que exigem query
+PARAMETROS = {
+    '/estados/export': 'format=arrow',
+    '/municipios/export': 'format=arrow',
+    '/municipios/busca': 'nome=Município 1',
+    '/analise/ranking-pib': 'limit=20',
+    '/analise/agregado': 'metrica=pib&nivel=regiao',
+    '/analise/correlacoes': 'metodo=pearson'
+}
+
+# Rotas da documentação e arquivos estáticos ficam de fora
+IGNORADAS = re.compile(r'^/(static|swaggerui|swagger\.json|docs|metrics)')
+
+
+def urls_exemplo(app, dados):
+    """Uma URL concreta por rota GET, com valores do conjunto carregado"""
+    valores = {'int': str(int(dados.municipios['codigo'].iloc[0])), 'default': str(dados.estados['sigla'].iloc[0])}
+
+    urls = []
+    for regra in app.url_map.iter_rules():
+        if 'GET' not in regra.methods or IGNORADAS.match(regra.rule):
+            continue
+
+        url = re.sub(r'<(?:(\w+):)?\w+>', lambda m: valores.get(m.group(1) or 'default', valores['default']),
+                     regra.rule)
+        parametros = PARAMETROS.get(regra.rule.rstrip('/')) or PARAMETROS.get(regra.rule)
+        urls.append((regra.rule, f'{url}?{parametros}' if parametros else url))
+
+    return sorted(set(urls))
+
+
+def executar(urls, buscar, concorrencia, total, sem_cache):
+    """Dispara `total` requisições em `concorrencia` threads; latências por rota"""
+    latencias = defaultdict(list)
+    erros = defaultdict(int)
+    trava = threading.Lock()
+    proxima = iter(range(total))
+
+    def trabalhador():
+        local, falhas = defaultdict(list), defaultdict(int)
+        while True:
+            with trava:
+                indice = next(proxima, None)
+            if indice is None:
+                break
+
+            regra, url = urls[indice % len(urls)]
+            if sem_cache:
+                url += ('&' if '?' in url else '?') + f'_n={indice}'
+
+            inicio = time.perf_counter()
+            status = buscar(url)
+            local[regra].append(time.perf_counter() - inicio)
+            if status >= 400:
+                falhas[regra] += 1
+
+        with trava:
+            for regra, valores in local.items():
+                latencias[regra].extend(valores)
+            for regra, quantidade in falhas.items():
+                erros[regra] += quantidade
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhador) for _ in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', default='brasil', choices=tuple(ESCALAS))
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--modo', default='cliente', choices=('cliente', 'servidor'))
+    parser.add_argument('--sem-cache', action='store_true', help='Parâmetro único por requisição (ignora o cache)')
+    args = parser.parse_args()
+
+    import app
+    import recursos
+
+    # App já montado: as rotas precisam existir antes de listar as URLs
+    aplicacao = app.create_app({'API_PRELOAD': '1'})
+    estados, municipios = gerar_escala(args.escala)
+    dados = recursos.contexto(aplicacao).base.atualizar(estados, municipios)
+    urls = urls_exemplo(aplicacao, dados)
+
+    servidor = None
+    if args.modo == 'servidor':
+        from werkzeug.serving import make_server
+
+        servidor = make_server('127.0.0.1', 0, aplicacao, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        raiz = f'http://127.0.0.1:{servidor.server_port}'
+        sessoes = threading.local()
+
+        def buscar(url):
+            if not hasattr(sessoes, 'sessao'):
+                sessoes.sessao = requests.Session()
+            return sessoes.sessao.get(raiz + url).status_code
+    else:
+        clientes = threading.local()
+
+        def buscar(url):
+            if not hasattr(clientes, 'cliente'):
+                clientes.cliente = aplicacao.test_client()
+            return clientes.cliente.get(url).status_code
+
+    # Aquecimento: uma passada por rota (índices, memos e cache de respostas)
+    for _, url in urls:
+        buscar(url)
+
+    latencias, erros, duracao = executar(urls, buscar, args.concorrencia, args.requisicoes, args.sem_cache)
+    if servidor is not None:
+        servidor.shutdown()
+
+    print(ambiente())
+    print(f"{args.escala}: {len(estados)} estados, {len(municipios)} linhas de municípios; "
+          f"modo {args.modo}, {args.concorrencia} threads, {args.requisicoes} requisições"
+          f"{', sem cache' if args.sem_cache else ''}\n")
+    print(f"{'rota':<40} {'n':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+
+    todas = []
+    for regra in sorted(latencias):
+        valores = np.array(latencias[regra]) * 1000
+        todas.append(valores)
+        p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+        print(f"{regra:<40} {len(valores):>6} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f} {erros[regra]:>6}")
+
+    geral = np.concatenate(todas)
+    p50, p95, p99 = np.percentile(geral, [50, 95, 99])
+    print(f"{'(todas)':<40} {len(geral):>6} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f} {sum(erros.values()):>6}")
+    print(f"\nVazão: {len(geral) / duracao:.0f} req/s em {duracao:.2f} s; pico de memória (RSS): {rss_pico_mb():.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Conjuntos de dados sintéticos em escala municipal para os benchmarks"""
+import os
+import platform
+import resource
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dados import ANO_REFERENCIA, UFS, montar_estados, montar_municipios  # noqa: E402
+
+TOTAL_MUNICIPIOS = 5570
+
+# Escalas nomeadas: (estados, municípios, anos), dos dados de exemplo ao Brasil inteiro em 20 anos
+ESCALAS = {
+    'exemplo': (10, 15, 1),
+    'pequena': (27, 500, 1),
+    'brasil': (27, TOTAL_MUNICIPIOS, 1),
+    'serie': (27, TOTAL_MUNICIPIOS, 20)
+}
+
+
+def gerar_estados(quantidade: int = len(UFS)):
+    """Os primeiros `quantidade` estados com população aleatória"""
+    rng = np.random.default_rng(0)
+    return montar_estados([
+        {'id': codigo, 'sigla': sigla, 'nome': f'Estado {sigla}', 'regiao': regiao,
+         'populacao': int(rng.integers(500_000, 46_000_000))}
+        for sigla, (codigo, regiao) in list(UFS.items())[:quantidade]
+    ])
+
+
+def gerar_municipios(quantidade: int = TOTAL_MUNICIPIOS, semente: int = 42, anos: int = 1, siglas=None):
+    """Municípios com PIB log-normal e IDH entre 0.4 e 0.9; com `anos` > 1, uma linha por ano"""
+    rng = np.random.default_rng(semente)
+    siglas = list(siglas if siglas is not None else UFS)
+    estados = rng.choice(siglas, size=quantidade)
+    pib = np.round(rng.lognormal(mean=0.5, sigma=1.5, size=quantidade), 2)
+    idh = np.round(rng.uniform(0.4, 0.9, size=quantidade), 3)
+
+    # Crescimento anual próprio de cada município, terminando no ano de referência
+    crescimento = rng.normal(0.02, 0.03, size=quantidade)
+    registros = []
+    for passo in range(anos):
+        recuo = anos - 1 - passo
+        fator = (1 + crescimento) ** -recuo
+        registros.extend(
+            {'codigo': int(UFS[uf][0]) * 100000 + i, 'municipio': f'Município {i}', 'estado': uf,
+             'pib': float(round(pib[i] * fator[i], 2)), 'idh': float(idh[i]), 'ano': ANO_REFERENCIA - recuo}
+            for i, uf in enumerate(estados)
+        )
+
+    return montar_municipios(registros)
+
+
+def gerar_escala(nome: str):
+    """(estados, municipios) de uma escala nomeada"""
+    estados, municipios, anos = ESCALAS[nome]
+    tabela_estados = gerar_estados(estados)
+    return tabela_estados, gerar_municipios(municipios, anos=anos, siglas=tabela_estados['sigla'].astype(str))
+
+
+def rss_pico_mb() -> float:
+    """Pico de memória residente do processo (ru_maxrss é KiB no Linux e bytes no macOS)"""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def ambiente() -> str:
+    """Linha de cabeçalho para resultados comparáveis entre execuções"""
+    import pandas as pd
+
+    return (f"Python {platform.python_version()}, NumPy {np.__version__}, pandas {pd.__version__}, "
+            f"{os.cpu_count()} CPUs, {platform.machine()}")
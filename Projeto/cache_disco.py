@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, NamedTuple, Optional
+
+
+def chave_cache(endpoint: str, params: Dict = None) -> str:
+    """Chave canônica: endpoint + parâmetros ordenados"""
+    if not params:
+        return endpoint
+    return f"{endpoint}?{json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+class Entrada(NamedTuple):
+    dados: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    salvo_em: float
+
+    def idade(self) -> float:
+        return time.time() - self.salvo_em
+
+
+class CacheDisco:
+    """Cache persistente em SQLite, compartilhado entre processos e reinícios"""
+
+    def __init__(self, caminho: str, ttl: float = 3600):
+        self.caminho = caminho
+        self.ttl = ttl
+        self._local = threading.local()
+
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+
+        conexao = self._conexao()
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                corpo BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                salvo_em REAL NOT NULL
+            )
+        """)
+        conexao.execute("""
+            CREATE TABLE IF NOT EXISTS reservas (
+                chave TEXT PRIMARY KEY,
+                expira_em REAL NOT NULL,
+                dono TEXT
+            )
+        """)
+
+        # Caches gravados antes de as reservas terem dono
+        colunas = [linha[1] for linha in conexao.execute("PRAGMA table_info(reservas)")]
+        if 'dono' not in colunas:
+            conexao.execute("ALTER TABLE reservas ADD COLUMN dono TEXT")
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread; o SQLite cuida da concorrência entre processos"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            self._local.conexao = conexao
+        return conexao
+
+    def obter(self, chave: str) -> Optional[Entrada]:
+        """Lê uma entrada do disco, fresca ou não"""
+        linha = self._conexao().execute(
+            "SELECT corpo, etag, last_modified, salvo_em FROM respostas WHERE chave = ?", (chave,)
+        ).fetchone()
+
+        if linha is None:
+            return None
+
+        corpo, etag, last_modified, salvo_em = linha
+        return Entrada(json.loads(zlib.decompress(corpo)), etag, last_modified, salvo_em)
+
+    def fresca(self, entrada: Entrada) -> bool:
+        return entrada.idade() < self.ttl
+
+    def gravar(self, chave: str, dados: Any, etag: str = None, last_modified: str = None):
+        """Grava (comprimido) o corpo de uma resposta"""
+        corpo = zlib.compress(json.dumps(dados, separators=(',', ':')).encode('utf-8'))
+        self._conexao().execute(
+            "INSERT OR REPLACE INTO respostas (chave, corpo, etag, last_modified, salvo_em) VALUES (?, ?, ?, ?, ?)",
+            (chave, corpo, etag, last_modified, time.time())
+        )
+
+    def renovar(self, chave: str):
+        """Marca uma entrada como revalidada (resposta 304)"""
+        self._conexao().execute("UPDATE respostas SET salvo_em = ? WHERE chave = ?", (time.time(), chave))
+
+    def reservar(self, chave: str, duracao: float = 30) -> Optional[str]:
+        """Reserva a busca de uma chave entre processos: o dono da reserva, ou None se outro já a tem"""
+        agora = time.time()
+        dono = uuid.uuid4().hex
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            conexao.execute("DELETE FROM reservas WHERE chave = ? AND expira_em < ?", (chave, agora))
+            cursor = conexao.execute(
+                "INSERT OR IGNORE INTO reservas (chave, expira_em, dono) VALUES (?, ?, ?)",
+                (chave, agora + duracao, dono)
+            )
+            conexao.execute("COMMIT")
+        except sqlite3.Error:
+            conexao.execute("ROLLBACK")
+            raise
+        return dono if cursor.rowcount == 1 else None
+
+    def liberar(self, chave: str, dono: str):
+        """Libera a reserva só se ela ainda for de `dono` (a expirada pode já ser de outro processo)"""
+        self._conexao().execute("DELETE FROM reservas WHERE chave = ? AND dono = ?", (chave, dono))
+
+    def aguardar(self, chave: str, desde: float, timeout: float = 30) -> Optional[Entrada]:
+        """Espera outro processo gravar a chave (após `desde`) e devolve a entrada"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            entrada = self.obter(chave)
+            if entrada is not None and entrada.salvo_em >= desde:
+                return entrada
+
+            # Reserva liberada sem gravação: o outro processo falhou
+            linha = self._conexao().execute("SELECT 1 FROM reservas WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                entrada = self.obter(chave)
+                return entrada if entrada is not None and entrada.salvo_em >= desde else None
+
+            time.sleep(0.1)
+
+        return None
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+from functools import wraps
+
+import cachetools
+from flask import Response, request
+
+from coalescencia import VooUnico
+
+
+class CacheRespostas:
+    """Respostas já serializadas, por versão do conjunto de dados e parâmetros"""
+
+    def __init__(self, maximo: int = 512):
+        self._respostas = cachetools.LRUCache(maxsize=maximo)
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.nao_modificadas = 0
+        self._voo_unico = VooUnico()
+
+    @staticmethod
+    def chave(versao: int):
+        """Versão dos dados + rota + parâmetros da query em ordem canônica"""
+        return versao, request.path, tuple(sorted(request.args.items(multi=True)))
+
+    def obter(self, chave):
+        with self._trava:
+            entrada = self._respostas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+            return entrada
+
+    def guardar(self, chave, corpo: bytes, mimetype: str):
+        etag = hashlib.sha1(corpo).hexdigest()
+        entrada = (corpo, mimetype, etag)
+        with self._trava:
+            self._respostas[chave] = entrada
+        return entrada
+
+    def _gerar(self, chave, metodo, recurso, args, kwargs):
+        resposta = metodo(recurso, *args, **kwargs)
+        if resposta.status_code != 200:
+            return resposta, None
+        return resposta, self.guardar(chave, resposta.get_data(), resposta.mimetype)
+
+    def limpar(self, *_):
+        """Descarta tudo (usado como gancho de atualização da base)"""
+        with self._trava:
+            self._respostas.clear()
+
+    def metricas(self):
+        with self._trava:
+            metricas = {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'nao_modificadas': self.nao_modificadas,
+                'tamanho': len(self._respostas)
+            }
+        metricas['coalescidas'] = self._voo_unico.metricas()['coalescidas']
+        return metricas
+
+    def em_cache(self, metodo):
+        """Decorador para GETs de recursos cujo resultado só muda com a versão dos dados"""
+        @wraps(metodo)
+        def wrapper(recurso, *args, **kwargs):
+            chave = self.chave(recurso.dados.versao) + (tuple(sorted(kwargs.items())),)
+            entrada = self.obter(chave)
+
+            if entrada is None:
+                # Falhas simultâneas da mesma chave calculam a resposta uma única vez
+                resposta, entrada = self._voo_unico.executar(
+                    chave, lambda: self._gerar(chave, metodo, recurso, args, kwargs)
+                )
+                if entrada is None:
+                    return resposta
+
+            corpo, mimetype, etag = entrada
+            if request.if_none_match.contains(etag):
+                with self._trava:
+                    self.nao_modificadas += 1
+                resposta = Response(status=304)
+            else:
+                resposta = Response(corpo, mimetype=mimetype)
+
+            resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+
+        return wrapper
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from dados import ANO_REFERENCIA, montar_estados, montar_municipios
+from ibge_client import IBGEClient
+import snapshot
+
+DIRETORIO_FIXTURES = Path(__file__).parent / 'fixtures' / 'ibge'
+
+# Indicadores municipais: coluna -> campo do valor na resposta (quando não vem em 'valor')
+INDICADORES = {'pib': 'pib', 'idh': 'idh', 'educacao': 'matriculas', 'saude': 'estabelecimentos'}
+
+
+class ClienteFixtures(IBGEClient):
+    """IBGEClient que responde com gravações em disco, um JSON por endpoint"""
+
+    def __init__(self, diretorio=DIRETORIO_FIXTURES, **kwargs):
+        super().__init__(**kwargs)
+        self.diretorio = Path(diretorio)
+
+    def _make_request(self, endpoint: str, params=None):
+        # Com parâmetros, eles entram no nome: contasnacionais/municipios/pib.ano-2020.json
+        sufixo = ''.join(f'.{chave}-{valor}' for chave, valor in sorted((params or {}).items()))
+        caminho = self.diretorio / f'{endpoint}{sufixo}.json'
+        if not caminho.exists():
+            return {}
+        return json.loads(caminho.read_text(encoding='utf-8'))
+
+
+def _codigo(registro: dict):
+    """Código IBGE do município, aceitando {'codigo'}, {'id'} ou {'municipio': {'id'}}"""
+    for chave in ('codigo', 'id'):
+        if registro.get(chave) is not None:
+            return int(registro[chave])
+
+    municipio = registro.get('municipio') or registro.get('localidade')
+    if isinstance(municipio, dict) and municipio.get('id') is not None:
+        return int(municipio['id'])
+    return None
+
+
+def _por_codigo(registros, campo: str) -> dict:
+    """Mapeia código IBGE -> valor do indicador (em 'valor' ou no campo próprio)"""
+    valores = {}
+    for registro in registros or []:
+        codigo = _codigo(registro)
+        valor = registro.get('valor', registro.get(campo))
+        if codigo is not None and valor is not None:
+            valores[codigo] = float(valor)
+    return valores
+
+
+def _populacao(resposta) -> int:
+    """População na resposta de projeções ({'projecao': {'populacao'}}) ou direta"""
+    if not isinstance(resposta, dict):
+        return 0
+    projecao = resposta.get('projecao') or {}
+    return int(projecao.get('populacao') or resposta.get('populacao') or 0)
+
+
+def _nome(registro: dict, *caminho: str):
+    """Nome em um caminho de dicts aninhados (None se algum nível faltar)"""
+    for chave in caminho:
+        registro = registro.get(chave) if isinstance(registro, dict) else None
+    return registro.get('nome') if isinstance(registro, dict) else None
+
+
+def _exigir(resposta, descricao: str):
+    """Resposta vazia é falha (o IBGEClient devolve {} em erro), não ausência de dados"""
+    if not resposta:
+        raise RuntimeError(f'IBGE não retornou {descricao}')
+    return resposta
+
+
+def ler_anos(texto: str = None) -> tuple:
+    """Anos de IBGE_ANOS: intervalo ('2018-2020') ou lista ('2018,2020'); sem ela, o de referência"""
+    if not texto:
+        return (ANO_REFERENCIA,)
+    if '-' in texto:
+        inicio, fim = (int(parte) for parte in texto.split('-', 1))
+        return tuple(range(inicio, fim + 1))
+    return tuple(sorted({int(parte) for parte in texto.split(',') if parte.strip()}))
+
+
+def carregar_ibge(cliente: IBGEClient, anos=(ANO_REFERENCIA,)):
+    """Busca estados, municípios e indicadores e junta tudo pelo código IBGE.
+
+    O ano mais recente traz todos os indicadores; dos anteriores vem só o PIB (um
+    pedido por ano), em linhas empilhadas antes dele na coluna `ano`.
+
+    Qualquer busca que falhe (ou volte vazia) interrompe a carga com RuntimeError:
+    publicar um estado sem municípios ou um indicador todo NaN seria pior que
+    seguir com a versão anterior.
+    """
+    anos = sorted(set(anos))
+    ano = anos[-1]
+    estados = _exigir(cliente.get_estados(), 'a lista de estados')
+
+    siglas = {str(e['id']): e['sigla'] for e in estados}
+
+    buscas = {
+        'pib': lambda: cliente.get_pib_municipios(ano),
+        'idh': cliente.get_idh_municipios,
+        'educacao': cliente.get_educacao_municipios,
+        'saude': cliente.get_saude_municipios
+    }
+
+    # Municípios e indicadores de cada estado (um pedido por estado) e municipais saem em paralelo
+    with ThreadPoolExecutor(max_workers=len(buscas) + len(anos) + 1) as executor:
+        municipios_futuro = executor.submit(cliente.get_municipios_todos_estados, list(siglas))
+        estaduais_futuro = executor.submit(cliente.get_indicadores_estados, list(siglas))
+        futuros = {coluna: executor.submit(busca) for coluna, busca in buscas.items()}
+        anteriores_futuros = {anterior: executor.submit(cliente.get_pib_municipios, anterior) for anterior in anos[:-1]}
+
+        municipios_por_estado = municipios_futuro.result()
+        populacoes = {estado_id: indicadores_estado['populacao']
+                      for estado_id, indicadores_estado in estaduais_futuro.result().items()}
+        indicadores = {coluna: _por_codigo(_exigir(futuro.result(), f'o indicador {coluna}'), INDICADORES[coluna])
+                       for coluna, futuro in futuros.items()}
+        pib_anteriores = {anterior: _por_codigo(_exigir(futuro.result(), f'o PIB de {anterior}'), 'pib')
+                          for anterior, futuro in anteriores_futuros.items()}
+
+    for estado_id, sigla in siglas.items():
+        _exigir(municipios_por_estado.get(estado_id), f'os municípios de {sigla}')
+        _exigir(populacoes.get(estado_id), f'a população de {sigla}')
+
+    registros_estados = [dict(e, populacao=_populacao(populacoes.get(str(e['id'])))) for e in estados]
+
+    por_ano = {a: [] for a in anos}
+    for estado_id, municipios in municipios_por_estado.items():
+        for municipio in municipios:
+            codigo = int(municipio['id'])
+            registro = {
+                'codigo': codigo,
+                'municipio': municipio['nome'],
+                'estado': siglas[estado_id],
+                'mesorregiao': _nome(municipio, 'microrregiao', 'mesorregiao'),
+                'microrregiao': _nome(municipio, 'microrregiao')
+            }
+            for anterior, valores in pib_anteriores.items():
+                por_ano[anterior].append(dict(registro, ano=anterior, pib=valores.get(codigo)))
+            por_ano[ano].append(dict(registro, ano=ano, **{c: v.get(codigo) for c, v in indicadores.items()}))
+
+    # Anos anteriores primeiro e o mais recente no fim, a ordem em que o Conjunto separa os dois
+    registros_municipios = [registro for a in anos for registro in por_ano[a]]
+    return montar_estados(registros_estados), montar_municipios(registros_municipios)
+
+
+class CarregadorIBGE:
+    """Carga periódica em segundo plano; a versão anterior segue servindo até a troca"""
+
+    def __init__(self, base, cliente: IBGEClient, intervalo: float = None, anos=(ANO_REFERENCIA,),
+                 caminho_snapshot: str = None):
+        self.base = base
+        self.cliente = cliente
+        self.intervalo = intervalo
+        self.anos = tuple(anos)
+        self.caminho_snapshot = caminho_snapshot
+        self.cargas = 0
+        self.ultima_carga = None
+        self.ultima_duracao = None
+        self.ultimo_erro = None
+        self.em_andamento = False
+        self._parar = threading.Event()
+        self._thread = None
+        self._ouvintes = []
+        self._trava = threading.Lock()
+
+    def ao_mudar(self, callback):
+        """Registra uma função chamada com o resumo() agora e a cada início e fim de carga"""
+        with self._trava:
+            self._ouvintes.append(callback)
+            callback(self.resumo())
+        return callback
+
+    def _notificar(self):
+        with self._trava:
+            resumo = self.resumo()
+            for callback in self._ouvintes:
+                callback(resumo)
+
+    def carregar(self):
+        """Busca tudo fora da trava do store e publica a nova versão de uma vez"""
+        try:
+            return self._carregar()
+        finally:
+            self._notificar()
+
+    def _carregar(self):
+        self.em_andamento = True
+        self._notificar()
+        inicio = time.perf_counter()
+        try:
+            estados, municipios = carregar_ibge(self.cliente, self.anos)
+
+            # Só os estados que mudaram são recalculados (nada é publicado se a carga veio igual)
+            conjunto = self.base.recarregar(estados, municipios)
+        except Exception as e:
+            self.ultimo_erro = str(e)
+            print(f"Erro na carga do IBGE (mantendo a versão atual): {e}")
+            return None
+        finally:
+            self.em_andamento = False
+
+        self.cargas += 1
+        self.ultima_carga = datetime.now()
+        self.ultima_duracao = time.perf_counter() - inicio
+        self.ultimo_erro = None
+
+        # O próximo boot mapeia esta versão em vez de buscar tudo de novo
+        if self.caminho_snapshot:
+            try:
+                snapshot.gravar(self.caminho_snapshot, conjunto, origem=type(self.cliente).__name__)
+            except OSError as e:
+                print(f"Erro ao gravar o snapshot: {e}")
+
+        return conjunto
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self.carregar()
+            if not self.intervalo or self._parar.wait(self.intervalo):
+                break
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='carregador-ibge', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout: float = None):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self) -> dict:
+        return {
+            'origem': type(self.cliente).__name__,
+            'em_andamento': self.em_andamento,
+            'cargas': self.cargas,
+            'ultima_carga': self.ultima_carga.isoformat() if self.ultima_carga else None,
+            'ultima_duracao_s': self.ultima_duracao,
+            'ultimo_erro': self.ultimo_erro,
+            'intervalo_s': self.intervalo,
+            'anos': list(self.anos)
+        }
+
+    def resumo(self) -> dict:
+        """Status da carga e métricas do cliente, como publicados para os workers"""
+        return {'status': self.status(), 'cliente': self.cliente.metricas()}
+
+
+def configurar(base, ambiente=os.environ):
+    """Inicia a carga conforme IBGE_CARGA (ibge | fixtures), dos anos de IBGE_ANOS; sem ela, ficam os exemplos"""
+    origem = ambiente.get('IBGE_CARGA', '').lower()
+    if origem == 'fixtures':
+        cliente = ClienteFixtures(ambiente.get('IBGE_FIXTURES', DIRETORIO_FIXTURES))
+    elif origem == 'ibge':
+        opcoes = {'caminho_cache': ambiente.get('IBGE_CACHE')}
+        if ambiente.get('IBGE_URL'):
+            opcoes['base_url'] = ambiente['IBGE_URL']
+        cliente = IBGEClient(**opcoes)
+    else:
+        return None
+
+    intervalo = float(ambiente.get('IBGE_INTERVALO') or 0) or None
+    return CarregadorIBGE(base, cliente, intervalo, ler_anos(ambiente.get('IBGE_ANOS')),
+                          caminho_snapshot=ambiente.get('DADOS_SNAPSHOT')).iniciar()
@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Chamada:
+    """Execução em andamento compartilhada por todos que pediram a mesma chave"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class VooUnico:
+    """Single-flight: no máximo uma execução por chave; os demais aguardam o resultado"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._em_andamento: Dict[Hashable, _Chamada] = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    def executar(self, chave: Hashable, funcao: Callable[[], Any]) -> Any:
+        """Executa `funcao` ou espera a execução já em andamento para a mesma chave"""
+        with self._trava:
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+
+            if lider:
+                chamada = _Chamada()
+                self._em_andamento[chave] = chamada
+                self.execucoes += 1
+            else:
+                self.coalescidas += 1
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+            return chamada.resultado
+        except BaseException as erro:
+            chamada.erro = erro
+            raise
+        finally:
+            with self._trava:
+                del self._em_andamento[chave]
+            chamada.evento.set()
+
+    def metricas(self) -> Dict[str, int]:
+        with self._trava:
+            return {
+                'execucoes': self.execucoes,
+                'coalescidas': self.coalescidas,
+                'em_andamento': len(self._em_andamento)
+            }
@@ -0,0 +1,120 @@
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+# Layout: [tamanho do cabeçalho (uint64)] [cabeçalho JSON] [colunas, cada uma alinhada em 64 bytes]
+ALINHAMENTO = 64
+_TAMANHO = struct.Struct('<Q')
+
+
+def _alinhar(posicao: int) -> int:
+    return -(-posicao // ALINHAMENTO) * ALINHAMENTO
+
+
+def _buffers_coluna(serie: pd.Series):
+    """Descreve uma coluna e devolve os arrays que a representam em disco/memória"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        descricao = {'tipo': 'categoria', 'categorias': serie.cat.categories.tolist(),
+                     'ordenada': bool(serie.cat.ordered)}
+        return descricao, {'codigos': serie.array.codes}
+
+    if pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+        valores = serie.to_numpy()
+        return {'tipo': 'numero'}, {'valores': valores}
+
+    # Texto: todos os valores concatenados e os limites de cada um (em caracteres)
+    valores = serie.astype(object)
+    nulos = valores.isna().to_numpy()
+    textos = ['' if nulo else str(v) for v, nulo in zip(valores.tolist(), nulos)]
+    limites = np.zeros(len(textos) + 1, dtype='int64')
+    np.cumsum([len(t) for t in textos], out=limites[1:])
+
+    buffers = {'limites': limites, 'texto': np.frombuffer(''.join(textos).encode('utf-8'), dtype='uint8')}
+    if nulos.any():
+        buffers['nulos'] = nulos
+    return {'tipo': 'texto', 'dtype': str(serie.dtype)}, buffers
+
+
+def empacotar(tabelas: dict, metadados: dict = None) -> bytes:
+    """Serializa tabelas (nome -> DataFrame) num único bloco contíguo e mapeável"""
+    cabecalho = {'metadados': metadados or {}, 'tabelas': {}}
+    arrays = []
+    posicao = 0
+
+    for nome, df in tabelas.items():
+        colunas = []
+        for coluna in df.columns:
+            descricao, buffers = _buffers_coluna(df[coluna])
+            descricao['nome'] = coluna
+            descricao['buffers'] = {}
+
+            for chave, array in buffers.items():
+                array = np.ascontiguousarray(array)
+                posicao = _alinhar(posicao)
+                descricao['buffers'][chave] = {'offset': posicao, 'dtype': array.dtype.str,
+                                               'tamanho': int(array.size)}
+                arrays.append((posicao, array))
+                posicao += array.nbytes
+
+            colunas.append(descricao)
+        cabecalho['tabelas'][nome] = {'linhas': len(df), 'colunas': colunas}
+
+    # Offsets do cabeçalho são relativos ao início da área de dados
+    bruto = json.dumps(cabecalho, ensure_ascii=False).encode('utf-8')
+    inicio = _alinhar(_TAMANHO.size + len(bruto))
+
+    bloco = bytearray(inicio + posicao)
+    _TAMANHO.pack_into(bloco, 0, len(bruto))
+    bloco[_TAMANHO.size:_TAMANHO.size + len(bruto)] = bruto
+    for offset, array in arrays:
+        bloco[inicio + offset:inicio + offset + array.nbytes] = array.tobytes()
+
+    return bytes(bloco)
+
+
+def ler_cabecalho(buffer) -> tuple:
+    """Cabeçalho e posição onde começa a área de dados"""
+    tamanho, = _TAMANHO.unpack_from(buffer, 0)
+    cabecalho = json.loads(bytes(buffer[_TAMANHO.size:_TAMANHO.size + tamanho]).decode('utf-8'))
+    return cabecalho, _alinhar(_TAMANHO.size + tamanho)
+
+
+def _array(buffer, inicio: int, descricao: dict) -> np.ndarray:
+    """View somente leitura sobre o buffer, sem cópia"""
+    array = np.frombuffer(buffer, dtype=np.dtype(descricao['dtype']), count=descricao['tamanho'],
+                          offset=inicio + descricao['offset'])
+    array.flags.writeable = False
+    return array
+
+
+def _montar_coluna(buffer, inicio: int, descricao: dict):
+    buffers = {chave: _array(buffer, inicio, d) for chave, d in descricao['buffers'].items()}
+
+    if descricao['tipo'] == 'numero':
+        return buffers['valores']
+
+    if descricao['tipo'] == 'categoria':
+        tipo = pd.CategoricalDtype(descricao['categorias'], ordered=descricao['ordenada'])
+        return pd.Categorical.from_codes(buffers['codigos'], dtype=tipo, validate=False)
+
+    # Texto é o único tipo copiado: vira objetos Python por processo
+    texto = buffers['texto'].tobytes().decode('utf-8')
+    limites = buffers['limites'].tolist()
+    valores = [texto[a:b] for a, b in zip(limites[:-1], limites[1:])]
+    if 'nulos' in buffers:
+        valores = [None if nulo else v for v, nulo in zip(valores, buffers['nulos'].tolist())]
+    return pd.array(valores, dtype=descricao['dtype'])
+
+
+def desempacotar(buffer) -> tuple:
+    """Tabelas (nome -> DataFrame) e metadados; colunas numéricas e categóricas são views do buffer"""
+    cabecalho, inicio = ler_cabecalho(buffer)
+
+    tabelas = {}
+    for nome, tabela in cabecalho['tabelas'].items():
+        colunas = {d['nome']: _montar_coluna(buffer, inicio, d) for d in tabela['colunas']}
+        tabelas[nome] = pd.DataFrame(colunas, copy=False)
+
+    return tabelas, cabecalho['metadados']
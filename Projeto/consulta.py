@@ -0,0 +1,138 @@
+import numpy as np
+
+# Colunas com filtro de faixa (<coluna>_min / <coluna>_max) em cada tabela
+FAIXAS = {
+    'estados': ('populacao',),
+    'municipios': ('pib', 'idh')
+}
+
+# Filtro de estado: a coluna com a sigla em cada tabela
+COLUNA_ESTADO = {'estados': 'sigla', 'municipios': 'estado'}
+
+
+class ConsultaInvalida(ValueError):
+    """Parâmetro de consulta que não corresponde às colunas da tabela"""
+
+
+class Consulta:
+    """Filtros, projeção, ordenação e página de uma listagem"""
+
+    def __init__(self, tabela: str, campos, estado=None, regiao=None, faixas=None, ordenar=None,
+                 decrescente=False, limite=None, deslocamento=0):
+        self.tabela = tabela
+        self.campos = tuple(campos)
+        self.estado = estado
+        self.regiao = regiao
+        self.faixas = faixas or {}
+        self.ordenar = ordenar
+        self.decrescente = decrescente
+        self.limite = limite
+        self.deslocamento = deslocamento
+
+    @classmethod
+    def de_args(cls, tabela: str, args: dict, colunas, campos_padrao) -> 'Consulta':
+        """Monta a consulta a partir dos argumentos da query, validando os nomes de colunas"""
+        campos = tuple(c.strip() for c in args['fields'].split(',')) if args.get('fields') else tuple(campos_padrao)
+        invalidos = [c for c in campos if c not in colunas]
+        if invalidos:
+            raise ConsultaInvalida(f"Campos inválidos: {', '.join(invalidos)}")
+
+        # sort=pib em ordem crescente, sort=-pib em decrescente
+        ordenar, decrescente = args.get('sort'), False
+        if ordenar:
+            decrescente = ordenar.startswith('-')
+            ordenar = ordenar.lstrip('-+').strip()
+            if ordenar not in colunas:
+                raise ConsultaInvalida(f'Campo de ordenação inválido: {ordenar}')
+
+        limite, deslocamento = args.get('limit'), args.get('offset') or 0
+        if (limite is not None and limite < 0) or deslocamento < 0:
+            raise ConsultaInvalida('limit e offset devem ser positivos')
+
+        faixas = {}
+        for coluna in FAIXAS[tabela]:
+            for limite_faixa in ('min', 'max'):
+                valor = args.get(f'{coluna}_{limite_faixa}')
+                if valor is not None and coluna in colunas:
+                    faixas[(coluna, limite_faixa)] = valor
+
+        return cls(tabela, campos, estado=args['estado'].upper() if args.get('estado') else None,
+                   regiao=args.get('regiao'), faixas=faixas, ordenar=ordenar, decrescente=decrescente,
+                   limite=limite, deslocamento=deslocamento)
+
+    def executar(self, dados):
+        """Retorna (posições da página, total) ou (None, total) quando a resposta é a tabela inteira"""
+        posicoes, ordenado = self._candidatos(dados)
+
+        # Faixas: uma comparação vetorizada por predicado, só sobre os candidatos
+        for (coluna, limite_faixa), valor in self.faixas.items():
+            valores = dados.valores(self.tabela, coluna)
+            if posicoes is None:
+                teste = valores >= valor if limite_faixa == 'min' else valores <= valor
+                posicoes = np.flatnonzero(teste)
+            else:
+                valores = valores[posicoes]
+                posicoes = posicoes[valores >= valor if limite_faixa == 'min' else valores <= valor]
+
+        if self.ordenar and not ordenado:
+            posicoes = self._ordenar(dados, posicoes)
+
+        total = len(getattr(dados, self.tabela)) if posicoes is None else len(posicoes)
+        if posicoes is None and (self.limite is not None or self.deslocamento):
+            posicoes = np.arange(total)
+        if posicoes is not None:
+            fim = None if self.limite is None else self.deslocamento + self.limite
+            posicoes = posicoes[self.deslocamento:fim]
+
+        return posicoes, total
+
+    def _candidatos(self, dados):
+        """Posições que passam nos filtros de igualdade, usando os índices quando existem"""
+        coluna_estado = COLUNA_ESTADO[self.tabela]
+
+        # Ordenação por pib/idh: o índice de ranking já está ordenado e dividido por estado e região
+        if self.tabela == 'municipios' and self.ordenar in dados.rankings:
+            mascara = dados.mascara(self.tabela, estado=self.estado, regiao=self.regiao)
+            if not self.decrescente:
+                # Crescente: ordem estável própria, montada uma vez por versão (inverter o índice
+                # decrescente deixaria os empates na ordem inversa à das linhas)
+                ordem = dados.memo(('ordem_crescente', self.ordenar), lambda: np.argsort(
+                    dados.valores(self.tabela, self.ordenar), kind='stable'))
+                return (ordem if mascara is None else ordem[mascara[ordem]]), True
+
+            ordem = dados.rankings[self.ordenar].posicoes(estado=self.estado, regiao=self.regiao)
+
+            # Linhas sem o valor ficam no fim, como no sort do pandas
+            sem_valor = np.flatnonzero(np.isnan(dados.valores(self.tabela, self.ordenar)))
+            if mascara is not None:
+                sem_valor = sem_valor[mascara[sem_valor]]
+            return np.concatenate([ordem, sem_valor]), True
+
+        # Estado nos estados: busca no índice por sigla
+        if self.tabela == 'estados' and self.estado:
+            posicao = dados.estados_por_sigla.get(self.estado)
+            posicoes = np.array([] if posicao is None else [posicao], dtype='int64')
+            if self.regiao and len(posicoes):
+                posicoes = posicoes[dados.valores(self.tabela, 'regiao')[posicoes] == self.regiao]
+            return posicoes, False
+
+        mascara = dados.mascara(self.tabela, **{coluna_estado: self.estado, 'regiao': self.regiao})
+        return (None if mascara is None else np.flatnonzero(mascara)), False
+
+    def _ordenar(self, dados, posicoes):
+        """Ordenação estável dos candidatos, com valores ausentes no fim"""
+        serie = getattr(dados, self.tabela)[self.ordenar]
+        if posicoes is not None:
+            serie = serie.iloc[posicoes]
+        serie = serie.reset_index(drop=True)
+
+        ordem = serie.sort_values(ascending=not self.decrescente, kind='stable', na_position='last').index.to_numpy()
+        return ordem if posicoes is None else posicoes[ordem]
+
+
+def projetar(registros, posicoes, campos) -> list:
+    """Registros das posições pedidas, só com os campos pedidos"""
+    linhas = registros if posicoes is None else [registros[i] for i in posicoes]
+    if not linhas or set(campos) == set(linhas[0]):
+        return linhas
+    return [{c: linha[c] for c in campos} for linha in linhas]
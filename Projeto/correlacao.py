@@ -0,0 +1,149 @@
+import numpy as np
+
+# Indicadores numéricos considerados, quando presentes na tabela de municípios
+INDICADORES = ('pib', 'idh', 'populacao', 'educacao', 'saude')
+METODOS = ('pearson', 'spearman')
+
+# Opções aceitas pela API: o bootstrap roda na requisição e cada combinação vira uma entrada do cache
+REAMOSTRAGENS = (0, 100, 200, 500, 1000)
+NIVEIS = (0.9, 0.95, 0.99)
+
+# Limite de elementos por lote de reamostragens (controla o pico de memória)
+ELEMENTOS_POR_LOTE = 4_000_000
+
+
+def postos(X: np.ndarray) -> np.ndarray:
+    """Postos médios (empates recebem a média) ao longo do eixo das observações.
+
+    Aceita (n, p) ou um lote (b, n, p); tudo vetorizado, sem laço por coluna.
+    """
+    lote = X if X.ndim == 3 else X[None]
+    n = lote.shape[1]
+
+    ordem = np.argsort(lote, axis=1, kind='stable')
+    ordenados = np.take_along_axis(lote, ordem, axis=1)
+    indices = np.broadcast_to(np.arange(n)[None, :, None], lote.shape)
+
+    # Início e fim de cada sequência de valores empatados
+    novo = np.ones(lote.shape, dtype=bool)
+    novo[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    ultimo = np.ones(lote.shape, dtype=bool)
+    ultimo[:, :-1] = novo[:, 1:]
+
+    inicio = np.maximum.accumulate(np.where(novo, indices, 0), axis=1)
+    fim = np.minimum.accumulate(np.where(ultimo, indices, n - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    resultado = np.empty(lote.shape)
+    np.put_along_axis(resultado, ordem, (inicio + fim) / 2 + 1, axis=1)
+    return resultado if X.ndim == 3 else resultado[0]
+
+
+def _pearson_lote(X: np.ndarray) -> np.ndarray:
+    """Matrizes de Pearson de um lote (b, n, p) num único einsum"""
+    centrado = X - X.mean(axis=1, keepdims=True)
+    covariancia = np.einsum('bnp,bnq->bpq', centrado, centrado)
+    return _normalizar(covariancia)
+
+
+def _normalizar(covariancia: np.ndarray) -> np.ndarray:
+    """Covariâncias (b, p, p) para correlações, com diagonal exatamente 1"""
+    desvio = np.sqrt(np.einsum('bpp->bp', covariancia))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlacoes = covariancia / (desvio[:, :, None] * desvio[:, None, :])
+
+    diagonal = np.arange(covariancia.shape[1])
+    correlacoes[:, diagonal, diagonal] = np.where(desvio > 0, 1.0, np.nan)
+    return correlacoes
+
+
+def matriz(X: np.ndarray, metodo: str = 'pearson') -> np.ndarray:
+    """Matriz de correlação (p, p) de todas as colunas de X"""
+    if metodo == 'spearman':
+        X = postos(X)
+    return _pearson_lote(X[None])[0]
+
+
+def _postos_ponderados(X: np.ndarray, pesos: np.ndarray) -> np.ndarray:
+    """Postos médios de cada observação original dentro de cada reamostragem.
+
+    Uma reamostragem com reposição equivale a pesos inteiros (quantas vezes cada
+    observação foi sorteada). Como os valores sorteados vêm de X, basta ordenar X
+    uma vez e acumular os pesos nessa ordem; nenhuma reamostragem é reordenada.
+    """
+    b, n = pesos.shape
+    resultado = np.empty((b, n, X.shape[1]))
+
+    for coluna in range(X.shape[1]):
+        ordem = np.argsort(X[:, coluna], kind='stable')
+        ordenados = X[ordem, coluna]
+        inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+        grupo = np.cumsum(np.r_[True, ordenados[1:] != ordenados[:-1]]) - 1
+
+        # Peso de cada grupo de empate e peso acumulado antes dele
+        por_grupo = np.add.reduceat(pesos[:, ordem], inicios, axis=1)
+        antes = np.cumsum(por_grupo, axis=1) - por_grupo
+        posto_grupo = antes + (por_grupo + 1) / 2
+
+        resultado[:, ordem, coluna] = posto_grupo[:, grupo]
+
+    return resultado
+
+
+def intervalos_bootstrap(X: np.ndarray, metodo: str = 'pearson', reamostragens: int = 1000,
+                         nivel: float = 0.95, semente: int = 0):
+    """Intervalos de confiança percentis por bootstrap.
+
+    Cada lote de reamostragens é uma matriz de pesos (b, n) sorteada de uma vez;
+    as correlações ponderadas saem de produtos matriciais, sem laço Python por
+    reamostragem e sem copiar os dados reamostrados.
+    """
+    n, p = X.shape
+    rng = np.random.default_rng(semente)
+    tamanho_lote = max(1, ELEMENTOS_POR_LOTE // max(1, n * p))
+
+    # Correlação é invariante a escala: padronizar evita cancelamento numérico
+    Z = (X - X.mean(axis=0)) / np.where(X.std(axis=0) > 0, X.std(axis=0), 1)
+    produtos = (Z[:, :, None] * Z[:, None, :]).reshape(n, p * p)
+
+    resultados = []
+    for inicio in range(0, reamostragens, tamanho_lote):
+        b = min(tamanho_lote, reamostragens - inicio)
+        sorteios = rng.integers(0, n, size=(b, n)) + np.arange(b)[:, None] * n
+        pesos = np.bincount(sorteios.ravel(), minlength=b * n).reshape(b, n).astype('float64')
+
+        if metodo == 'spearman':
+            R = _postos_ponderados(X, pesos)
+            media = np.einsum('bn,bnp->bp', pesos, R) / n
+            centrado = R - media[:, None, :]
+            covariancia = np.einsum('bnp,bnq->bpq', pesos[:, :, None] * centrado, centrado)
+        else:
+            media = pesos @ Z / n
+            covariancia = (pesos @ produtos).reshape(b, p, p) - n * media[:, :, None] * media[:, None, :]
+
+        resultados.append(_normalizar(covariancia))
+
+    distribuicao = np.concatenate(resultados)
+    alfa = (1 - nivel) / 2
+    inferior, superior = np.nanquantile(distribuicao, [alfa, 1 - alfa], axis=0)
+    return inferior, superior
+
+
+def analisar(df, metodos=METODOS, reamostragens: int = 0, nivel: float = 0.95, semente: int = 0) -> dict:
+    """Matrizes de correlação (e ICs opcionais) dos indicadores presentes em df"""
+    indicadores = [c for c in INDICADORES if c in df.columns]
+    X = df[indicadores].to_numpy(dtype='float64', na_value=np.nan)
+    X = X[~np.isnan(X).any(axis=1)]
+
+    resultado = {'indicadores': indicadores, 'amostra': int(len(X))}
+    if len(X) < 3 or len(indicadores) < 2:
+        resultado['mensagem'] = 'Dados insuficientes'
+        return resultado
+
+    for metodo in metodos:
+        resultado[metodo] = {'matriz': matriz(X, metodo)}
+        if reamostragens:
+            inferior, superior = intervalos_bootstrap(X, metodo, reamostragens, nivel, semente)
+            resultado[metodo]['ic_inferior'] = inferior
+            resultado[metodo]['ic_superior'] = superior
+
+    return resultado
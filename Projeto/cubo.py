@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+# Hierarquia territorial do IBGE, do nível mais amplo ao mais detalhado
+HIERARQUIA = ('brasil', 'regiao', 'estado', 'mesorregiao', 'microrregiao', 'municipio')
+INDICADORES = ('pib', 'idh', 'populacao', 'educacao', 'saude')
+RAIZ = 'Brasil'
+
+# Estatísticas guardadas por nó; a média sai de soma / contagem na leitura
+FUNCOES = {'sum': 'soma', 'count': 'contagem', 'min': 'minimo', 'max': 'maximo'}
+MESCLA = {'soma': 'sum', 'contagem': 'sum', 'minimo': 'min', 'maximo': 'max'}
+
+
+def _agregar(df: pd.DataFrame, chaves, indicadores) -> pd.DataFrame:
+    """Estatísticas por (pai, nó, ano) numa única passada do groupby"""
+    agregado = df.groupby(list(chaves) + ['ano'], observed=True, sort=True)[list(indicadores)].agg(list(FUNCOES))
+    agregado.columns = pd.MultiIndex.from_tuples([(i, FUNCOES[f]) for i, f in agregado.columns])
+    agregado.index.names = ['pai', 'no', 'ano']
+    return agregado
+
+
+def _mesclar(agregado: pd.DataFrame, avo) -> pd.DataFrame:
+    """Sobe um nível: combina os nós de cada pai (soma e contagem somam, extremos comparam)"""
+    mescla = agregado.groupby(level=['pai', 'ano'], observed=True, sort=True).agg(
+        {coluna: MESCLA[coluna[1]] for coluna in agregado.columns}
+    )
+    mescla.index = pd.MultiIndex.from_arrays(
+        [[avo] * len(mescla), mescla.index.get_level_values('pai'), mescla.index.get_level_values('ano')],
+        names=['pai', 'no', 'ano']
+    )
+    return mescla
+
+
+class _Nivel:
+    """Nós de um nível ordenados por pai: os filhos de um pai são uma fatia contígua"""
+
+    def __init__(self, tabela: pd.DataFrame):
+        self.tabela = tabela
+        pais = tabela.index.get_level_values('pai').to_numpy()
+        cortes = np.flatnonzero(pais[1:] != pais[:-1]) + 1
+        inicios, fins = np.r_[0, cortes], np.r_[cortes, len(pais)]
+        self.faixas = {pais[i]: (i, f) for i, f in zip(inicios, fins)} if len(pais) else {}
+
+    def filhos(self, pai) -> pd.DataFrame:
+        inicio, fim = self.faixas.get(pai, (0, 0))
+        return self.tabela.iloc[inicio:fim]
+
+
+class CuboTerritorial:
+    """Agregados pré-calculados por nível territorial, indicador e ano.
+
+    Os níveis abaixo do estado ficam numa partição por UF; região e Brasil são
+    mesclas dos totais das UFs. Atualizar um estado recalcula só a partição
+    dele e as 27 linhas de cima, e cada consulta é uma fatia dos filhos.
+    """
+
+    def __init__(self, particoes: dict, niveis, indicadores, nomes: dict):
+        self.particoes = particoes
+        self.niveis = tuple(niveis)
+        self.indicadores = tuple(indicadores)
+        self.nomes = nomes
+
+        # Acima do estado: 27 totais mesclados por região e depois para o Brasil
+        self._topo = {}
+        if particoes:
+            estados = pd.concat([p['estado'] for p in particoes.values()]).sort_index()
+            regioes = _mesclar(estados, RAIZ)
+            self._topo = {
+                'estado': _Nivel(estados),
+                'regiao': _Nivel(regioes),
+                'brasil': _Nivel(_mesclar(regioes, RAIZ))
+            }
+
+        # UFs onde aparece cada pai dos níveis abaixo do estado
+        self._ufs = {}
+        for sigla, particao in particoes.items():
+            for nivel, tabela in particao.items():
+                if nivel != 'estado':
+                    for pai in tabela.faixas:
+                        self._ufs.setdefault((nivel, pai), []).append(sigla)
+
+    @classmethod
+    def de_tabela(cls, municipios: pd.DataFrame) -> 'CuboTerritorial':
+        # Meso e microrregião só entram quando a fonte as traz
+        niveis = [n for n in HIERARQUIA
+                  if n in ('brasil', 'regiao', 'estado', 'municipio')
+                  or (n in municipios.columns and municipios[n].notna().any())]
+        indicadores = [i for i in INDICADORES if i in municipios.columns]
+        particoes = {
+            sigla: _particao(municipios.iloc[posicoes], niveis, indicadores)
+            for sigla, posicoes in municipios.groupby('estado', observed=True).indices.items()
+        }
+        return cls(particoes, niveis, indicadores, _nomes(municipios))
+
+    def substituir(self, sigla: str, municipios_estado: pd.DataFrame) -> 'CuboTerritorial':
+        """Novo cubo com a partição de um estado recalculada e as demais reaproveitadas"""
+        particoes = dict(self.particoes)
+        if len(municipios_estado):
+            particoes[sigla] = _particao(municipios_estado, self.niveis, self.indicadores)
+        else:
+            particoes.pop(sigla, None)
+        return CuboTerritorial(particoes, self.niveis, self.indicadores, {**self.nomes, **_nomes(municipios_estado)})
+
+    def pai_de(self, nivel: str):
+        """Nível imediatamente acima (None para o Brasil)"""
+        posicao = self.niveis.index(nivel)
+        return self.niveis[posicao - 1] if posicao else None
+
+    def filhos(self, nivel: str, pai=None) -> pd.DataFrame:
+        """Nós de um nível sob um pai (todos, sem pai): índice (pai, nó, ano)"""
+        if nivel in self._topo:
+            topo = self._topo[nivel]
+            return topo.tabela if pai is None else topo.filhos(pai)
+
+        if pai is None:
+            partes = [p[nivel].tabela for p in self.particoes.values()]
+        else:
+            partes = [self.particoes[uf][nivel].filhos(pai) for uf in self._ufs.get((nivel, pai), ())]
+        return pd.concat(partes) if partes else pd.DataFrame()
+
+    def nos(self, nivel: str, pai=None, indicador: str = None, ano: int = None) -> list:
+        """Nós prontos para serializar, com as estatísticas por indicador e ano"""
+        tabela = self.filhos(nivel, pai)
+        if tabela.empty:
+            return []
+        if ano is not None:
+            tabela = tabela[tabela.index.get_level_values('ano') == ano]
+        indicadores = [indicador] if indicador else list(self.indicadores)
+
+        colunas = {(i, e): tabela[(i, e)].to_numpy() for i in indicadores for e in MESCLA}
+        nos = {}
+        for linha, (no_pai, no, ano_linha) in enumerate(tabela.index):
+            chave = (no_pai, no)
+            if chave not in nos:
+                nos[chave] = {'nome': self.nomes.get(no, no) if nivel == 'municipio' else no, 'pai': no_pai,
+                              'indicadores': {i: {} for i in indicadores}}
+                if nivel == 'municipio':
+                    nos[chave]['codigo'] = int(no)
+
+            for i in indicadores:
+                contagem = int(colunas[(i, 'contagem')][linha])
+                if contagem == 0:
+                    continue
+                soma = float(colunas[(i, 'soma')][linha])
+                nos[chave]['indicadores'][i][int(ano_linha)] = {
+                    'soma': soma,
+                    'media': soma / contagem,
+                    'contagem': contagem,
+                    'minimo': float(colunas[(i, 'minimo')][linha]),
+                    'maximo': float(colunas[(i, 'maximo')][linha])
+                }
+
+        return list(nos.values())
+
+
+def _particao(df: pd.DataFrame, niveis, indicadores) -> dict:
+    """Níveis de uma UF: o total do estado e cada nível abaixo dele"""
+    particao = {'estado': _agregar(df, ('regiao', 'estado'), indicadores)}
+    abaixo = [n for n in niveis if HIERARQUIA.index(n) > HIERARQUIA.index('estado')]
+    for pai, nivel in zip(['estado'] + abaixo, abaixo):
+        particao[nivel] = _Nivel(_agregar(df, (pai, 'codigo' if nivel == 'municipio' else nivel), indicadores))
+    return particao
+
+
+def _nomes(municipios: pd.DataFrame) -> dict:
+    return dict(zip(municipios['codigo'].tolist(), municipios['municipio'].tolist()))
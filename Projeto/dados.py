@@ -0,0 +1,476 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cubo import CuboTerritorial
+from estatisticas import EstatisticasParticionadas
+from indices import IndiceRanking, indice_hash, indice_nomes
+from series import SeriesMunicipais
+
+# Unidades federativas: sigla -> (código IBGE, região)
+UFS = {
+    'RO': ('11', 'Norte'), 'AC': ('12', 'Norte'), 'AM': ('13', 'Norte'),
+    'RR': ('14', 'Norte'), 'PA': ('15', 'Norte'), 'AP': ('16', 'Norte'),
+    'TO': ('17', 'Norte'),
+    'MA': ('21', 'Nordeste'), 'PI': ('22', 'Nordeste'), 'CE': ('23', 'Nordeste'),
+    'RN': ('24', 'Nordeste'), 'PB': ('25', 'Nordeste'), 'PE': ('26', 'Nordeste'),
+    'AL': ('27', 'Nordeste'), 'SE': ('28', 'Nordeste'), 'BA': ('29', 'Nordeste'),
+    'MG': ('31', 'Sudeste'), 'ES': ('32', 'Sudeste'), 'RJ': ('33', 'Sudeste'),
+    'SP': ('35', 'Sudeste'),
+    'PR': ('41', 'Sul'), 'SC': ('42', 'Sul'), 'RS': ('43', 'Sul'),
+    'MS': ('50', 'Centro-Oeste'), 'MT': ('51', 'Centro-Oeste'),
+    'GO': ('52', 'Centro-Oeste'), 'DF': ('53', 'Centro-Oeste')
+}
+
+REGIOES = ['Norte', 'Nordeste', 'Sudeste', 'Sul', 'Centro-Oeste']
+
+TIPO_ESTADO = pd.CategoricalDtype(sorted(UFS))
+TIPO_REGIAO = pd.CategoricalDtype(REGIOES)
+
+COLUNAS_RANKING = ('pib', 'idh')
+
+# Ano de referência dos dados municipais sem ano informado
+ANO_REFERENCIA = 2020
+
+# Colunas municipais opcionais, incluídas só quando a fonte as traz
+COLUNAS_OPCIONAIS = {
+    'mesorregiao': 'string',
+    'microrregiao': 'string',
+    'educacao': 'float64',
+    'saude': 'float64'
+}
+
+# Dados de exemplo REALISTAS
+ESTADOS_EXEMPLO = [
+    {'id': '35', 'sigla': 'SP', 'nome': 'São Paulo', 'regiao': {'nome': 'Sudeste'}, 'populacao': 46289333},
+    {'id': '33', 'sigla': 'RJ', 'nome': 'Rio de Janeiro', 'regiao': {'nome': 'Sudeste'}, 'populacao': 17463349},
+    {'id': '31', 'sigla': 'MG', 'nome': 'Minas Gerais', 'regiao': {'nome': 'Sudeste'}, 'populacao': 21411923},
+    {'id': '53', 'sigla': 'DF', 'nome': 'Distrito Federal', 'regiao': {'nome': 'Centro-Oeste'}, 'populacao': 3094323},
+    {'id': '29', 'sigla': 'BA', 'nome': 'Bahia', 'regiao': {'nome': 'Nordeste'}, 'populacao': 14985284},
+    {'id': '23', 'sigla': 'CE', 'nome': 'Ceará', 'regiao': {'nome': 'Nordeste'}, 'populacao': 9240580},
+    {'id': '43', 'sigla': 'RS', 'nome': 'Rio Grande do Sul', 'regiao': {'nome': 'Sul'}, 'populacao': 11422973},
+    {'id': '42', 'sigla': 'SC', 'nome': 'Santa Catarina', 'regiao': {'nome': 'Sul'}, 'populacao': 7338473},
+    {'id': '41', 'sigla': 'PR', 'nome': 'Paraná', 'regiao': {'nome': 'Sul'}, 'populacao': 11516840},
+    {'id': '15', 'sigla': 'PA', 'nome': 'Pará', 'regiao': {'nome': 'Norte'}, 'populacao': 8777124}
+]
+
+# Dados realistas de PIB e IDH
+PIB_IDH_EXEMPLO = [
+    {'codigo': 3550308, 'municipio': 'São Paulo', 'estado': 'SP', 'pib': 699.28, 'idh': 0.805},
+    {'codigo': 3304557, 'municipio': 'Rio de Janeiro', 'estado': 'RJ', 'pib': 344.48, 'idh': 0.799},
+    {'codigo': 5300108, 'municipio': 'Brasília', 'estado': 'DF', 'pib': 254.83, 'idh': 0.824},
+    {'codigo': 3106200, 'municipio': 'Belo Horizonte', 'estado': 'MG', 'pib': 93.44, 'idh': 0.810},
+    {'codigo': 4314902, 'municipio': 'Porto Alegre', 'estado': 'RS', 'pib': 87.21, 'idh': 0.805},
+    {'codigo': 4106902, 'municipio': 'Curitiba', 'estado': 'PR', 'pib': 79.35, 'idh': 0.823},
+    {'codigo': 2304400, 'municipio': 'Fortaleza', 'estado': 'CE', 'pib': 65.12, 'idh': 0.754},
+    {'codigo': 2927408, 'municipio': 'Salvador', 'estado': 'BA', 'pib': 63.45, 'idh': 0.759},
+    {'codigo': 2611606, 'municipio': 'Recife', 'estado': 'PE', 'pib': 58.67, 'idh': 0.772},
+    {'codigo': 5208707, 'municipio': 'Goiânia', 'estado': 'GO', 'pib': 52.34, 'idh': 0.799},
+    {'codigo': 1302603, 'municipio': 'Manaus', 'estado': 'AM', 'pib': 89.52, 'idh': 0.737},
+    {'codigo': 1501402, 'municipio': 'Belém', 'estado': 'PA', 'pib': 42.18, 'idh': 0.746},
+    {'codigo': 3509502, 'municipio': 'Campinas', 'estado': 'SP', 'pib': 68.45, 'idh': 0.805},
+    {'codigo': 2111300, 'municipio': 'São Luís', 'estado': 'MA', 'pib': 35.67, 'idh': 0.768},
+    {'codigo': 2704302, 'municipio': 'Maceió', 'estado': 'AL', 'pib': 28.91, 'idh': 0.721}
+]
+
+# PIB dos anos anteriores ao de referência (série histórica dos exemplos): código -> {ano: PIB}
+PIB_HISTORICO_EXEMPLO = {
+    3550308: {2018: 714.68, 2019: 763.81}, 3304557: {2018: 364.05, 2019: 354.32},
+    5300108: {2018: 254.82, 2019: 273.61}, 3106200: {2018: 91.96, 2019: 97.51},
+    4314902: {2018: 76.07, 2019: 81.56}, 4106902: {2018: 87.15, 2019: 91.49},
+    2304400: {2018: 67.41, 2019: 67.02}, 2927408: {2018: 63.53, 2019: 62.95},
+    2611606: {2018: 52.44, 2019: 54.24}, 5208707: {2018: 51.96, 2019: 53.88},
+    1302603: {2018: 78.19, 2019: 84.12}, 1501402: {2018: 31.65, 2019: 32.28},
+    3509502: {2018: 61.41, 2019: 65.47}, 2111300: {2018: 31.77, 2019: 32.24},
+    2704302: {2018: 22.51, 2019: 23.24}
+}
+
+
+def _nome_regiao(regiao):
+    """Aceita a região no formato do IBGE ({'nome': ...}) ou como texto"""
+    if isinstance(regiao, dict):
+        return regiao.get('nome')
+    return regiao
+
+
+def montar_estados(registros) -> pd.DataFrame:
+    """Converte registros de estados em uma tabela colunar tipada"""
+    return pd.DataFrame({
+        'id': pd.array([str(e['id']) for e in registros], dtype='string'),
+        'sigla': pd.Categorical([e['sigla'] for e in registros], dtype=TIPO_ESTADO),
+        'nome': pd.array([e['nome'] for e in registros], dtype='string'),
+        'regiao': pd.Categorical([_nome_regiao(e.get('regiao')) for e in registros], dtype=TIPO_REGIAO),
+        'populacao': pd.array([e.get('populacao', 0) for e in registros], dtype='int64')
+    })
+
+
+def montar_municipios(registros) -> pd.DataFrame:
+    """Converte registros de municípios em uma tabela colunar tipada"""
+    estados = [m['estado'] for m in registros]
+
+    colunas = {
+        'codigo': pd.array([m['codigo'] for m in registros], dtype='int64'),
+        'municipio': pd.array([m['municipio'] for m in registros], dtype='string'),
+        'estado': pd.Categorical(estados, dtype=TIPO_ESTADO),
+        'regiao': pd.Categorical([UFS[uf][1] for uf in estados], dtype=TIPO_REGIAO),
+        'pib': pd.array([m.get('pib') for m in registros], dtype='float64'),
+        'idh': pd.array([m.get('idh') for m in registros], dtype='float64'),
+        'ano': pd.array([m.get('ano', ANO_REFERENCIA) for m in registros], dtype='int64')
+    }
+
+    for coluna, tipo in COLUNAS_OPCIONAIS.items():
+        if any(coluna in m for m in registros):
+            colunas[coluna] = pd.array([m.get(coluna) for m in registros], dtype=tipo)
+
+    return pd.DataFrame(colunas)
+
+
+def carregar_exemplos():
+    """Carregador padrão com os dados de exemplo (anos anteriores primeiro, o de referência no fim)"""
+    anteriores = sorted(
+        ({**m, 'ano': ano, 'pib': pib, 'idh': None}
+         for m in PIB_IDH_EXEMPLO for ano, pib in PIB_HISTORICO_EXEMPLO.get(m['codigo'], {}).items()),
+        key=lambda registro: registro['ano']
+    )
+    return montar_estados(ESTADOS_EXEMPLO), montar_municipios(anteriores + PIB_IDH_EXEMPLO)
+
+
+def separar_anos(municipios: pd.DataFrame):
+    """(tabela com as linhas do ano mais recente no fim, posição onde elas começam).
+
+    Na ordem em que a carga e a publicação deixam a tabela, nada é reordenado
+    nem copiado: os anos anteriores e o mais recente são fatias dela.
+    """
+    if 'ano' not in municipios.columns or len(municipios) == 0:
+        return municipios, 0
+
+    anos = municipios['ano'].to_numpy()
+    recente = anos == anos.max()
+    inicio = len(anos) - int(recente.sum())
+    if not recente[inicio:].all():
+        municipios = municipios.iloc[np.argsort(recente, kind='stable')].reset_index(drop=True)
+    return municipios, inicio
+
+
+class Conjunto:
+    """Versão imutável do conjunto de dados em formato colunar"""
+
+    def __init__(self, estados: pd.DataFrame, municipios: pd.DataFrame, versao: int,
+                 estatisticas: EstatisticasParticionadas = None, cubo: CuboTerritorial = None,
+                 carregado_em: datetime = None):
+        self.estados = estados
+
+        # Com vários anos, rankings, estatísticas, índices e listagens usam o mais recente;
+        # a tabela inteira (publicada e gravada no snapshot) alimenta as séries e o cubo
+        self.historico, inicio = separar_anos(municipios)
+        self.municipios = self.historico.iloc[inicio:].reset_index(drop=True) if inicio else self.historico
+        self.versao = versao
+        # Seguindo outro processo, vale o horário de quem publicou (entra no corpo e no ETag das respostas)
+        self.carregado_em = carregado_em or datetime.now()
+
+        # Estruturas em memória (estatísticas, rankings, índices) são montadas sob demanda: o backend
+        # em memória monta todas ao publicar (indexar), os SQL não as usam nas análises
+        self._derivados = {}
+        if cubo is not None:
+            self._derivados['cubo'] = cubo
+        if estatisticas is not None:
+            self._derivados['estatisticas'] = estatisticas
+
+    def indexar(self) -> 'Conjunto':
+        """Monta de uma vez as estatísticas, os rankings e os índices de chave (na carga, não por requisição)"""
+        for nome in ('estatisticas', 'rankings', 'estados_por_sigla', 'estados_por_id',
+                     'municipios_por_codigo', 'municipios_por_nome'):
+            getattr(self, nome)
+        return self
+
+    @property
+    def estatisticas(self) -> EstatisticasParticionadas:
+        """Estatísticas acumuladas por estado; recortes maiores são mesclas"""
+        return self.memo('estatisticas', lambda: EstatisticasParticionadas.de_tabela(self.municipios, COLUNAS_RANKING))
+
+    @property
+    def rankings(self) -> dict:
+        """Ordem decrescente de cada coluna de ranking, com sub-índices por estado e região"""
+        return self.memo('rankings', lambda: {coluna: IndiceRanking(self.municipios, coluna)
+                                              for coluna in COLUNAS_RANKING})
+
+    # Índices de chave para buscas em tempo constante
+    @property
+    def estados_por_sigla(self) -> dict:
+        return self.memo('estados_por_sigla', lambda: indice_hash(self.estados['sigla']))
+
+    @property
+    def estados_por_id(self) -> dict:
+        return self.memo('estados_por_id', lambda: indice_hash(self.estados['id']))
+
+    @property
+    def municipios_por_codigo(self) -> dict:
+        return self.memo('municipios_por_codigo', lambda: indice_hash(self.municipios['codigo']))
+
+    @property
+    def municipios_por_nome(self) -> dict:
+        return self.memo('municipios_por_nome', lambda: indice_nomes(self.municipios['municipio']))
+
+    @property
+    def series(self) -> SeriesMunicipais:
+        """Séries anuais (município × ano) dos indicadores, montadas na primeira consulta"""
+        return self.memo('series', lambda: SeriesMunicipais(self.historico))
+
+    @property
+    def cubo(self) -> CuboTerritorial:
+        """Agregados por nível territorial, montados na primeira consulta ou herdados da versão anterior"""
+        return self.memo('cubo', lambda: CuboTerritorial.de_tabela(self.historico))
+
+    @property
+    def anteriores(self) -> pd.DataFrame:
+        """Linhas dos anos anteriores ao mais recente (vazia com um ano só)"""
+        return self.historico.iloc[:len(self.historico) - len(self.municipios)]
+
+    def memo(self, chave, gerar):
+        """Valor derivado desta versão, calculado uma única vez"""
+        if chave not in self._derivados:
+            self._derivados[chave] = gerar()
+        return self._derivados[chave]
+
+    def registros(self, tabela: str, colunas=None):
+        """Registros (lista de dicts) de uma tabela, montados uma vez por versão"""
+        return self.memo(('registros', tabela, tuple(colunas) if colunas else None),
+                         lambda: self._montar_registros(tabela, colunas))
+
+    def _montar_registros(self, tabela: str, colunas=None):
+        df = getattr(self, tabela)
+        if colunas:
+            df = df[list(colunas)]
+
+        # Converte para tipos Python nativos antes de serializar
+        colunas_df = list(df.columns)
+        valores = [df[c].astype(object).where(df[c].notna(), None).tolist() for c in colunas_df]
+        registros = [dict(zip(colunas_df, linha)) for linha in zip(*valores)]
+
+        # Mantém o formato de região do IBGE nos estados
+        if tabela == 'estados' and 'regiao' in colunas_df:
+            for registro in registros:
+                registro['regiao'] = {'nome': registro['regiao']}
+
+        return registros
+
+    def _coluna(self, tabela: str, coluna: str):
+        """Array de uma coluna pronto para serializar, montado uma vez por versão"""
+        return self.memo(('coluna', tabela, coluna), lambda: self._montar_coluna(tabela, coluna))
+
+    def _montar_coluna(self, tabela: str, coluna: str):
+        serie = getattr(self, tabela)[coluna]
+        if pd.api.types.is_numeric_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            return serie.to_numpy(dtype='float64' if serie.dtype.kind == 'f' else None), None
+
+        # Texto e categorias viram listas de str (com None para ausentes)
+        valores = serie.astype(object).where(serie.notna(), None).to_numpy()
+        return valores, valores.tolist()
+
+    def valores(self, tabela: str, coluna: str) -> np.ndarray:
+        """Array de uma coluna (numérico, ou objetos com None para ausentes), um por versão"""
+        return self._coluna(tabela, coluna)[0]
+
+    def colunas(self, tabela: str, colunas=None, posicoes=None) -> dict:
+        """Saída colunar: um array por campo, sem montar um dict por linha"""
+        resultado = {}
+
+        for coluna in colunas or getattr(self, tabela).columns:
+            valores, lista = self._coluna(tabela, coluna)
+            if posicoes is not None:
+                valores = valores[posicoes]
+                resultado[coluna] = valores if lista is None else valores.tolist()
+            else:
+                resultado[coluna] = valores if lista is None else lista
+
+        return resultado
+
+    def mascara(self, tabela: str, inicio: int = 0, fim: int = None, **filtros):
+        """Máscara booleana de igualdade sobre um trecho da tabela (None = sem filtro)"""
+        mascara = None
+        for coluna, valor in filtros.items():
+            if valor is None:
+                continue
+            valores, _ = self._coluna(tabela, coluna)
+            teste = valores[inicio:fim] == valor
+            mascara = teste if mascara is None else mascara & teste
+        return mascara
+
+    def lotes(self, tabela: str, colunas, tamanho: int = 1000, posicoes=None, **filtros):
+        """Gera lotes de registros sem materializar a tabela inteira (ou só das posições dadas)"""
+        arrays = [self._coluna(tabela, coluna) for coluna in colunas]
+        total = len(getattr(self, tabela))
+
+        if posicoes is not None:
+            for inicio in range(0, len(posicoes), tamanho):
+                lote = posicoes[inicio:inicio + tamanho]
+                valores = [valores[lote].tolist() for valores, _ in arrays]
+                yield [dict(zip(colunas, linha)) for linha in zip(*valores)]
+            return
+
+        for inicio in range(0, total, tamanho):
+            fim = min(inicio + tamanho, total)
+            mascara = self.mascara(tabela, inicio, fim, **filtros)
+            posicoes = np.arange(inicio, fim) if mascara is None else inicio + np.flatnonzero(mascara)
+            if len(posicoes) == 0:
+                continue
+
+            # tolist() converte para tipos Python nativos
+            valores = [valores[posicoes].tolist() for valores, _ in arrays]
+            yield [dict(zip(colunas, linha)) for linha in zip(*valores)]
+
+
+class BaseDados:
+    """Armazena o conjunto de dados compartilhado por todos os recursos"""
+
+    def __init__(self, carregador=carregar_exemplos):
+        self._carregador = carregador
+        self._ouvintes = []
+        self._trava = threading.RLock()
+        self._versao = 0
+        self._atual = None
+        self._leitor = None
+        self.atualizar()
+
+    @property
+    def atual(self) -> Conjunto:
+        """Versão corrente; seguindo memória compartilhada, troca quando o pai publica outra"""
+        if self._leitor is not None and self._leitor.versao() != self._versao:
+            self._sincronizar()
+        return self._atual
+
+    def seguir(self, leitor):
+        """Passa a servir as versões publicadas por outro processo (workers após o fork)"""
+        # Uma trava herdada no fork pode ter ficado presa por uma thread que não existe aqui
+        self._trava = threading.RLock()
+        self._leitor = leitor
+
+        # Mesmo na versão já publicada, troca a cópia herdada do pai pelas views do segmento
+        self._sincronizar(forcar=True)
+
+    def _sincronizar(self, forcar: bool = False):
+        with self._trava:
+            if not forcar and self._leitor.versao() == self._versao:
+                return
+            versao, carregado_em, estados, municipios = self._leitor.ler()
+            self._publicar(estados, municipios, versao=versao, carregado_em=carregado_em)
+
+    def ao_atualizar(self, callback):
+        """Registra uma função chamada a cada nova versão do conjunto"""
+        self._ouvintes.append(callback)
+        return callback
+
+    def atualizar(self, estados: pd.DataFrame = None, municipios: pd.DataFrame = None) -> Conjunto:
+        """Recarrega os dados e publica uma nova versão do conjunto"""
+        with self._trava:
+            if estados is None or municipios is None:
+                novos_estados, novos_municipios = self._carregador()
+                estados = novos_estados if estados is None else estados
+                municipios = novos_municipios if municipios is None else municipios
+
+            return self._publicar(estados, municipios)
+
+    def recarregar(self, estados: pd.DataFrame, municipios: pd.DataFrame) -> Conjunto:
+        """Publica uma carga completa mexendo só no que mudou em relação à versão atual.
+
+        Linhas acrescentadas ao fim vão por anexar_municipios e estados com municípios
+        diferentes por atualizar_estados; se a estrutura da tabela mudou (ou todos
+        os estados, ou os anos anteriores ao mais recente), a versão é montada do
+        zero. Sem mudança, nada é publicado.
+        """
+        with self._trava:
+            anterior = self.atual
+            atuais = anterior.municipios
+            novos_estados = None if estados.equals(anterior.estados) else estados
+
+            if list(municipios.columns) != list(atuais.columns) or not municipios.dtypes.equals(atuais.dtypes):
+                return self._publicar(estados, municipios)
+
+            # As atualizações incrementais só mexem no ano mais recente
+            historico, corte = separar_anos(municipios)
+            if not historico.iloc[:corte].reset_index(drop=True).equals(anterior.anteriores.reset_index(drop=True)):
+                return self._publicar(estados, historico)
+            municipios = historico.iloc[corte:].reset_index(drop=True)
+
+            # As linhas atuais continuam no início: só o que foi acrescentado
+            inicio = municipios.iloc[:len(atuais)].reset_index(drop=True)
+            if inicio.equals(atuais.reset_index(drop=True)):
+                if len(municipios) > len(atuais):
+                    novos = municipios.iloc[len(atuais):].reset_index(drop=True)
+                    return self.anexar_municipios(novos, novos_estados)
+            else:
+                antes = atuais.groupby('estado', observed=True).indices
+                depois = municipios.groupby('estado', observed=True).indices
+                mudaram = {}
+                for sigla in antes.keys() | depois.keys():
+                    novas = municipios.iloc[depois.get(sigla, [])].reset_index(drop=True)
+                    if not novas.equals(atuais.iloc[antes.get(sigla, [])].reset_index(drop=True)):
+                        mudaram[sigla] = novas
+
+                if len(mudaram) == len(antes.keys() | depois.keys()):
+                    return self._publicar(estados, historico)
+                if mudaram:
+                    return self.atualizar_estados(mudaram, novos_estados)
+
+            # Municípios iguais: só a tabela de estados, se ela mudou
+            if novos_estados is None:
+                return anterior
+            return self._publicar(novos_estados, anterior.historico, anterior._derivados.get('estatisticas'),
+                                  cubo=anterior._derivados.get('cubo'))
+
+    def anexar_municipios(self, novos: pd.DataFrame, estados: pd.DataFrame = None) -> Conjunto:
+        """Acrescenta linhas de municípios (do ano mais recente) atualizando as estatísticas só com elas"""
+        with self._trava:
+            anterior = self.atual
+
+            # Estatísticas já montadas (backend em memória): só as novas linhas entram nelas
+            estatisticas = anterior._derivados.get('estatisticas')
+            if estatisticas is not None:
+                estatisticas = estatisticas.copia()
+                estatisticas.acrescentar(novos)
+
+            municipios = pd.concat([anterior.anteriores, anterior.municipios, novos], ignore_index=True)
+
+            # Cubo já montado: só as UFs com linhas novas são recalculadas (com todos os anos delas)
+            cubo = anterior._derivados.get('cubo')
+            if cubo is not None:
+                for sigla in novos['estado'].dropna().unique():
+                    cubo = cubo.substituir(sigla, municipios[municipios['estado'] == sigla])
+
+            return self._publicar(anterior.estados if estados is None else estados, municipios, estatisticas,
+                                  cubo=cubo)
+
+    def atualizar_estados(self, municipios_por_estado: dict, estados: pd.DataFrame = None) -> Conjunto:
+        """Substitui os municípios de alguns estados numa só versão, recalculando só as partições deles"""
+        with self._trava:
+            anterior = self.atual
+            outros = anterior.municipios[~anterior.municipios['estado'].isin(list(municipios_por_estado))]
+            municipios = pd.concat([anterior.anteriores, outros, *municipios_por_estado.values()], ignore_index=True)
+
+            # O cubo do estado inclui os anos anteriores, que seguem os mesmos
+            estatisticas = anterior._derivados.get('estatisticas')
+            cubo = anterior._derivados.get('cubo')
+            for sigla, municipios_estado in municipios_por_estado.items():
+                if estatisticas is not None:
+                    estatisticas = estatisticas.substituir(sigla, municipios_estado)
+                if cubo is not None:
+                    cubo = cubo.substituir(sigla, municipios[municipios['estado'] == sigla])
+
+            return self._publicar(anterior.estados if estados is None else estados, municipios, estatisticas,
+                                  cubo=cubo)
+
+    def _publicar(self, estados: pd.DataFrame, municipios: pd.DataFrame, estatisticas=None,
+                  versao: int = None, cubo=None, carregado_em: datetime = None) -> Conjunto:
+        """Monta a nova versão e a troca atomicamente (chamado com a trava)"""
+        self._versao = versao if versao is not None else self._versao + 1
+        conjunto = Conjunto(estados, municipios, self._versao, estatisticas, cubo, carregado_em)
+
+        # Troca atômica: requisições em andamento seguem com a versão anterior
+        self._atual = conjunto
+
+        for callback in self._ouvintes:
+            callback(conjunto)
+
+        return conjunto
@@ -1,8 +1,11 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import requests
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from requests.adapters import HTTPAdapter
 
 # Configuração da página
 st.set_page_config(
@@ -18,16 +21,115 @@ st.markdown("Análise de dados demográficos e econômicos em tempo real")
 # URL da API
 API_URL = "http://localhost:5000"
 
-@st.cache_data(ttl=300)
-def carregar_dados(endpoint):
-    """Carrega dados da API"""
-    try:
-        response = requests.get(f"{API_URL}{endpoint}", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except:
-        return None
+# Intervalo mínimo entre consultas da versão dos dados no /health
+INTERVALO_VERSAO = 5
+
+
+class CacheAPI:
+    """Respostas da API já convertidas, compartilhadas entre sessões do Streamlit.
+    
+    Cada entrada vale enquanto a versão dos dados da API (/health) não muda;
+    ao mudar, endpoints com ETag são revalidados com If-None-Match (304).
+    """
+    
+    def __init__(self, intervalo_versao: float = INTERVALO_VERSAO):
+        self.intervalo_versao = intervalo_versao
+        self.online = False
+        self._entradas = {}
+        self._versao = None
+        self._verificada_em = float('-inf')
+        self._trava = threading.Lock()
+    
+    def versao(self, sessao):
+        """Versão dos dados na API, consultada no máximo a cada `intervalo_versao` segundos"""
+        with self._trava:
+            if time.monotonic() - self._verificada_em < self.intervalo_versao:
+                return self._versao
+        
+        try:
+            resposta = sessao.get(f"{API_URL}/health", timeout=5)
+            resposta.raise_for_status()
+            dados = resposta.json()['dados']
+            versao, online = (dados['versao'], dados['carregado_em']), True
+        except (requests.RequestException, ValueError, KeyError):
+            versao, online = None, False
+        
+        with self._trava:
+            self._versao, self.online, self._verificada_em = versao, online, time.monotonic()
+        return versao
+    
+    def obter(self, sessao, endpoint, converter, versao):
+        """Resposta convertida do endpoint; só vai à API quando a versão dos dados mudou"""
+        with self._trava:
+            entrada = self._entradas.get(endpoint)
+        if entrada is not None and versao is not None and entrada[0] == versao:
+            return entrada[2]
+        
+        cabecalhos = {'If-None-Match': entrada[1]} if entrada is not None and entrada[1] else {}
+        try:
+            resposta = sessao.get(f"{API_URL}{endpoint}", headers=cabecalhos, timeout=10)
+            if resposta.status_code == 304:
+                dados = entrada[2]
+            elif resposta.status_code == 200:
+                dados = converter(resposta.json())
+            else:
+                return None
+        except (requests.RequestException, ValueError, KeyError):
+            return None
+        
+        with self._trava:
+            self._entradas[endpoint] = (versao, resposta.headers.get('ETag'), dados)
+        return dados
+
+
+@st.cache_resource
+def sessao_api():
+    """Sessão HTTP com pool de conexões (keep-alive), uma para todas as sessões do Streamlit"""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
+
+
+@st.cache_resource
+def cache_api():
+    return CacheAPI()
+
+
+def carregar_dados(pedidos):
+    """Carrega em paralelo os endpoints de uma visão: {nome: (endpoint, conversor)}"""
+    sessao, cache = sessao_api(), cache_api()
+    versao = cache.versao(sessao)
+    
+    with ThreadPoolExecutor(max_workers=len(pedidos)) as executor:
+        futuros = {
+            nome: executor.submit(cache.obter, sessao, endpoint, converter, versao)
+            for nome, (endpoint, converter) in pedidos.items()
+        }
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+
+def grafico_barras(*args, **kwargs):
+    """Gráfico de barras; o Plotly (o import mais pesado do dashboard) só carrega quando há gráfico"""
+    import plotly.express as px
+    st.plotly_chart(px.bar(*args, **kwargs))
+
+
+def tabela_colunar(chave):
+    """Conversor de respostas ?format=columns: um array por campo vira o DataFrame direto"""
+    return lambda corpo: pd.DataFrame(corpo[chave])
+
+
+def media_recente(corpo):
+    """Média do indicador no ano mais recente de cada nó do cubo"""
+    medias = {}
+    for no in corpo['nos']:
+        for serie in no['indicadores'].values():
+            if serie:
+                medias[no['nome']] = serie[max(serie, key=int)]['media']
+    return pd.Series(medias, dtype='float64')
+
 
 # Sidebar
 st.sidebar.title("Configurações")
@@ -39,73 +141,86 @@ opcao = st.sidebar.selectbox(
 if opcao == "Estados":
     st.header("🏢 Dados por Estado")
     
-    dados_estados = carregar_dados("/estados/")
-    if dados_estados:
-        df_estados = pd.DataFrame(dados_estados['estados'])
-        st.dataframe(df_estados[['nome', 'sigla', 'regiao']].head(10))
+    # Só os campos exibidos, já em colunas
+    dados = carregar_dados({
+        'estados': ("/estados/?fields=nome,sigla,regiao&format=columns", tabela_colunar('estados'))
+    })
+    df_estados = dados['estados']
+    if df_estados is not None:
+        st.dataframe(df_estados.head(10))
         
         # Gráfico de estados por região
         contagem_regiao = df_estados['regiao'].value_counts()
-        fig = px.bar(contagem_regiao, title="Estados por Região")
-        st.plotly_chart(fig)
+        grafico_barras(contagem_regiao, title="Estados por Região")
 
 elif opcao == "Municípios":
     st.header("🏘️ Dados por Município")
     
+    # limit=0: só a contagem, sem as linhas
+    dados = carregar_dados({
+        'pib': ("/municipios/pib?limit=0&pib_min=0", lambda corpo: corpo['total']),
+        'idh': ("/municipios/idh?limit=0&idh_min=0", lambda corpo: corpo['total'])
+    })
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("PIB Municipal")
-        dados_pib = carregar_dados("/municipios/pib")
-        if dados_pib:
-            st.metric("Municípios com dados", dados_pib['total_municipios'])
+        if dados['pib'] is not None:
+            st.metric("Municípios com dados", dados['pib'])
     
     with col2:
         st.subheader("IDH Municipal")
-        dados_idh = carregar_dados("/municipios/idh")
-        if dados_idh:
-            st.metric("Municípios com dados", dados_idh['total_municipios'])
+        if dados['idh'] is not None:
+            st.metric("Municípios com dados", dados['idh'])
 
 elif opcao == "Ranking PIB":
     st.header("💰 Ranking PIB Municipal")
     
-    dados_ranking = carregar_dados("/analise/ranking-pib")
-    if dados_ranking:
-        df_ranking = pd.DataFrame(dados_ranking['ranking'])
-        st.dataframe(df_ranking.head(10))
+    dados = carregar_dados({
+        'ranking': ("/analise/ranking-pib?limit=10&format=columns", tabela_colunar('ranking'))
+    })
+    df_ranking = dados['ranking']
+    if df_ranking is not None:
+        st.dataframe(df_ranking)
         
         # Gráfico do top 10
         if len(df_ranking) > 0:
-            fig = px.bar(df_ranking.head(10), 
-                        x='municipio', y='pib',
-                        title="Top 10 Municípios por PIB")
-            st.plotly_chart(fig)
+            grafico_barras(df_ranking,
+                           x='municipio', y='pib',
+                           title="Top 10 Municípios por PIB")
 
 elif opcao == "Comparação Regional":
     st.header("🗺️ Comparação Regional")
     
-    dados_distribuicao = carregar_dados("/analise/distribuicao-regional")
-    if dados_distribuicao:
-        df_distribuicao = pd.DataFrame(dados_distribuicao['distribuicao']).T.reset_index()
-        df_distribuicao.columns = ['Região', 'Estados', 'População', 'PIB per capita', 'IDH']
+    dados = carregar_dados({
+        'distribuicao': ("/analise/distribuicao-regional",
+                         lambda corpo: pd.DataFrame(corpo['distribuicao']).T),
+        'pib': ("/analise/cubo?nivel=regiao&indicador=pib", media_recente)
+    })
+    if dados['distribuicao'] is not None:
+        df_distribuicao = dados['distribuicao'][['total_estados', 'populacao_total']].reset_index()
+        df_distribuicao.columns = ['Região', 'Estados', 'População']
+        if dados['pib'] is not None:
+            df_distribuicao['PIB municipal médio'] = df_distribuicao['Região'].map(dados['pib'])
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig1 = px.bar(df_distribuicao, x='Região', y='População',
-                         title="População por Região")
-            st.plotly_chart(fig1)
+            grafico_barras(df_distribuicao, x='Região', y='População',
+                           title="População por Região")
         
         with col2:
-            fig2 = px.bar(df_distribuicao, x='Região', y='PIB per capita',
-                         title="PIB per Capita por Região")
-            st.plotly_chart(fig2)
+            if 'PIB municipal médio' in df_distribuicao:
+                grafico_barras(df_distribuicao, x='Região', y='PIB municipal médio',
+                               title="PIB Municipal Médio por Região")
 
-# Status da API
+# Status da API (vem da consulta de versão, sem requisição extra)
 st.sidebar.markdown("---")
 st.sidebar.subheader("Status da API")
-health = carregar_dados("/health")
-if health:
+cache = cache_api()
+cache.versao(sessao_api())
+if cache.online:
     st.sidebar.success("✅ API Online")
 else:
     st.sidebar.error("❌ API Offline")
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+
+class EsbocoKLL:
+    """Esboço KLL de quantis: memória limitada, atualizável e mesclável.
+
+    Enquanto couber no primeiro compactador (até `k` valores) guarda tudo e os
+    quantis são exatos; acima disso o erro de posto fica em torno de 1/k.
+    """
+
+    def __init__(self, k: int = 200, semente: int = 0):
+        self.k = k
+        self.niveis = [np.empty(0)]
+        self._rng = np.random.default_rng(semente)
+
+    def _capacidade(self, nivel: int) -> int:
+        profundidade = len(self.niveis) - 1 - nivel
+        return max(2, int(np.ceil(self.k * (2 / 3) ** profundidade)))
+
+    def _compactar(self):
+        nivel = 0
+        while nivel < len(self.niveis):
+            if len(self.niveis[nivel]) > self._capacidade(nivel):
+                if nivel + 1 == len(self.niveis):
+                    self.niveis.append(np.empty(0))
+
+                ordenados = np.sort(self.niveis[nivel])
+                sobra = ordenados[len(ordenados) - len(ordenados) % 2:]
+                ordenados = ordenados[:len(ordenados) - len(sobra)]
+
+                # Metade dos itens sobe de nível com peso dobrado
+                inicio = int(self._rng.integers(2))
+                self.niveis[nivel + 1] = np.concatenate([self.niveis[nivel + 1], ordenados[inicio::2]])
+                self.niveis[nivel] = sobra
+            nivel += 1
+
+    def atualizar(self, valores: np.ndarray):
+        self.niveis[0] = np.concatenate([self.niveis[0], valores])
+        self._compactar()
+
+    def mesclar(self, outro: 'EsbocoKLL') -> 'EsbocoKLL':
+        resultado = self.copia()
+        for nivel, itens in enumerate(outro.niveis):
+            if nivel == len(resultado.niveis):
+                resultado.niveis.append(np.empty(0))
+            resultado.niveis[nivel] = np.concatenate([resultado.niveis[nivel], itens])
+        resultado._compactar()
+        return resultado
+
+    def copia(self) -> 'EsbocoKLL':
+        resultado = EsbocoKLL(self.k)
+        resultado.niveis = list(self.niveis)
+        resultado._rng = np.random.default_rng(self._rng.integers(2 ** 32))
+        return resultado
+
+    def quantil(self, q: float) -> float:
+        if len(self.niveis) == 1:
+            # Ainda exato: mesma interpolação linear do pandas
+            return float(np.quantile(self.niveis[0], q)) if len(self.niveis[0]) else float('nan')
+
+        valores = np.concatenate(self.niveis)
+        pesos = np.concatenate([np.full(len(itens), 2 ** nivel) for nivel, itens in enumerate(self.niveis)])
+        ordem = np.argsort(valores, kind='stable')
+        acumulado = np.cumsum(pesos[ordem])
+        posicao = np.searchsorted(acumulado, q * acumulado[-1], side='left')
+        return float(valores[ordem][min(posicao, len(valores) - 1)])
+
+
+class Resumo:
+    """Estatísticas acumuladas de uma série: Welford (média/variância), mínimo, máximo e quantis"""
+
+    def __init__(self, k: int = 200):
+        self.contagem = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = float('inf')
+        self.maximo = float('-inf')
+        self.esboco = EsbocoKLL(k)
+
+    @classmethod
+    def de_valores(cls, valores, k: int = 200) -> 'Resumo':
+        resumo = cls(k)
+        resumo.atualizar(valores)
+        return resumo
+
+    def atualizar(self, valores):
+        """Acrescenta valores (lote) sem revisitar os anteriores"""
+        valores = np.asarray(valores, dtype='float64')
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return
+
+        lote = Resumo(self.esboco.k)
+        lote.contagem = len(valores)
+        lote.media = float(valores.mean())
+        lote.m2 = float(((valores - lote.media) ** 2).sum())
+        lote.minimo = float(valores.min())
+        lote.maximo = float(valores.max())
+        self._absorver(lote)
+        self.esboco.atualizar(valores)
+
+    def _absorver(self, outro: 'Resumo'):
+        """Combinação de Chan et al. para média e soma de quadrados"""
+        total = self.contagem + outro.contagem
+        if total == 0:
+            return
+
+        delta = outro.media - self.media
+        self.media += delta * outro.contagem / total
+        self.m2 += outro.m2 + delta ** 2 * self.contagem * outro.contagem / total
+        self.contagem = total
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+
+    def mesclar(self, outro: 'Resumo') -> 'Resumo':
+        resultado = self.copia()
+        resultado._absorver(outro)
+        resultado.esboco = self.esboco.mesclar(outro.esboco)
+        return resultado
+
+    def copia(self) -> 'Resumo':
+        resultado = Resumo(self.esboco.k)
+        resultado.contagem, resultado.media, resultado.m2 = self.contagem, self.media, self.m2
+        resultado.minimo, resultado.maximo = self.minimo, self.maximo
+        resultado.esboco = self.esboco.copia()
+        return resultado
+
+    @property
+    def desvio_padrao(self) -> float:
+        # Desvio padrão amostral (ddof=1), como no pandas
+        return float(np.sqrt(self.m2 / (self.contagem - 1))) if self.contagem > 1 else float('nan')
+
+    def para_dict(self) -> dict:
+        return {
+            'media': self.media,
+            'mediana': self.esboco.quantil(0.5),
+            'desvio_padrao': self.desvio_padrao,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'q1': self.esboco.quantil(0.25),
+            'q3': self.esboco.quantil(0.75),
+            'contagem': self.contagem
+        }
+
+
+class EstatisticasParticionadas:
+    """Um Resumo por (partição, métrica); recortes maiores são mesclas das partições"""
+
+    def __init__(self, metricas, particoes=None):
+        self.metricas = tuple(metricas)
+        self.particoes = particoes or {}
+
+    @classmethod
+    def de_tabela(cls, df: pd.DataFrame, metricas, coluna: str = 'estado') -> 'EstatisticasParticionadas':
+        estatisticas = cls(metricas)
+        estatisticas.acrescentar(df, coluna)
+        return estatisticas
+
+    def acrescentar(self, df: pd.DataFrame, coluna: str = 'estado'):
+        """Atualiza incrementalmente as partições tocadas pelas novas linhas"""
+        for particao, posicoes in df.groupby(coluna, observed=True).indices.items():
+            resumos = self.particoes.setdefault(particao, {m: Resumo() for m in self.metricas})
+            for metrica in self.metricas:
+                resumos[metrica].atualizar(df[metrica].to_numpy(dtype='float64', na_value=np.nan)[posicoes])
+
+    def copia(self) -> 'EstatisticasParticionadas':
+        return EstatisticasParticionadas(
+            self.metricas,
+            {p: {m: r.copia() for m, r in resumos.items()} for p, resumos in self.particoes.items()}
+        )
+
+    def substituir(self, particao, df: pd.DataFrame) -> 'EstatisticasParticionadas':
+        """Nova instância com uma partição recalculada e as demais reaproveitadas"""
+        particoes = dict(self.particoes)
+        particoes[particao] = {m: Resumo.de_valores(df[m].to_numpy(dtype='float64', na_value=np.nan))
+                               for m in self.metricas}
+        return EstatisticasParticionadas(self.metricas, particoes)
+
+    def resumo(self, metrica: str, particoes=None) -> Resumo:
+        """Mescla as partições pedidas (todas, se None)"""
+        resultado = Resumo()
+        for particao, resumos in self.particoes.items():
+            if particoes is None or particao in particoes:
+                resultado = resultado.mesclar(resumos[metrica])
+        return resultado
@@ -0,0 +1,56 @@
+from flask import Response
+
+from metricas import fase
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele a exportação responde 501
+    pa = None
+    pq = None
+
+FORMATOS = {
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def disponivel() -> bool:
+    return pa is not None
+
+
+def tabela_arrow(dados, tabela: str):
+    """Tabela Arrow de uma tabela do conjunto, convertida uma vez por versão"""
+    return dados.memo(
+        ('arrow', tabela),
+        lambda: pa.Table.from_pandas(getattr(dados, tabela), preserve_index=False)
+    )
+
+
+def exportar(dados, tabela: str, formato: str, colunas=None, mascara=None) -> Response:
+    """Exporta a tabela em Arrow IPC (arquivo, mapeável em memória) ou Parquet"""
+    resultado = tabela_arrow(dados, tabela)
+
+    # Filtro e projeção direto nos buffers Arrow, sem passar linha a linha pelo Python
+    if mascara is not None:
+        resultado = resultado.filter(pa.array(mascara))
+    if colunas:
+        resultado = resultado.select(list(colunas))
+
+    destino = pa.BufferOutputStream()
+    with fase('serializacao'):
+        if formato == 'parquet':
+            pq.write_table(resultado, destino, compression='zstd')
+        else:
+            with pa.ipc.new_file(destino, resultado.schema) as escritor:
+                escritor.write_table(resultado)
+
+    mimetype, extensao = FORMATOS[formato]
+    return Response(
+        destino.getvalue().to_pybytes(),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={tabela}-v{dados.versao}.{extensao}',
+            'X-Total-Linhas': str(resultado.num_rows)
+        }
+    )
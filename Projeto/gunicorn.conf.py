@@ -0,0 +1,43 @@
+"""Gunicorn com o conjunto de dados carregado uma vez no processo pai
+
+Uso (a partir de Projeto/): gunicorn -c gunicorn.conf.py app:app
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Com preload (padrão), o app (imports, dados e a carga do IBGE) é montado só no pai e os workers
+# nascem prontos por fork; com GUNICORN_PRELOAD=0, cada worker importa só o Flask e monta a API
+# na primeira requisição
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'sim')
+
+if preload_app:
+    # Lidos por create_app: monta a API já no pai, que publica as versões em memória compartilhada
+    os.environ.setdefault('API_PRELOAD', '1')
+    os.environ.setdefault('DADOS_COMPARTILHADOS', '1')
+
+
+def _contexto():
+    import app
+    return app.app.extensions.get('brasil_dados')
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+
+    import memoria_compartilhada
+
+    # Troca a cópia herdada no fork por views do segmento publicado pelo pai
+    contexto = _contexto()
+    if contexto is not None and contexto.publicador is not None:
+        contexto.seguir(memoria_compartilhada.LeitorSegmentos(contexto.publicador.prefixo))
+
+
+def on_exit(server):
+    contexto = _contexto() if preload_app else None
+    if contexto is not None and contexto.publicador is not None:
+        contexto.publicador.fechar()
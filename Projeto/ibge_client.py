@@ -1,33 +1,220 @@
 import requests
 import pandas as pd
 import cachetools
+import threading
 import time
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterable, List
+
+from cache_disco import CacheDisco, Entrada, chave_cache
+from coalescencia import VooUnico
+import metricas
+
+
+class LimitadorTaxa:
+    """Token bucket que limita as requisições por segundo entre threads"""
+    
+    def __init__(self, taxa: float = 10.0, capacidade: int = None):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1, int(taxa))
+        self._fichas = float(self.capacidade)
+        self._ultima = time.monotonic()
+        self._trava = threading.Lock()
+    
+    def aguardar(self):
+        """Bloqueia até haver uma ficha disponível"""
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultima) * self.taxa)
+                self._ultima = agora
+                
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                
+                espera = (1 - self._fichas) / self.taxa
+            
+            time.sleep(espera)
+
 
 class IBGEClient:
-    def __init__(self):
-        self.base_url = "https://servicodados.ibge.gov.br/api/v1"
-        self.cache = cachetools.TTLCache(maxsize=100, ttl=3600)  # Cache de 1 hora
+    def __init__(self, base_url: str = "https://servicodados.ibge.gov.br/api/v1",
+                 max_concorrencia: int = 8, requisicoes_por_segundo: float = 10.0, timeout: float = 30,
+                 caminho_cache: str = None, ttl: float = 3600, tamanho_cache: int = 1024):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cachetools.TTLCache(maxsize=tamanho_cache, ttl=ttl)
+        self.timeout = timeout
+        self.max_concorrencia = max_concorrencia
+        self.limitador = LimitadorTaxa(requisicoes_por_segundo)
+        self._trava_cache = threading.Lock()
+        
+        # Segundo nível de cache em disco, compartilhado entre processos
+        self.cache_disco = CacheDisco(caminho_cache, ttl=ttl) if caminho_cache else None
+        self._revalidando = set()
+        
+        # Coalescência de falhas simultâneas e contadores do cache em memória
+        self.voo_unico = VooUnico()
+        self.acertos = 0
+        self.falhas = 0
+        
+        # Sessão com pool de conexões reaproveitadas entre requisições
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=max_concorrencia, pool_maxsize=max_concorrencia)
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+    
+    def close(self):
+        """Fecha as conexões abertas"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
     def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
         """Faz requisição para API IBGE com cache"""
-        cache_key = f"{endpoint}_{str(params)}"
+        cache_key = chave_cache(endpoint, params)
+        
+        with self._trava_cache:
+            if cache_key in self.cache:
+                self.acertos += 1
+                return self.cache[cache_key]
+            self.falhas += 1
+        
+        # Chamadas simultâneas para a mesma chave compartilham uma única busca
+        return self.voo_unico.executar(cache_key, lambda: self._carregar(cache_key, endpoint, params))
+    
+    def _carregar(self, cache_key: str, endpoint: str, params: Dict = None):
+        """Resolve uma falha do cache em memória: disco, depois IBGE"""
+        with self._trava_cache:
+            if cache_key in self.cache:
+                return self.cache[cache_key]
         
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        entrada = self.cache_disco.obter(cache_key) if self.cache_disco else None
+        if entrada is not None:
+            if not self.cache_disco.fresca(entrada):
+                # Serve o dado antigo enquanto revalida em segundo plano; a revalidação troca a
+                # cópia em memória pela nova
+                self._revalidar_em_segundo_plano(cache_key, endpoint, params, entrada)
+            
+            self._guardar_memoria(cache_key, entrada.dados)
+            return entrada.dados
         
+        return self._buscar_compartilhado(cache_key, endpoint, params)
+    
+    def metricas(self) -> Dict[str, int]:
+        """Contadores do cache e da coalescência de requisições"""
+        with self._trava_cache:
+            metricas = {'cache_acertos': self.acertos, 'cache_falhas': self.falhas, 'cache_tamanho': len(self.cache)}
+        
+        coalescencia = self.voo_unico.metricas()
+        metricas.update({
+            'requisicoes_executadas': coalescencia['execucoes'],
+            'requisicoes_coalescidas': coalescencia['coalescidas'],
+            'requisicoes_em_andamento': coalescencia['em_andamento']
+        })
+        return metricas
+    
+    def _guardar_memoria(self, cache_key: str, data):
+        with self._trava_cache:
+            self.cache[cache_key] = data
+    
+    def _buscar(self, cache_key: str, endpoint: str, params: Dict = None, entrada: Entrada = None):
+        """Busca no IBGE, usando GET condicional quando há uma entrada em disco"""
         url = f"{self.base_url}/{endpoint}"
+        headers = {}
+        if entrada is not None:
+            if entrada.etag:
+                headers['If-None-Match'] = entrada.etag
+            if entrada.last_modified:
+                headers['If-Modified-Since'] = entrada.last_modified
+        
+        rotulo = metricas.endpoint_ibge(endpoint)
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            self.limitador.aguardar()  # Rate limiting
+            inicio = time.perf_counter()
+            with metricas.fase('io'):
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            metricas.latencia_ibge.observar(time.perf_counter() - inicio, endpoint=rotulo)
+            metricas.respostas_ibge.inc(endpoint=rotulo, status=response.status_code)
             
-            self.cache[cache_key] = data
-            time.sleep(0.1)  # Rate limiting
+            if response.status_code == 304 and entrada is not None:
+                self.cache_disco.renovar(cache_key)
+                data = entrada.dados
+            else:
+                response.raise_for_status()
+                data = response.json()
+                
+                if self.cache_disco:
+                    self.cache_disco.gravar(cache_key, data, response.headers.get('ETag'),
+                                            response.headers.get('Last-Modified'))
+            
+            self._guardar_memoria(cache_key, data)
             return data
         except requests.exceptions.RequestException as e:
+            if not isinstance(e, requests.exceptions.HTTPError):
+                metricas.respostas_ibge.inc(endpoint=rotulo, status='erro')
             print(f"Erro na requisição: {e}")
+            return entrada.dados if entrada is not None else {}
+    
+    def _buscar_compartilhado(self, cache_key: str, endpoint: str, params: Dict = None):
+        """Em cache frio, só um processo busca cada chave; os demais leem o disco"""
+        if not self.cache_disco:
+            return self._buscar(cache_key, endpoint, params)
+        
+        inicio = time.time()
+        reserva = self.cache_disco.reservar(cache_key, duracao=self.timeout)
+        if reserva is None:
+            entrada = self.cache_disco.aguardar(cache_key, inicio, timeout=self.timeout)
+            if entrada is not None:
+                self._guardar_memoria(cache_key, entrada.dados)
+                return entrada.dados
+            
+            # O outro processo falhou ou demorou demais: busca aqui, reservando se a chave estiver livre
+            reserva = self.cache_disco.reservar(cache_key, duracao=self.timeout)
+        
+        try:
+            return self._buscar(cache_key, endpoint, params)
+        finally:
+            # Só quem reservou libera; uma reserva alheia continua valendo para o processo dono
+            if reserva is not None:
+                self.cache_disco.liberar(cache_key, reserva)
+    
+    def _revalidar_em_segundo_plano(self, cache_key: str, endpoint: str, params: Dict, entrada: Entrada):
+        """Dispara uma revalidação condicional por chave, sem bloquear quem chamou"""
+        with self._trava_cache:
+            if cache_key in self._revalidando:
+                return
+            self._revalidando.add(cache_key)
+        
+        def revalidar():
+            try:
+                # Outro processo já pode estar revalidando a mesma chave
+                reserva = self.cache_disco.reservar(cache_key, duracao=self.timeout)
+                if reserva is not None:
+                    try:
+                        self._buscar(cache_key, endpoint, params, entrada)
+                    finally:
+                        self.cache_disco.liberar(cache_key, reserva)
+            finally:
+                with self._trava_cache:
+                    self._revalidando.discard(cache_key)
+        
+        threading.Thread(target=revalidar, name=f"revalidar-{endpoint}", daemon=True).start()
+    
+    def _em_paralelo(self, funcao: Callable, chaves: Iterable) -> Dict:
+        """Executa uma chamada por chave em paralelo, limitado por max_concorrencia"""
+        chaves = list(chaves)
+        if not chaves:
             return {}
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_concorrencia, len(chaves))) as executor:
+            resultados = executor.map(funcao, chaves)
+            return dict(zip(chaves, resultados))
     
     def get_estados(self) -> List[Dict]:
         """Obtém lista de estados"""
@@ -37,10 +224,21 @@ class IBGEClient:
         """Obtém municípios de um estado"""
         return self._make_request(f"localidades/estados/{estado_id}/municipios")
     
+    def get_municipios_todos_estados(self, estados_ids: Iterable[str] = None) -> Dict[str, List[Dict]]:
+        """Obtém municípios de vários estados em paralelo (todos, se não informados)"""
+        if estados_ids is None:
+            estados_ids = [str(estado['id']) for estado in self.get_estados() or []]
+        
+        return self._em_paralelo(self.get_municipios_estado, estados_ids)
+    
     def get_populacao_estado(self, estado_id: str) -> Dict:
         """Obtém população por estado"""
         return self._make_request(f"projecoes/populacao/{estado_id}")
     
+    def get_populacao_estados(self, estados_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Obtém a população de vários estados em paralelo"""
+        return self._em_paralelo(self.get_populacao_estado, estados_ids)
+    
     def get_pib_municipios(self, ano: int = 2020) -> List[Dict]:
         """Obtém PIB dos municípios"""
         params = {"ano": ano}
@@ -69,4 +267,8 @@ class IBGEClient:
         return {
             'populacao': populacao,
             'estado_id': estado_id
-        }
\ No newline at end of file
+        }
+    
+    def get_indicadores_estados(self, estados_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Obtém os indicadores de vários estados em paralelo (repetidos são buscados uma vez)"""
+        return self._em_paralelo(self.get_indicadores_estado, dict.fromkeys(str(i) for i in estados_ids))
\ No newline at end of file
@@ -0,0 +1,81 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceRanking:
+    """Ordem decrescente pré-calculada de uma coluna, com sub-índices por grupo"""
+
+    def __init__(self, df: pd.DataFrame, coluna: str, grupos=('estado', 'regiao')):
+        self.coluna = coluna
+        valores = df[coluna].to_numpy(dtype='float64', na_value=np.nan)
+
+        # Ordem estável decrescente, descartando valores ausentes
+        ordem = np.argsort(-valores, kind='stable')
+        self.ordem = ordem[~np.isnan(valores[ordem])]
+
+        self.grupos = {}
+        for grupo in grupos:
+            if grupo in df.columns:
+                self.grupos[grupo] = self._sub_indices(df[grupo])
+
+    def _sub_indices(self, serie: pd.Series):
+        """Divide a ordem global em blocos por valor do grupo, mantendo o ranking"""
+        codigos = serie.cat.codes.to_numpy()[self.ordem]
+        blocos = np.argsort(codigos, kind='stable')
+        codigos_ordenados = codigos[blocos]
+        cortes = np.flatnonzero(np.diff(codigos_ordenados)) + 1
+
+        sub_indices = {}
+        for bloco in np.split(blocos, cortes):
+            if len(bloco) == 0:
+                continue
+
+            # Código -1 indica grupo ausente
+            codigo = codigos[bloco[0]]
+            if codigo >= 0:
+                sub_indices[serie.cat.categories[codigo]] = self.ordem[bloco]
+
+        return sub_indices
+
+    def posicoes(self, **filtros) -> np.ndarray:
+        """Posições em ordem de ranking que atendem aos filtros de grupo"""
+        filtros = {g: v for g, v in filtros.items() if v is not None}
+        if not filtros:
+            return self.ordem
+
+        # Parte do sub-índice mais seletivo e aplica os demais filtros sobre ele
+        candidatos = [self.grupos[g].get(v, np.empty(0, dtype=self.ordem.dtype)) for g, v in filtros.items()]
+        menor = min(candidatos, key=len)
+        for outro in candidatos:
+            if outro is not menor:
+                menor = menor[np.isin(menor, outro)]
+
+        return menor
+
+    def fatia(self, limite=None, deslocamento=0, **filtros):
+        """Retorna (posições da página, total) sem reordenar a tabela"""
+        posicoes = self.posicoes(**filtros)
+        fim = None if limite is None else deslocamento + limite
+        return posicoes[deslocamento:fim], len(posicoes)
+
+
+def normalizar_nome(nome: str) -> str:
+    """Remove acentos, caixa e espaços extras de um nome"""
+    sem_acentos = unicodedata.normalize('NFKD', str(nome))
+    sem_acentos = ''.join(c for c in sem_acentos if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def indice_hash(serie: pd.Series) -> dict:
+    """Mapeia cada valor (único) de uma coluna para sua posição na tabela"""
+    return {valor: posicao for posicao, valor in enumerate(serie.tolist())}
+
+
+def indice_nomes(serie: pd.Series) -> dict:
+    """Mapeia nomes normalizados para as posições com aquele nome"""
+    indice = {}
+    for posicao, nome in enumerate(serie.tolist()):
+        indice.setdefault(normalizar_nome(nome), []).append(posicao)
+    return indice
@@ -0,0 +1,184 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import colunar
+
+# Bloco de controle: [sequência, versão, tamanho do nome, sequência do status, tamanho do status] (uint64),
+# nome do segmento, status da carga (JSON)
+_CAMPOS = 5
+_TAMANHO_NOME = 64
+_TAMANHO_STATUS = 4096
+_INICIO_STATUS = 8 * _CAMPOS + _TAMANHO_NOME
+
+
+# Por processo: o resource_tracker já rodava antes do primeiro anexo (herdado do pai)?
+_trackers_herdados = {}
+
+
+def _tracker_herdado() -> bool:
+    pid = os.getpid()
+    if pid not in _trackers_herdados:
+        _trackers_herdados[pid] = getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+    return _trackers_herdados[pid]
+
+
+class _SegmentoAnexado(shared_memory.SharedMemory):
+    """Segmento de outro processo, anexado só para leitura.
+
+    As views NumPy seguram o mapeamento; ele é desfeito junto com a última delas,
+    então não há close() explícito (que falharia com views exportadas).
+    """
+
+    def __init__(self, nome: str):
+        if sys.version_info >= (3, 13):
+            super().__init__(name=nome, track=False)
+        else:
+            # Antes do 3.13 anexar registra o segmento no resource_tracker. Num worker
+            # nascido por fork o tracker é o do pai e o registro não muda nada; num
+            # processo avulso o tracker seria próprio e removeria o segmento na saída.
+            herdado = _tracker_herdado()
+            super().__init__(name=nome)
+            if not herdado:
+                resource_tracker.unregister(self._name, 'shared_memory')
+
+        # O mapeamento já existe; o descritor não é mais necessário
+        if getattr(self, '_fd', -1) >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __del__(self):
+        pass
+
+
+class PublicadorSegmentos:
+    """Processo pai: grava cada versão num segmento novo e troca o ponteiro de controle"""
+
+    def __init__(self, prefixo: str = None):
+        self.prefixo = prefixo or f'brasil_dados_{os.getpid()}'
+        self.pid = os.getpid()
+        self.controle = shared_memory.SharedMemory(
+            name=f'{self.prefixo}_controle', create=True, size=_INICIO_STATUS + _TAMANHO_STATUS
+        )
+        self._campos = np.ndarray((_CAMPOS,), dtype=np.uint64, buffer=self.controle.buf)
+        self._campos[:] = 0
+        self.segmento = None
+        self._trava_status = threading.Lock()
+
+    def publicar(self, conjunto):
+        """Publica uma versão do conjunto; workers trocam para ela na próxima requisição"""
+        # Workers herdam o ouvinte no fork, mas só o processo pai publica
+        if os.getpid() != self.pid:
+            return
+
+        bloco = colunar.empacotar(
+            {'estados': conjunto.estados, 'municipios': conjunto.historico},
+            {'versao': conjunto.versao, 'carregado_em': conjunto.carregado_em.isoformat()}
+        )
+        segmento = shared_memory.SharedMemory(
+            name=f'{self.prefixo}_{conjunto.versao}', create=True, size=len(bloco)
+        )
+        segmento.buf[:len(bloco)] = bloco
+
+        # Seqlock: sequência ímpar enquanto o ponteiro está sendo trocado
+        nome = segmento.name.encode()
+        self._campos[0] += 1
+        self.controle.buf[8 * _CAMPOS:8 * _CAMPOS + len(nome)] = nome
+        self._campos[2] = len(nome)
+        self._campos[1] = conjunto.versao
+        self._campos[0] += 1
+
+        # Quem já mapeou o segmento anterior continua com ele; só o nome some
+        anterior, self.segmento = self.segmento, segmento
+        if anterior is not None:
+            anterior.close()
+            anterior.unlink()
+
+    def publicar_status(self, status: dict):
+        """Publica o status da carga; os workers não veem o carregador, que só roda no pai"""
+        if os.getpid() != self.pid:
+            return
+
+        corpo = json.dumps(status, default=str).encode()
+        if len(corpo) > _TAMANHO_STATUS:
+            corpo = json.dumps({'erro': f'status maior que {_TAMANHO_STATUS} bytes'}).encode()
+
+        # Mesmo seqlock do ponteiro, com sequência própria
+        with self._trava_status:
+            self._campos[3] += 1
+            self.controle.buf[_INICIO_STATUS:_INICIO_STATUS + len(corpo)] = corpo
+            self._campos[4] = len(corpo)
+            self._campos[3] += 1
+
+    def fechar(self):
+        if os.getpid() != self.pid:
+            return
+        for segmento in (self.segmento, self.controle):
+            if segmento is not None:
+                segmento.close()
+                segmento.unlink()
+        self.segmento = None
+
+
+class LeitorSegmentos:
+    """Worker: acompanha o bloco de controle e monta o conjunto como views do segmento"""
+
+    def __init__(self, prefixo: str):
+        self.controle = _SegmentoAnexado(f'{prefixo}_controle')
+        self._campos = np.ndarray((_CAMPOS,), dtype=np.uint64, buffer=self.controle.buf)
+
+    def versao(self) -> int:
+        """Versão publicada (uma leitura de memória, barata o bastante para toda requisição)"""
+        return int(self._campos[1])
+
+    def _ponteiro(self):
+        while True:
+            sequencia = int(self._campos[0])
+            if sequencia % 2 == 0:
+                tamanho = int(self._campos[2])
+                nome = bytes(self.controle.buf[8 * _CAMPOS:8 * _CAMPOS + tamanho]).decode()
+                versao = int(self._campos[1])
+                if int(self._campos[0]) == sequencia:
+                    return versao, nome
+            time.sleep(0.001)
+
+    def status(self):
+        """Último status da carga publicado pelo pai (None se nenhum)"""
+        while True:
+            sequencia = int(self._campos[3])
+            if sequencia % 2 == 0:
+                tamanho = int(self._campos[4])
+                corpo = bytes(self.controle.buf[_INICIO_STATUS:_INICIO_STATUS + tamanho])
+                if int(self._campos[3]) == sequencia:
+                    return json.loads(corpo) if tamanho else None
+            time.sleep(0.001)
+
+    def ler(self):
+        """(versão, carregado_em, estados, municipios) da versão publicada, sem copiar as colunas"""
+        while True:
+            versao, nome = self._ponteiro()
+            try:
+                segmento = _SegmentoAnexado(nome)
+            except FileNotFoundError:
+                continue  # Trocado entre a leitura do ponteiro e o anexo: tenta de novo
+
+            tabelas, metadados = colunar.desempacotar(segmento.buf)
+            carregado_em = datetime.fromisoformat(metadados['carregado_em'])
+            return metadados['versao'], carregado_em, tabelas['estados'], tabelas['municipios']
+
+
+def configurar(base, ambiente=os.environ):
+    """Com DADOS_COMPARTILHADOS=1, publica cada versão da base em memória compartilhada"""
+    if ambiente.get('DADOS_COMPARTILHADOS', '').lower() not in ('1', 'true', 'sim'):
+        return None
+
+    publicador = PublicadorSegmentos()
+    publicador.publicar(base.atual)
+    base.ao_atualizar(publicador.publicar)
+    return publicador
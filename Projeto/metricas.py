@@ -0,0 +1,266 @@
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+# Content-Type completo (já com o charset): vai em content_type=, não em mimetype=
+MIMETYPE_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites (em segundos) dos histogramas de latência
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LINHAS_PERFIL = 25
+
+# Só um cProfile pode estar ativo por vez no processo
+_trava_perfil = threading.Lock()
+
+
+def _rotulos(rotulos: dict) -> str:
+    if not rotulos:
+        return ''
+    pares = ','.join(f'{k}="{_escapar(v)}"' for k, v in rotulos.items())
+    return '{' + pares + '}'
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _valor(valor) -> str:
+    if isinstance(valor, float) and math.isinf(valor):
+        return '+Inf' if valor > 0 else '-Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nome: str, ajuda: str, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self._valores = {}
+        self._trava = threading.Lock()
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = tuple(rotulos.get(r, '') for r in self.rotulos)
+        with self._trava:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def exportar(self):
+        yield f'# HELP {self.nome} {self.ajuda}'
+        yield f'# TYPE {self.nome} counter'
+        with self._trava:
+            valores = list(self._valores.items())
+        for chave, valor in valores:
+            yield f'{self.nome}{_rotulos(dict(zip(self.rotulos, chave)))} {_valor(valor)}'
+
+
+class Histograma:
+    def __init__(self, nome: str, ajuda: str, rotulos=(), limites=LIMITES_LATENCIA):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self.limites = tuple(limites)
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float, **rotulos):
+        chave = tuple(rotulos.get(r, '') for r in self.rotulos)
+        with self._trava:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.limites), 0.0, 0]
+            for i, limite in enumerate(self.limites):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        yield f'# HELP {self.nome} {self.ajuda}'
+        yield f'# TYPE {self.nome} histogram'
+        with self._trava:
+            series = [(chave, list(baldes), soma, total) for chave, (baldes, soma, total) in self._series.items()]
+
+        for chave, baldes, soma, total in series:
+            rotulos = dict(zip(self.rotulos, chave))
+            acumulado = 0
+            for limite, quantidade in zip(self.limites, baldes):
+                acumulado += quantidade
+                yield f'{self.nome}_bucket{_rotulos({**rotulos, "le": _valor(limite)})} {acumulado}'
+            yield f'{self.nome}_bucket{_rotulos({**rotulos, "le": "+Inf"})} {total}'
+            yield f'{self.nome}_sum{_rotulos(rotulos)} {_valor(soma)}'
+            yield f'{self.nome}_count{_rotulos(rotulos)} {total}'
+
+
+class Registro:
+    """Métricas do processo no formato texto do Prometheus"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._coletores = []
+        self._trava = threading.Lock()
+
+    def _registrar(self, classe, nome, *args, **kwargs):
+        with self._trava:
+            if nome not in self._metricas:
+                self._metricas[nome] = classe(nome, *args, **kwargs)
+            return self._metricas[nome]
+
+    def contador(self, nome: str, ajuda: str, rotulos=()) -> Contador:
+        return self._registrar(Contador, nome, ajuda, rotulos)
+
+    def histograma(self, nome: str, ajuda: str, rotulos=(), limites=LIMITES_LATENCIA) -> Histograma:
+        return self._registrar(Histograma, nome, ajuda, rotulos, limites)
+
+    def coletor(self, funcao):
+        """Registra uma função lida a cada coleta: [(nome, tipo, ajuda, [(rótulos, valor)])]"""
+        with self._trava:
+            self._coletores.append(funcao)
+        return funcao
+
+    def exportar(self) -> str:
+        linhas = []
+        with self._trava:
+            metricas, coletores = list(self._metricas.values()), list(self._coletores)
+
+        for metrica in metricas:
+            linhas.extend(metrica.exportar())
+
+        for coletor in coletores:
+            for nome, tipo, ajuda, amostras in coletor():
+                linhas.append(f'# HELP {nome} {ajuda}')
+                linhas.append(f'# TYPE {nome} {tipo}')
+                linhas.extend(f'{nome}{_rotulos(rotulos)} {_valor(valor)}' for rotulos, valor in amostras)
+
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro padrão do processo
+REGISTRO = Registro()
+
+latencia_requisicoes = REGISTRO.histograma(
+    'brasil_api_requisicao_segundos', 'Latência das requisições por endpoint e fase', ('endpoint', 'fase')
+)
+requisicoes = REGISTRO.contador(
+    'brasil_api_requisicoes_total', 'Requisições atendidas', ('endpoint', 'metodo', 'status')
+)
+latencia_ibge = REGISTRO.histograma(
+    'brasil_ibge_requisicao_segundos', 'Latência das requisições à API do IBGE', ('endpoint',)
+)
+respostas_ibge = REGISTRO.contador(
+    'brasil_ibge_respostas_total', 'Respostas da API do IBGE por status (erro = falha de rede)', ('endpoint', 'status')
+)
+
+
+def endpoint_ibge(endpoint: str) -> str:
+    """Rótulo de baixa cardinalidade: códigos numéricos viram {id}"""
+    return re.sub(r'/\d+(?=/|$)', '/{id}', endpoint)
+
+
+@contextmanager
+def fase(nome: str):
+    """Soma o tempo do bloco à fase (serializacao, io) da requisição atual.
+
+    O que não cai em nenhuma fase é contado como 'calculo'; fora de uma
+    requisição o bloco só é executado.
+    """
+    if not has_request_context():
+        yield
+        return
+
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fases = g.setdefault('fases', {})
+        fases[nome] = fases.get(nome, 0.0) + time.perf_counter() - inicio
+
+
+def _perfil_solicitado() -> bool:
+    return request.args.get('profile') in ('1', 'true') or request.headers.get('X-Profile') in ('1', 'true')
+
+
+def _resumo_perfil(perfil: cProfile.Profile) -> list:
+    """As funções com maior tempo acumulado"""
+    estatisticas = pstats.Stats(perfil, stream=io.StringIO())
+    estatisticas.sort_stats('cumulative')
+
+    resumo = []
+    for funcao in estatisticas.fcn_list[:LINHAS_PERFIL]:
+        _, chamadas, tempo_proprio, tempo_acumulado, _ = estatisticas.stats[funcao]
+        arquivo, linha, nome = funcao
+        resumo.append({
+            'funcao': f'{os.path.basename(arquivo)}:{linha}({nome})' if linha else nome,
+            'chamadas': chamadas,
+            'tempo_proprio_ms': round(tempo_proprio * 1000, 3),
+            'tempo_acumulado_ms': round(tempo_acumulado * 1000, 3)
+        })
+    return resumo
+
+
+def _anexar_perfil(resposta, perfil: dict):
+    """Inclui o perfil no corpo JSON ou, para outros formatos, num cabeçalho"""
+    if resposta.mimetype == 'application/json' and not resposta.is_streamed and resposta.status_code != 304:
+        corpo = json.loads(resposta.get_data())
+        if isinstance(corpo, dict):
+            corpo['perfil'] = perfil
+            resposta.set_data(json.dumps(corpo, ensure_ascii=False).encode('utf-8'))
+            return
+
+    principais = perfil['funcoes'][:5]
+    resposta.headers['X-Profile'] = '; '.join(f"{f['funcao']}={f['tempo_acumulado_ms']}ms" for f in principais)
+
+
+def instrumentar(app, ambiente=os.environ):
+    """Mede cada requisição (por endpoint e fase) e atende pedidos de perfil"""
+    # Perfil por requisição (?profile=1 ou X-Profile: 1), só com PERFIL=1 na configuração do app:
+    # qualquer cliente poderia ligar o cProfile em produção
+    perfil_habilitado = str(ambiente.get('PERFIL', '')).lower() in ('1', 'true', 'sim')
+
+    @app.before_request
+    def iniciar_medicao():
+        g.inicio = time.perf_counter()
+        g.fases = {}
+        if perfil_habilitado and _perfil_solicitado() and _trava_perfil.acquire(blocking=False):
+            g.perfil = cProfile.Profile()
+            g.perfil.enable()
+
+    @app.after_request
+    def registrar_medicao(resposta):
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            perfil.disable()
+            _trava_perfil.release()
+
+        inicio = g.pop('inicio', None)
+        if inicio is None:
+            return resposta
+
+        total = time.perf_counter() - inicio
+        endpoint = request.url_rule.rule if request.url_rule else 'desconhecido'
+        fases = g.pop('fases', {})
+        fases['calculo'] = max(0.0, total - sum(fases.values()))
+
+        latencia_requisicoes.observar(total, endpoint=endpoint, fase='total')
+        for nome, duracao in fases.items():
+            latencia_requisicoes.observar(duracao, endpoint=endpoint, fase=nome)
+        requisicoes.inc(endpoint=endpoint, metodo=request.method, status=resposta.status_code)
+
+        # Fases também no padrão Server-Timing, visíveis nas ferramentas do navegador
+        resposta.headers['Server-Timing'] = ', '.join(
+            f'{nome};dur={duracao * 1000:.3f}' for nome, duracao in [('total', total), *fases.items()]
+        )
+
+        if perfil is not None:
+            _anexar_perfil(resposta, {
+                'tempo_total_ms': round(total * 1000, 3),
+                'fases_ms': {nome: round(duracao * 1000, 3) for nome, duracao in fases.items()},
+                'funcoes': _resumo_perfil(perfil)
+            })
+
+        return resposta
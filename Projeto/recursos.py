@@ -0,0 +1,908 @@
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, current_app, has_app_context, request
+from flask_restx import Api, Namespace, Resource, abort, fields, reqparse
+import numpy as np
+
+from dados import BaseDados, COLUNAS_RANKING, REGIOES, UFS
+from cache_respostas import CacheRespostas
+import agregacao
+import backends
+import consulta
+import correlacao
+import cubo
+import exportacao
+import memoria_compartilhada
+import metricas
+import series
+import snapshot
+from serializacao import formato_colunar, resposta_json, resposta_ndjson, saida_json, streaming_solicitado
+from indices import normalizar_nome
+
+# Campos expostos nas listagens de municípios
+CAMPOS_PIB = ('municipio', 'estado', 'pib', 'idh')
+CAMPOS_IDH = ('municipio', 'estado', 'idh')
+
+# Namespaces (adicionados à Api de cada app em montar)
+ns_estados = Namespace('estados', description='Dados por estado')
+ns_municipios = Namespace('municipios', description='Dados por município')
+ns_analise = Namespace('analise', description='Análises comparativas')
+
+# Modelos para documentação
+filtro_model = ns_estados.model('Filtro', {
+    'estado_id': fields.String(description='ID do estado'),
+    'ano': fields.Integer(description='Ano de referência')
+})
+
+class AnaliseDemografica:
+    def __init__(self, backend=None):
+        # Rankings, agregados, estatísticas e correlação vão para o backend (memória ou SQL)
+        self.backend = backend or backends.BackendMemoria()
+    
+    def criar_ranking_pib(self, dados, limite=None, deslocamento=0, estado=None, regiao=None, ordenar_por='pib',
+                          colunar=False):
+        """Cria ranking de municípios por PIB com as posições devolvidas pelo backend"""
+        if dados.municipios.empty:
+            return [], 0
+        
+        # Só as posições da página vêm do backend; os registros já estão serializados no conjunto
+        posicoes, total = self.backend.ranking(dados, ordenar_por, limite, deslocamento, estado=estado, regiao=regiao)
+        if colunar:
+            return dados.colunas('municipios', CAMPOS_PIB, posicoes), total
+        
+        registros = dados.registros('municipios', CAMPOS_PIB)
+        return [registros[i] for i in posicoes], total
+    
+    def analisar_correlacao_pib_idh(self, dados):
+        """Analisa correlação REAL entre PIB e IDH"""
+        municipios = dados.municipios
+        if municipios.empty:
+            return {'correlacao': 0, 'mensagem': 'Dados insuficientes'}
+        
+        # Verifica se temos as colunas necessárias
+        if 'pib' not in municipios.columns or 'idh' not in municipios.columns:
+            return {'correlacao': 0, 'mensagem': 'Colunas PIB ou IDH não encontradas'}
+        
+        # Calcula correlação REAL
+        correlacao_valor, amostra = self.backend.correlacao(dados, 'pib', 'idh')
+        
+        # Interpretação da correlação
+        if abs(correlacao_valor) > 0.7:
+            interpretacao = "Forte correlação positiva"
+        elif abs(correlacao_valor) > 0.5:
+            interpretacao = "Correlação positiva moderada" 
+        elif abs(correlacao_valor) > 0.3:
+            interpretacao = "Correlação positiva fraca"
+        else:
+            interpretacao = "Correlação muito fraca ou inexistente"
+        
+        return {
+            'valor': float(correlacao_valor),  # CONVERTE para float
+            'interpretacao': interpretacao,
+            'amostra': int(amostra),  # CONVERTE para int
+            'resumo': f"Correlação de {round(correlacao_valor, 3)} entre PIB e IDH"
+        }
+    
+    def comparar_estados(self, dados):
+        """Compara estados por população"""
+        ordem = dados.estados['populacao'].to_numpy().argsort(kind='stable')[::-1]
+        registros = dados.registros('estados')
+        
+        # Ordena por população
+        return [
+            {
+                'estado': registros[i]['nome'],
+                'sigla': registros[i]['sigla'],
+                'regiao': registros[i]['regiao']['nome'],
+                'populacao': registros[i]['populacao']
+            }
+            for i in ordem
+        ]
+    
+    def analisar_distribuicao_regional(self, dados):
+        """Analisa distribuição regional dos indicadores"""
+        registros = dados.registros('estados', ('sigla', 'nome', 'populacao'))
+        
+        # Uma passada vetorizada para os totais e uma para as posições de cada região
+        agregado = agregacao.agregar_tabela(dados.estados, 'populacao', 'regiao')
+        posicoes = dados.estados.groupby('regiao', observed=True).indices
+        
+        distribuicao = {}
+        for regiao, linha in agregado.iterrows():
+            # CONVERTE para tipos Python nativos (int/float)
+            distribuicao[regiao] = {
+                'total_estados': int(linha['contagem']),
+                'populacao_total': int(linha['soma']),
+                'populacao_media': float(linha['media']),
+                'estados': [registros[i] for i in posicoes[regiao]]
+            }
+        
+        return distribuicao
+    
+    def calcular_estatisticas_descritivas(self, dados, estado=None, regiao=None):
+        """Calcula estatísticas descritivas do recorte (estado, região ou Brasil) no backend"""
+        return self.backend.estatisticas(dados, estado=estado, regiao=regiao)
+    
+    def agregar(self, dados, metrica, nivel):
+        """Agregado de uma métrica por nível territorial (None quando a combinação não existe)"""
+        return self.backend.agregar(dados, metrica, nivel)
+    
+    def calcular_tendencias(self, dados, indicador, de=None, ate=None, janela=series.JANELA_PADRAO, limite=20,
+                            ordenar_por='cagr', crescente=False, estado=None, regiao=None):
+        """Ranking de crescimento: CAGR e inclinação de todos os municípios de uma vez, médias móveis do topo"""
+        historico = dados.series
+        
+        # Chave pelas colunas do recorte: anos fora da série caem no mesmo cálculo
+        calculo = dados.memo(('tendencias', indicador) + historico.intervalo(de, ate),
+                             lambda: series.tendencias(historico, indicador, de, ate))
+        
+        # Filtros de estado e região sobre os municípios da série
+        candidatos = None
+        for coluna, valor in (('estado', estado), ('regiao', regiao)):
+            if valor is not None:
+                mascara = (historico.municipios[coluna] == valor).to_numpy(dtype=bool, na_value=False)
+                candidatos = np.flatnonzero(mascara) if candidatos is None else candidatos[mascara[candidatos]]
+        
+        valores = calculo[ordenar_por]
+        validos = ~np.isnan(valores if candidatos is None else valores[candidatos])
+        posicoes = series.maiores(valores, limite, candidatos, crescente)
+        registros = historico.municipios.iloc[posicoes].astype(object).to_dict('records')
+        
+        # Médias móveis só das linhas devolvidas
+        medias = series.medias_moveis(calculo['matriz'][posicoes], janela)
+        
+        def nativo(valor):
+            return None if np.isnan(valor) else float(valor)
+        
+        ranking = [
+            {
+                'codigo': int(registro['codigo']),
+                'municipio': registro['municipio'],
+                'estado': registro['estado'],
+                'valor_inicial': nativo(calculo['valor_inicial'][i]),
+                'valor_final': nativo(calculo['valor_final'][i]),
+                'cagr': nativo(calculo['cagr'][i]),
+                'inclinacao': nativo(calculo['inclinacao'][i]),
+                'medias_moveis': [nativo(v) for v in media]
+            }
+            for i, registro, media in zip(posicoes, registros, medias)
+        ]
+        
+        return ranking, int(validos.sum()), calculo['anos']
+
+class Contexto:
+    """Estado de um app: base de dados, análise, cache de respostas, carga e snapshot"""
+    def __init__(self, ambiente):
+        # Conjunto de dados colunar, montado uma vez na inicialização
+        # (mapeado do snapshot em DADOS_SNAPSHOT, quando houver, antes de servir)
+        self.carga_snapshot = snapshot.configurar(ambiente)
+        self.base = BaseDados(self.carga_snapshot) if self.carga_snapshot else BaseDados()
+        
+        # Respostas das análises que só mudam quando os dados são recarregados
+        self.cache_respostas = CacheRespostas()
+        self.base.ao_atualizar(self.cache_respostas.limpar)
+        
+        # Análises sobre o backend de DADOS_BACKEND (o SQL grava o banco de cada versão antes de ela
+        # ser publicada aos workers)
+        self.analise = AnaliseDemografica(backends.configurar(ambiente, self.base))
+        
+        # Com vários workers (gunicorn.conf.py), o processo pai publica cada versão em memória compartilhada
+        self.publicador = memoria_compartilhada.configurar(self.base, ambiente)
+        
+        # Carga do IBGE (ou de fixtures) em segundo plano, conforme IBGE_CARGA; sem ela, ficam os exemplos
+        # (e o cliente HTTP nem é importado)
+        self.carregador_ibge = None
+        if ambiente.get('IBGE_CARGA'):
+            import carregador
+            self.carregador_ibge = carregador.configurar(self.base, ambiente)
+        
+        # Os workers não têm o carregador (a thread fica no pai): o status vai junto com os dados
+        self.leitor = None
+        if self.publicador is not None and self.carregador_ibge is not None:
+            self.carregador_ibge.ao_mudar(self.publicador.publicar_status)
+    
+    def seguir(self, leitor):
+        """Worker após o fork: dados e status da carga passam a vir do processo pai"""
+        self.leitor = leitor
+        self.base.seguir(leitor)
+    
+    def carga(self):
+        """Status da carga do IBGE e métricas do cliente (None sem carga)"""
+        if self.leitor is not None:
+            return self.leitor.status()
+        return self.carregador_ibge.resumo() if self.carregador_ibge else None
+
+def contexto(app=None) -> Contexto:
+    """Contexto do app informado ou do app da requisição"""
+    return (app or current_app).extensions['brasil_dados']
+
+
+class RecursoDados(Resource):
+    """Recurso com acesso ao conjunto de dados do app"""
+    def __init__(self, api=None, *args, **kwargs):
+        super().__init__(api, *args, **kwargs)
+        self.contexto = contexto()
+        self._dados = None
+    
+    @property
+    def dados(self):
+        """Versão do conjunto fixada no início da requisição"""
+        if self._dados is None:
+            self._dados = self.contexto.base.atual
+        return self._dados
+    
+    @property
+    def analise(self):
+        return self.contexto.analise
+
+def em_cache(metodo):
+    """CacheRespostas.em_cache com o cache do app que atende a requisição"""
+    @wraps(metodo)
+    def wrapper(recurso, *args, **kwargs):
+        return recurso.contexto.cache_respostas.em_cache(metodo)(recurso, *args, **kwargs)
+    return wrapper
+
+exportacao_parser = reqparse.RequestParser()
+exportacao_parser.add_argument('format', type=str, required=True, choices=tuple(exportacao.FORMATOS),
+                               location='args', help='arrow (IPC, mapeável em memória) ou parquet')
+exportacao_parser.add_argument('fields', type=str, location='args', help='Colunas separadas por vírgula')
+exportacao_parser.add_argument('estado', type=str, location='args', help='Sigla do estado')
+exportacao_parser.add_argument('regiao', type=str, location='args', help='Nome da região')
+exportacao_parser.add_argument('ano', type=int, location='args', help='Ano de referência')
+
+def exportar_tabela(dados, tabela, **filtros):
+    """Exporta uma tabela do conjunto com projeção e filtros da query"""
+    if not exportacao.disponivel():
+        abort(501, 'Exportação indisponível: instale o pacote pyarrow')
+    
+    args = exportacao_parser.parse_args()
+    df = getattr(dados, tabela)
+    colunas = [c.strip() for c in args['fields'].split(',')] if args['fields'] else None
+    invalidos = [c for c in colunas or [] if c not in df.columns]
+    if invalidos:
+        abort(400, f"Campos inválidos: {', '.join(invalidos)}")
+    
+    filtros = {coluna: valor for coluna, valor in filtros.items() if coluna in df.columns}
+    return exportacao.exportar(dados, tabela, args['format'], colunas, dados.mascara(tabela, **filtros))
+
+def adicionar_consulta(parser, tabela):
+    """Argumentos da camada de consulta: projeção, filtros de faixa, ordenação e página"""
+    parser.add_argument('fields', type=str, location='args', help='Campos separados por vírgula')
+    parser.add_argument('sort', type=str, location='args', help='Campo de ordenação (-campo para decrescente)')
+    parser.add_argument('limit', type=int, location='args', help='Quantidade máxima de linhas')
+    parser.add_argument('offset', type=int, default=0, location='args', help='Posição inicial')
+    for coluna in consulta.FAIXAS[tabela]:
+        parser.add_argument(f'{coluna}_min', type=float, location='args', help=f'{coluna} mínimo (inclusive)')
+        parser.add_argument(f'{coluna}_max', type=float, location='args', help=f'{coluna} máximo (inclusive)')
+    return parser
+
+def preparar_consulta(parser, tabela, dados, campos_padrao):
+    """Interpreta a query da requisição; parâmetros inválidos viram 400"""
+    args = parser.parse_args()
+    try:
+        return consulta.Consulta.de_args(tabela, args, getattr(dados, tabela).columns, campos_padrao)
+    except consulta.ConsultaInvalida as erro:
+        abort(400, str(erro))
+
+estados_parser = adicionar_consulta(reqparse.RequestParser(), 'estados')
+estados_parser.add_argument('estado', type=str, location='args', help='Sigla do estado')
+estados_parser.add_argument('regiao', type=str, location='args', help='Nome da região')
+estados_parser.add_argument('format', type=str, choices=('columns',), location='args', help='columns para saída colunar')
+
+@ns_estados.route('/')
+class ListaEstados(RecursoDados):
+    @ns_estados.expect(estados_parser)
+    def get(self):
+        """Lista os estados brasileiros (filtros, fields=, sort= e limit=)"""
+        dados = self.dados
+        pedido = preparar_consulta(estados_parser, 'estados', dados, dados.estados.columns)
+        posicoes, total = pedido.executar(dados)
+        
+        if formato_colunar():
+            estados = dados.colunas('estados', pedido.campos, posicoes)
+        else:
+            estados = consulta.projetar(dados.registros('estados'), posicoes, pedido.campos)
+        
+        return resposta_json({
+            'status': 'success',
+            'total': total,
+            'estados': estados,
+            'timestamp': datetime.now().isoformat()
+        })
+
+@ns_estados.route('/export')
+class ExportacaoEstados(RecursoDados):
+    @ns_estados.expect(exportacao_parser)
+    def get(self):
+        """Exporta os estados em Arrow ou Parquet"""
+        args = exportacao_parser.parse_args()
+        return exportar_tabela(self.dados, 'estados', regiao=args['regiao'])
+
+# Limite de chaves por lote: uma requisição não pode montar uma resposta sem limite
+MAXIMO_LOTE = 1000
+
+lote_estados_model = ns_estados.model('LoteEstados', {
+    'estados': fields.List(fields.String, required=True, description='Siglas ou códigos IBGE dos estados')
+})
+lote_municipios_model = ns_municipios.model('LoteMunicipios', {
+    'codigos': fields.List(fields.Integer, required=True, description='Códigos IBGE dos municípios')
+})
+
+def ler_lote(campo):
+    """Lista de chaves do corpo JSON; corpo ou tamanho inválidos viram 400"""
+    corpo = request.get_json(silent=True)
+    chaves = corpo.get(campo) if isinstance(corpo, dict) else None
+    if not isinstance(chaves, list):
+        abort(400, f'Envie um objeto JSON com a lista "{campo}"')
+    if len(chaves) > MAXIMO_LOTE:
+        abort(400, f'No máximo {MAXIMO_LOTE} chaves por lote')
+    return chaves
+
+def resposta_lote(chaves, buscar, registros, nome, mensagem):
+    """Um resultado por chave, na ordem pedida; as ausentes trazem o erro no próprio item"""
+    resultados = []
+    for chave in chaves:
+        posicao = buscar(chave)
+        if posicao is None:
+            resultados.append({'chave': chave, 'erro': mensagem})
+        else:
+            resultados.append({'chave': chave, nome: registros[posicao]})
+    
+    return resposta_json({
+        'status': 'success',
+        'total': len(resultados),
+        'encontrados': sum(1 for r in resultados if nome in r),
+        'resultados': resultados,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@ns_estados.route('/batch')
+class LoteEstados(RecursoDados):
+    @ns_estados.expect(lote_estados_model)
+    def post(self):
+        """Vários estados (siglas ou códigos IBGE) numa só requisição"""
+        dados = self.dados
+        chaves = ler_lote('estados')
+        
+        def buscar(chave):
+            chave = str(chave).strip().upper()
+            indice = dados.estados_por_id if chave.isdigit() else dados.estados_por_sigla
+            return indice.get(chave)
+        
+        return resposta_lote(chaves, buscar, dados.registros('estados'), 'estado', 'Estado não encontrado')
+
+@ns_estados.route('/<string:sigla>')
+class EstadoPorSigla(RecursoDados):
+    def get(self, sigla):
+        """Dados de um estado específico (sigla ou código IBGE)"""
+        dados = self.dados
+        indice = dados.estados_por_id if sigla.isdigit() else dados.estados_por_sigla
+        posicao = indice.get(sigla.upper())
+        
+        if posicao is not None:
+            return resposta_json({
+                'status': 'success',
+                'estado': dados.registros('estados')[posicao],
+                'timestamp': datetime.now().isoformat()
+            })
+        else:
+            return {
+                'status': 'error',
+                'message': 'Estado não encontrado'
+            }, 404
+
+listagem_parser = adicionar_consulta(reqparse.RequestParser(), 'municipios')
+listagem_parser.add_argument('estado', type=str, location='args', help='Sigla do estado')
+listagem_parser.add_argument('regiao', type=str, location='args', help='Nome da região')
+listagem_parser.add_argument('stream', type=str, location='args', help='1 para NDJSON em streaming')
+listagem_parser.add_argument('format', type=str, choices=('columns',), location='args', help='columns para saída colunar')
+
+class ListagemMunicipios(RecursoDados):
+    """Listagem de municípios com filtros, projeção, ordenação e streaming"""
+    campos = CAMPOS_PIB
+    
+    @ns_municipios.expect(listagem_parser)
+    def get(self):
+        """Lista os municípios (estado, regiao, pib_min/max, idh_min/max, fields=, sort=, limit=, ?stream=1)"""
+        dados = self.dados
+        pedido = preparar_consulta(listagem_parser, 'municipios', dados, self.campos)
+        posicoes, total = pedido.executar(dados)
+        campos = pedido.campos
+        
+        # Streaming: memória constante por requisição, qualquer que seja o tamanho da base
+        if streaming_solicitado():
+            return resposta_ndjson(dados.lotes('municipios', campos, posicoes=posicoes))
+        
+        if formato_colunar():
+            resultado = dados.colunas('municipios', campos, posicoes)
+        elif campos == self.campos:
+            resultado = consulta.projetar(dados.registros('municipios', campos), posicoes, campos)
+        else:
+            resultado = consulta.projetar(dados.registros('municipios'), posicoes, campos)
+        
+        return resposta_json({
+            'status': 'success',
+            'total': total,
+            'dados': resultado,
+            'timestamp': datetime.now().isoformat()
+        })
+
+@ns_municipios.route('/pib')
+class PIBMunicipios(ListagemMunicipios):
+    """PIB dos municípios"""
+    campos = CAMPOS_PIB
+
+@ns_municipios.route('/idh')
+class IDHMunicipios(ListagemMunicipios):
+    """IDH dos municípios"""
+    # Usamos os mesmos dados pois já temos PIB e IDH juntos
+    campos = CAMPOS_IDH
+
+@ns_municipios.route('/<int:codigo>')
+class MunicipioPorCodigo(RecursoDados):
+    def get(self, codigo):
+        """Dados de um município pelo código IBGE"""
+        dados = self.dados
+        posicao = dados.municipios_por_codigo.get(codigo)
+        
+        if posicao is None:
+            return {
+                'status': 'error',
+                'message': 'Município não encontrado'
+            }, 404
+        
+        return resposta_json({
+            'status': 'success',
+            'municipio': dados.registros('municipios')[posicao],
+            'timestamp': datetime.now().isoformat()
+        })
+
+@ns_municipios.route('/export')
+class ExportacaoMunicipios(RecursoDados):
+    @ns_municipios.expect(exportacao_parser)
+    def get(self):
+        """Exporta os municípios em Arrow ou Parquet"""
+        args = exportacao_parser.parse_args()
+        return exportar_tabela(
+            self.dados, 'municipios',
+            estado=args['estado'].upper() if args['estado'] else None,
+            regiao=args['regiao'],
+            ano=args['ano']
+        )
+
+@ns_municipios.route('/batch')
+class LoteMunicipios(RecursoDados):
+    @ns_municipios.expect(lote_municipios_model)
+    def post(self):
+        """Vários municípios (códigos IBGE) numa só requisição"""
+        dados = self.dados
+        chaves = ler_lote('codigos')
+        
+        def buscar(chave):
+            try:
+                return dados.municipios_por_codigo.get(int(chave))
+            except (TypeError, ValueError):
+                return None
+        
+        return resposta_lote(chaves, buscar, dados.registros('municipios'), 'municipio',
+                             'Município não encontrado')
+
+busca_parser = reqparse.RequestParser()
+busca_parser.add_argument('nome', type=str, required=True, location='args', help='Nome do município')
+
+@ns_municipios.route('/busca')
+class BuscaMunicipio(RecursoDados):
+    @ns_municipios.expect(busca_parser)
+    def get(self):
+        """Busca municípios pelo nome (sem diferenciar acentos e maiúsculas)"""
+        dados = self.dados
+        args = busca_parser.parse_args()
+        posicoes = dados.municipios_por_nome.get(normalizar_nome(args['nome']), [])
+        registros = dados.registros('municipios')
+        
+        return resposta_json({
+            'status': 'success',
+            'total': len(posicoes),
+            'municipios': [registros[i] for i in posicoes],
+            'timestamp': datetime.now().isoformat()
+        })
+
+ranking_parser = reqparse.RequestParser()
+ranking_parser.add_argument('limit', type=int, location='args', help='Quantidade máxima de municípios')
+ranking_parser.add_argument('offset', type=int, default=0, location='args', help='Posição inicial do ranking')
+ranking_parser.add_argument('estado', type=str, location='args', help='Sigla do estado')
+ranking_parser.add_argument('regiao', type=str, location='args', help='Nome da região')
+ranking_parser.add_argument('order_by', type=str, default='pib', choices=COLUNAS_RANKING,
+                            location='args', help='Indicador usado na ordenação')
+
+@ns_analise.route('/ranking-pib')
+class RankingPIB(RecursoDados):
+    @ns_analise.expect(ranking_parser)
+    def get(self):
+        """Ranking de municípios por PIB"""
+        args = ranking_parser.parse_args()
+        limite, deslocamento = args['limit'], args['offset']
+        
+        if (limite is not None and limite < 0) or deslocamento < 0:
+            abort(400, 'limit e offset devem ser positivos')
+        
+        ranking, total = self.analise.criar_ranking_pib(
+            self.dados,
+            limite=limite,
+            deslocamento=deslocamento,
+            estado=args['estado'].upper() if args['estado'] else None,
+            regiao=args['regiao'],
+            ordenar_por=args['order_by'],
+            colunar=formato_colunar()
+        )
+        
+        return resposta_json({
+            'status': 'success',
+            'total': total,
+            'limit': limite,
+            'offset': deslocamento,
+            'ranking': ranking,
+            'timestamp': datetime.now().isoformat()
+        })
+
+@ns_analise.route('/correlacao-pib-idh')
+class CorrelacaoPIBIDH(RecursoDados):
+    @em_cache
+    def get(self):
+        """Correlação REAL entre PIB e IDH"""
+        correlacao = self.analise.analisar_correlacao_pib_idh(self.dados)
+        
+        return resposta_json({
+            'status': 'success',
+            'correlacao': correlacao,
+            'timestamp': self.dados.carregado_em.isoformat()
+        })
+
+@ns_analise.route('/estados-comparacao')
+class ComparacaoEstados(RecursoDados):
+    def get(self):
+        """Comparação entre estados"""
+        comparacao = self.analise.comparar_estados(self.dados)
+        
+        return resposta_json({
+            'status': 'success',
+            'comparacao': comparacao,
+            'timestamp': datetime.now().isoformat()
+        })
+
+@ns_analise.route('/distribuicao-regional')
+class DistribuicaoRegional(RecursoDados):
+    @em_cache
+    def get(self):
+        """Distribuição regional dos indicadores"""
+        distribuicao = self.analise.analisar_distribuicao_regional(self.dados)
+        
+        return resposta_json({
+            'status': 'success',
+            'distribuicao': distribuicao,
+            'timestamp': self.dados.carregado_em.isoformat()
+        })
+
+estatisticas_parser = reqparse.RequestParser()
+estatisticas_parser.add_argument('estado', type=str.upper, choices=sorted(UFS), location='args',
+                                 help='Sigla do estado')
+estatisticas_parser.add_argument('regiao', type=str, choices=REGIOES, location='args', help='Nome da região')
+
+@ns_analise.route('/estatisticas-pib')
+class EstatisticasPIB(RecursoDados):
+    @ns_analise.expect(estatisticas_parser)
+    @em_cache
+    def get(self):
+        """Estatísticas descritivas do PIB (e IDH), por estado, região ou Brasil"""
+        args = estatisticas_parser.parse_args()
+        estatisticas = self.analise.calcular_estatisticas_descritivas(
+            self.dados,
+            estado=args['estado'],
+            regiao=args['regiao']
+        )
+        
+        return resposta_json({
+            'status': 'success',
+            'estatisticas': estatisticas,
+            'timestamp': self.dados.carregado_em.isoformat()
+        })
+
+@ns_analise.route('/populacao-total')
+class PopulacaoTotal(RecursoDados):
+    @em_cache
+    def get(self):
+        """Análise da população total"""
+        dados = self.dados
+        populacao = dados.estados['populacao']
+        registros = dados.registros('estados')
+        
+        # CONVERTE todos os valores para tipos Python nativos
+        por_regiao = agregacao.agregar_tabela(dados.estados, 'populacao', 'regiao')['soma']
+        populacao_por_regiao = {regiao: int(total) for regiao, total in por_regiao.items()}
+        
+        analise_populacao = {
+            'populacao_total': int(populacao.sum()),
+            'media_estados': int(populacao.mean()),
+            'estado_mais_populoso': registros[int(populacao.to_numpy().argmax())],
+            'estado_menos_populoso': registros[int(populacao.to_numpy().argmin())],
+            'populacao_por_regiao': populacao_por_regiao
+        }
+        
+        return resposta_json({
+            'status': 'success',
+            'analise': analise_populacao,
+            'timestamp': self.dados.carregado_em.isoformat()
+        })
+
+correlacoes_parser = reqparse.RequestParser()
+correlacoes_parser.add_argument('metodo', type=str, default='ambos', choices=correlacao.METODOS + ('ambos',),
+                                location='args', help='pearson, spearman ou ambos')
+correlacoes_parser.add_argument('agrupar', type=str, choices=('regiao',), location='args',
+                                help='Calcula uma matriz por região')
+correlacoes_parser.add_argument('bootstrap', type=int, default=0, choices=correlacao.REAMOSTRAGENS,
+                                location='args', help='Número de reamostragens para os intervalos de confiança')
+correlacoes_parser.add_argument('nivel', type=float, default=0.95, choices=correlacao.NIVEIS, location='args',
+                                help='Nível de confiança dos intervalos')
+
+@ns_analise.route('/correlacoes')
+class Correlacoes(RecursoDados):
+    @ns_analise.expect(correlacoes_parser)
+    @em_cache
+    def get(self):
+        """Matrizes de Pearson e Spearman entre os indicadores, com ICs por bootstrap"""
+        args = correlacoes_parser.parse_args()
+        metodos = correlacao.METODOS if args['metodo'] == 'ambos' else (args['metodo'],)
+        opcoes = {'metodos': metodos, 'reamostragens': args['bootstrap'], 'nivel': args['nivel']}
+        municipios = self.dados.municipios
+        
+        if args['agrupar']:
+            resultado = {
+                grupo: correlacao.analisar(municipios.iloc[posicoes], **opcoes)
+                for grupo, posicoes in municipios.groupby(args['agrupar'], observed=True).indices.items()
+            }
+        else:
+            resultado = correlacao.analisar(municipios, **opcoes)
+        
+        return resposta_json({
+            'status': 'success',
+            'correlacoes': resultado,
+            'timestamp': self.dados.carregado_em.isoformat()
+        })
+
+agregado_parser = reqparse.RequestParser()
+agregado_parser.add_argument('metrica', type=str, required=True, choices=agregacao.METRICAS,
+                             location='args', help='Indicador agregado')
+agregado_parser.add_argument('nivel', type=str, default='regiao', choices=agregacao.NIVEIS,
+                             location='args', help='Nível territorial do agrupamento')
+
+@ns_analise.route('/agregado')
+class Agregado(RecursoDados):
+    @ns_analise.expect(agregado_parser)
+    @em_cache
+    def get(self):
+        """Soma, média, contagem, mínimo e máximo de um indicador por nível territorial"""
+        args = agregado_parser.parse_args()
+        agregado = self.analise.agregar(self.dados, args['metrica'], args['nivel'])
+        
+        if agregado is None:
+            return resposta_json({
+                'status': 'error',
+                'message': f"Métrica {args['metrica']} não disponível no nível {args['nivel']}"
+            }, 404)
+        
+        return resposta_json({
+            'status': 'success',
+            'metrica': args['metrica'],
+            'nivel': args['nivel'],
+            'agregado': agregado.to_dict('index'),
+            'timestamp': self.dados.carregado_em.isoformat()
+        })
+
+tendencias_parser = reqparse.RequestParser()
+tendencias_parser.add_argument('indicador', type=str, default='pib', choices=series.INDICADORES,
+                               location='args', help='Indicador da série histórica')
+tendencias_parser.add_argument('de', type=int, location='args', help='Ano inicial (inclusive)')
+tendencias_parser.add_argument('ate', type=int, location='args', help='Ano final (inclusive)')
+tendencias_parser.add_argument('janela', type=int, default=series.JANELA_PADRAO, location='args',
+                               help='Anos da média móvel')
+tendencias_parser.add_argument('limit', type=int, default=20, location='args', help='Quantidade de municípios')
+tendencias_parser.add_argument('order_by', type=str, default='cagr', choices=series.ORDENACOES,
+                               location='args', help='cagr (crescimento anual composto) ou inclinacao (por ano)')
+tendencias_parser.add_argument('ordem', type=str, default='desc', choices=('desc', 'asc'), location='args',
+                               help='desc para os que mais crescem, asc para os que mais encolhem')
+tendencias_parser.add_argument('estado', type=str, location='args', help='Sigla do estado')
+tendencias_parser.add_argument('regiao', type=str, location='args', help='Nome da região')
+
+@ns_analise.route('/tendencias')
+class Tendencias(RecursoDados):
+    @ns_analise.expect(tendencias_parser)
+    @em_cache
+    def get(self):
+        """Tendências dos municípios entre dois anos: CAGR, inclinação e médias móveis"""
+        args = tendencias_parser.parse_args()
+        if args['limit'] < 0 or args['janela'] < 1:
+            abort(400, 'limit deve ser positivo e janela maior que zero')
+        if args['de'] is not None and args['ate'] is not None and args['de'] > args['ate']:
+            abort(400, 'de deve ser menor ou igual a ate')
+        
+        dados = self.dados
+        if args['indicador'] not in dados.series.indicadores:
+            return resposta_json({
+                'status': 'error',
+                'message': f"Indicador {args['indicador']} não disponível"
+            }, 404)
+        
+        ranking, total, anos = self.analise.calcular_tendencias(
+            dados,
+            args['indicador'],
+            de=args['de'],
+            ate=args['ate'],
+            janela=args['janela'],
+            limite=args['limit'],
+            ordenar_por=args['order_by'],
+            crescente=args['ordem'] == 'asc',
+            estado=args['estado'].upper() if args['estado'] else None,
+            regiao=args['regiao']
+        )
+        
+        return resposta_json({
+            'status': 'success',
+            'indicador': args['indicador'],
+            'anos': anos,
+            'janela': args['janela'],
+            'total': total,
+            'ranking': ranking,
+            'timestamp': dados.carregado_em.isoformat()
+        })
+
+cubo_parser = reqparse.RequestParser()
+cubo_parser.add_argument('nivel', type=str, default='regiao', choices=cubo.HIERARQUIA, location='args',
+                         help='Nível territorial dos nós devolvidos')
+cubo_parser.add_argument('pai', type=str, location='args',
+                         help='Nó do nível imediatamente acima (região, sigla, meso ou microrregião)')
+cubo_parser.add_argument('indicador', type=str, choices=cubo.INDICADORES, location='args',
+                         help='Só um indicador (padrão: todos os carregados)')
+cubo_parser.add_argument('ano', type=int, location='args', help='Só um ano (padrão: todos)')
+
+@ns_analise.route('/cubo')
+class Cubo(RecursoDados):
+    @ns_analise.expect(cubo_parser)
+    @em_cache
+    def get(self):
+        """Drill-down região → estado → meso → micro → município com agregados pré-calculados"""
+        args = cubo_parser.parse_args()
+        dados = self.dados
+        territorial = dados.cubo
+        
+        nivel = args['nivel']
+        if nivel not in territorial.niveis:
+            return resposta_json({
+                'status': 'error',
+                'message': f'Nível {nivel} não disponível nos dados carregados'
+            }, 404)
+        if args['indicador'] and args['indicador'] not in territorial.indicadores:
+            return resposta_json({
+                'status': 'error',
+                'message': f"Indicador {args['indicador']} não disponível"
+            }, 404)
+        
+        pai = args['pai']
+        nivel_pai = territorial.pai_de(nivel)
+        if pai and nivel_pai == 'estado':
+            pai = pai.upper()
+        
+        nos = territorial.nos(nivel, pai, indicador=args['indicador'], ano=args['ano'])
+        
+        return resposta_json({
+            'status': 'success',
+            'nivel': nivel,
+            'nivel_pai': nivel_pai,
+            'pai': pai,
+            'niveis': territorial.niveis,
+            'total': len(nos),
+            'nos': nos,
+            'timestamp': dados.carregado_em.isoformat()
+        })
+
+@metricas.REGISTRO.coletor
+def metricas_aplicacao():
+    """Contadores dos caches e tamanho do conjunto do app que atende /metrics, lidos a cada coleta"""
+    if not has_app_context():
+        return []
+    
+    estado = contexto()
+    dados = estado.base.atual
+    respostas = estado.cache_respostas.metricas()
+    amostras = [
+        ('brasil_cache_respostas_total', 'counter', 'Consultas ao cache de respostas por resultado',
+         [({'resultado': r}, respostas[r]) for r in ('acertos', 'falhas', 'nao_modificadas', 'coalescidas')]),
+        ('brasil_cache_respostas_entradas', 'gauge', 'Respostas guardadas no cache', [({}, respostas['tamanho'])]),
+        ('brasil_dados_versao', 'gauge', 'Versão do conjunto de dados em uso', [({}, dados.versao)]),
+        ('brasil_dados_idade_segundos', 'gauge', 'Tempo desde a publicação da versão em uso',
+         [({}, (datetime.now() - dados.carregado_em).total_seconds())]),
+        ('brasil_dados_linhas', 'gauge', 'Linhas por tabela do conjunto',
+         [({'tabela': t}, len(getattr(dados, t))) for t in ('estados', 'municipios')]),
+        ('brasil_dados_bytes', 'gauge', 'Memória das colunas por tabela do conjunto',
+         [({'tabela': t}, int(getattr(dados, t).memory_usage(deep=False).sum())) for t in ('estados', 'municipios')])
+    ]
+
+    carga = estado.carga()
+    if carga:
+        cliente = carga['cliente']
+        amostras.append(('brasil_ibge_cache_total', 'counter', 'Consultas ao cache do IBGEClient por resultado', [
+            ({'resultado': 'acertos'}, cliente['cache_acertos']),
+            ({'resultado': 'falhas'}, cliente['cache_falhas']),
+            ({'resultado': 'coalescidas'}, cliente['requisicoes_coalescidas'])
+        ]))
+        amostras.append(('brasil_ibge_cache_entradas', 'gauge', 'Respostas do IBGE em memória',
+                         [({}, cliente['cache_tamanho'])]))
+
+    return amostras
+
+def metrics():
+    return Response(metricas.REGISTRO.exportar(), content_type=metricas.MIMETYPE_PROMETHEUS)
+
+# Health Check
+def health_check():
+    estado = contexto()
+    carga = estado.carga()
+    return resposta_json({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'version': '1.0.0',
+        'api': 'IBGE Dados Abertos - Versão Simplificada',
+        'dados': {
+            'versao': estado.base.atual.versao,
+            'carregado_em': estado.base.atual.carregado_em.isoformat(),
+            'backend': estado.analise.backend.nome,
+            'carga': carga['status'] if carga else None,
+            'snapshot': estado.carga_snapshot.status() if estado.carga_snapshot else None
+        }
+    })
+
+def home():
+    return resposta_json({
+        'message': 'API Análise Dados IBGE - Bem vindo!',
+        'endpoints': {
+            'documentacao': '/docs',
+            'health': '/health',
+            'metricas': '/metrics',
+            'estados': '/estados/*',
+            'municipios': '/municipios/*', 
+            'analise': '/analise/*'
+        },
+        'exemplos': {
+            'listar_estados': '/estados/',
+            'estado_sp': '/estados/SP',
+            'pib_municipios': '/municipios/pib',
+            'correlacao_pib_idh': '/analise/correlacao-pib-idh',
+            'ranking_pib': '/analise/ranking-pib',
+            'populacao_total': '/analise/populacao-total',
+            'distribuicao_regional': '/analise/distribuicao-regional',
+            'tendencias_pib': '/analise/tendencias?indicador=pib',
+            'cubo_regioes': '/analise/cubo?nivel=regiao',
+            'cubo_sudeste': '/analise/cubo?nivel=estado&pai=Sudeste'
+        }
+    })
+
+def montar(app, ambiente):
+    """Cria o estado do app (dados, análise, caches, carga) e registra a API e as rotas"""
+    app.extensions['brasil_dados'] = Contexto(ambiente)
+    
+    api = Api(app, 
+              version='1.0', 
+              title='API Análise Dados IBGE',
+              description='API para análise de dados demográficos e econômicos do IBGE',
+              doc='/docs')
+    api.representations['application/json'] = saida_json
+    for namespace in (ns_estados, ns_municipios, ns_analise):
+        api.add_namespace(namespace)
+    
+    app.add_url_rule('/metrics', view_func=metrics)
+    app.add_url_rule('/health', view_func=health_check)
+    app.add_url_rule('/', view_func=home)
+    
+    # O Flask-RESTX já registra '/' (endpoint 'root', que responde 404 quando a documentação fica em /docs)
+    app.view_functions['root'] = home
+    return api
\ No newline at end of file
@@ -0,0 +1,95 @@
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from flask import Response, request, stream_with_context
+
+from metricas import fase
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+MIMETYPE_JSON = 'application/json'
+MIMETYPE_NDJSON = 'application/x-ndjson'
+
+
+def _padrao(obj):
+    """Converte tipos NumPy/pandas que os serializadores não conhecem"""
+    if isinstance(obj, np.ndarray):
+        return _sem_nan(obj.tolist())
+    if isinstance(obj, np.generic):
+        return _sem_nan(obj.item())
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, (pd.Series, pd.Index, pd.Categorical)):
+        return _sem_nan(obj.tolist())
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+def _sem_nan(obj):
+    """Troca NaN e infinitos por None, como o orjson faz (o json padrão escreveria NaN, que não é JSON)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {chave: _sem_nan(valor) for chave, valor in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sem_nan(valor) for valor in obj]
+    return obj
+
+
+def _serializar_orjson(obj) -> bytes:
+    return orjson.dumps(obj, default=_padrao, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _serializar_json(obj) -> bytes:
+    return json.dumps(_sem_nan(obj), default=_padrao, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+# Serializador ativo; pode ser trocado com usar_serializador()
+serializar = _serializar_orjson if orjson is not None else _serializar_json
+
+
+def usar_serializador(funcao):
+    """Troca o serializador usado por todas as respostas (ex.: para benchmarks)"""
+    global serializar
+    serializar = funcao
+
+
+def resposta_json(payload, status: int = 200, headers=None) -> Response:
+    """Monta uma resposta Flask com o serializador rápido"""
+    with fase('serializacao'):
+        corpo = serializar(payload)
+    return Response(corpo, status=status, headers=headers, mimetype=MIMETYPE_JSON)
+
+
+def saida_json(data, code, headers=None):
+    """Representação JSON do Flask-RESTX (erros e retornos em dict)"""
+    return resposta_json(data, code, headers)
+
+
+def formato_colunar() -> bool:
+    """Indica se o cliente pediu ?format=columns"""
+    return request.args.get('format') == 'columns'
+
+
+def streaming_solicitado() -> bool:
+    """Indica se o cliente pediu NDJSON (?stream=1 ou Accept: application/x-ndjson)"""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == MIMETYPE_NDJSON
+
+
+def resposta_ndjson(lotes) -> Response:
+    """Resposta em streaming: uma linha JSON por registro, serializada lote a lote"""
+    def gerar():
+        for lote in lotes:
+            yield b''.join(serializar(registro) + b'\n' for registro in lote)
+
+    return Response(stream_with_context(gerar()), mimetype=MIMETYPE_NDJSON)
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# Indicadores municipais com série histórica, quando presentes na tabela
+INDICADORES = ('pib', 'idh', 'populacao', 'educacao', 'saude')
+ORDENACOES = ('cagr', 'inclinacao')
+
+JANELA_PADRAO = 3
+
+
+class SeriesMunicipais:
+    """Séries anuais dos indicadores: uma matriz município × ano por indicador.
+
+    Os anos formam um intervalo contínuo; anos sem dado ficam como NaN, assim
+    cada coluna é um ano e as contas por município são operações por linha.
+    """
+
+    def __init__(self, municipios: pd.DataFrame):
+        codigos = municipios['codigo'].to_numpy()
+        anos = municipios['ano'].to_numpy()
+
+        self.codigos = np.unique(codigos)
+        self.anos = np.arange(anos.min(), anos.max() + 1) if len(anos) else np.empty(0, dtype='int64')
+        linhas = np.searchsorted(self.codigos, codigos)
+        colunas = anos - self.anos[0] if len(anos) else anos
+
+        # Nome, estado e região de cada município (da linha mais recente)
+        recentes = np.lexsort((anos, linhas))
+        ultima = np.ones(len(recentes), dtype=bool)
+        ultima[:-1] = linhas[recentes][1:] != linhas[recentes][:-1]
+        colunas_municipio = ['codigo', 'municipio', 'estado', 'regiao']
+        self.municipios = municipios.iloc[recentes[ultima]][colunas_municipio].reset_index(drop=True)
+
+        self.matrizes = {}
+        for indicador in INDICADORES:
+            if indicador not in municipios.columns:
+                continue
+            matriz = np.full((len(self.codigos), len(self.anos)), np.nan)
+            matriz[linhas, colunas] = municipios[indicador].to_numpy(dtype='float64', na_value=np.nan)
+            self.matrizes[indicador] = matriz
+
+    @property
+    def indicadores(self):
+        return tuple(self.matrizes)
+
+    def intervalo(self, de: int = None, ate: int = None):
+        """Colunas (início, fim) dos anos pedidos (inclusive); anos fora da série são ignorados"""
+        inicio = 0 if de is None else int(np.searchsorted(self.anos, de))
+        fim = len(self.anos) if ate is None else int(np.searchsorted(self.anos, ate, side='right'))
+        return inicio, max(inicio, fim)
+
+    def recorte(self, indicador: str, de: int = None, ate: int = None):
+        """(anos, matriz) do indicador entre os anos pedidos, sem copiar a matriz"""
+        inicio, fim = self.intervalo(de, ate)
+        return self.anos[inicio:fim], self.matrizes[indicador][:, inicio:fim]
+
+
+def _extremos(matriz: np.ndarray):
+    """Coluna do primeiro e do último valor presente de cada linha"""
+    presentes = ~np.isnan(matriz)
+    primeira = presentes.argmax(axis=1)
+    ultima = matriz.shape[1] - 1 - presentes[:, ::-1].argmax(axis=1)
+    return primeira, ultima, presentes.any(axis=1)
+
+
+def cagr(anos: np.ndarray, matriz: np.ndarray) -> np.ndarray:
+    """Taxa de crescimento anual composta entre o primeiro e o último ano com dado"""
+    if matriz.shape[1] == 0:
+        return np.full(len(matriz), np.nan)
+
+    primeira, ultima, algum = _extremos(matriz)
+    linhas = np.arange(len(matriz))
+    inicial, final = matriz[linhas, primeira], matriz[linhas, ultima]
+    periodo = (anos[ultima] - anos[primeira]).astype('float64')
+
+    validos = algum & (periodo > 0) & (inicial > 0) & (final > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taxa = (final / inicial) ** (1 / periodo) - 1
+    return np.where(validos, taxa, np.nan)
+
+
+def inclinacao(anos: np.ndarray, matriz: np.ndarray) -> np.ndarray:
+    """Inclinação de mínimos quadrados (unidades por ano) de cada linha, ignorando NaN"""
+    presentes = ~np.isnan(matriz)
+    valores = np.where(presentes, matriz, 0.0)
+
+    # Anos centrados evitam cancelamento numérico nas somas
+    x = np.where(presentes, anos - anos.mean() if len(anos) else anos, 0.0)
+    n = presentes.sum(axis=1)
+    soma_x, soma_y = x.sum(axis=1), valores.sum(axis=1)
+    soma_xx, soma_xy = (x * x).sum(axis=1), (x * valores).sum(axis=1)
+
+    denominador = n * soma_xx - soma_x ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado = (n * soma_xy - soma_x * soma_y) / denominador
+    return np.where((n >= 2) & (denominador > 0), resultado, np.nan)
+
+
+def medias_moveis(matriz: np.ndarray, janela: int = JANELA_PADRAO) -> np.ndarray:
+    """Média móvel dos últimos `janela` anos de cada linha (NaN até completar a janela)"""
+    presentes = ~np.isnan(matriz)
+    somas = np.cumsum(np.where(presentes, matriz, 0.0), axis=1)
+    contagens = np.cumsum(presentes, axis=1)
+
+    # Somas acumuladas com um zero à esquerda: janela = acumulado[i] - acumulado[i - janela]
+    somas = np.pad(somas, ((0, 0), (1, 0)))
+    contagens = np.pad(contagens, ((0, 0), (1, 0)))
+    na_janela = contagens[:, janela:] - contagens[:, :-janela]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        medias = (somas[:, janela:] - somas[:, :-janela]) / na_janela
+
+    resultado = np.full(matriz.shape, np.nan)
+    resultado[:, janela - 1:] = np.where(na_janela > 0, medias, np.nan)
+    return resultado
+
+
+def tendencias(series: SeriesMunicipais, indicador: str, de: int = None, ate: int = None) -> dict:
+    """CAGR e inclinação de todos os municípios de uma vez, com a matriz do recorte"""
+    anos, matriz = series.recorte(indicador, de, ate)
+    if len(anos):
+        primeira, ultima, _ = _extremos(matriz)
+        linhas = np.arange(len(matriz))
+        inicial, final = matriz[linhas, primeira], matriz[linhas, ultima]
+    else:
+        inicial = final = np.full(len(matriz), np.nan)
+
+    return {
+        'anos': anos,
+        'matriz': matriz,
+        'valor_inicial': inicial,
+        'valor_final': final,
+        'cagr': cagr(anos, matriz),
+        'inclinacao': inclinacao(anos, matriz)
+    }
+
+
+def maiores(valores: np.ndarray, limite: int, candidatos: np.ndarray = None, crescente: bool = False) -> np.ndarray:
+    """Posições dos `limite` maiores (ou menores) valores, sem ordenar tudo e sem NaN"""
+    posicoes = np.arange(len(valores)) if candidatos is None else candidatos
+    posicoes = posicoes[~np.isnan(valores[posicoes])]
+    chaves = valores[posicoes] if crescente else -valores[posicoes]
+
+    if limite < len(posicoes):
+        posicoes = posicoes[np.argpartition(chaves, limite - 1)[:limite]] if limite > 0 else posicoes[:0]
+        chaves = valores[posicoes] if crescente else -valores[posicoes]
+    return posicoes[np.argsort(chaves, kind='stable')]
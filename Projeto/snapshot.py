@@ -0,0 +1,96 @@
+import os
+import struct
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+import colunar
+from dados import carregar_exemplos
+
+# Prefixo fixo: mágico, versão do formato, CRC32 do bloco, tamanho do bloco; o bloco colunar começa em INICIO
+MAGICO = b'BRDADOS\x00'
+VERSAO_FORMATO = 1
+INICIO = colunar.ALINHAMENTO
+_PREFIXO = struct.Struct('<8sIIQ')
+
+
+class SnapshotInvalido(ValueError):
+    pass
+
+
+def gravar(caminho: str, conjunto, origem: str = None):
+    """Grava o conjunto num arquivo temporário e o troca atomicamente pelo snapshot"""
+    bloco = colunar.empacotar(
+        {'estados': conjunto.estados, 'municipios': conjunto.historico},
+        {'versao': conjunto.versao, 'origem': origem, 'gerado_em': datetime.now().isoformat()}
+    )
+    prefixo = _PREFIXO.pack(MAGICO, VERSAO_FORMATO, zlib.crc32(bloco), len(bloco))
+
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(prefixo.ljust(INICIO, b'\x00'))
+        arquivo.write(bloco)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+def abrir(caminho: str, verificar: bool = True):
+    """Mapeia o snapshot em memória: (estados, municipios, metadados), colunas sem cópia"""
+    mapa = np.memmap(caminho, dtype='uint8', mode='r')
+    if len(mapa) < INICIO:
+        raise SnapshotInvalido(f'{caminho}: arquivo truncado')
+
+    magico, versao_formato, crc, tamanho = _PREFIXO.unpack_from(mapa, 0)
+    if magico != MAGICO:
+        raise SnapshotInvalido(f'{caminho}: não é um snapshot')
+    if versao_formato != VERSAO_FORMATO:
+        raise SnapshotInvalido(f'{caminho}: formato {versao_formato} não suportado')
+
+    bloco = mapa[INICIO:INICIO + tamanho]
+    if len(bloco) != tamanho:
+        raise SnapshotInvalido(f'{caminho}: arquivo truncado')
+    if verificar and zlib.crc32(bloco) != crc:
+        raise SnapshotInvalido(f'{caminho}: checksum não confere')
+
+    tabelas, metadados = colunar.desempacotar(bloco)
+    return tabelas['estados'], tabelas['municipios'], metadados
+
+
+class CarregadorSnapshot:
+    """Carregador do BaseDados que mapeia o snapshot; sem snapshot válido, usa a reserva"""
+
+    def __init__(self, caminho: str, reserva=carregar_exemplos, verificar: bool = True):
+        self.caminho = caminho
+        self.reserva = reserva
+        self.verificar = verificar
+        self.metadados = None
+        self.erro = None
+
+    def __call__(self):
+        try:
+            estados, municipios, self.metadados = abrir(self.caminho, self.verificar)
+            self.erro = None
+            return estados, municipios
+        except (OSError, SnapshotInvalido) as e:
+            self.metadados = None
+            self.erro = str(e)
+            return self.reserva()
+
+    def status(self) -> dict:
+        gerado_em = self.metadados and self.metadados.get('gerado_em')
+        return {
+            'caminho': self.caminho,
+            'carregado': self.metadados is not None,
+            'origem': self.metadados and self.metadados.get('origem'),
+            'gerado_em': gerado_em,
+            'idade_s': (datetime.now() - datetime.fromisoformat(gerado_em)).total_seconds() if gerado_em else None,
+            'erro': self.erro
+        }
+
+
+def configurar(ambiente=os.environ):
+    """Com DADOS_SNAPSHOT, a base sobe mapeando esse arquivo (quando existir)"""
+    caminho = ambiente.get('DADOS_SNAPSHOT')
+    return CarregadorSnapshot(caminho) if caminho else None
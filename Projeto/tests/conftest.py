@@ -0,0 +1,17 @@
+"""Testes do Projeto: rodam a partir da raiz do repositório ou da pasta Projeto (python -m pytest)"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as aplicacao  # noqa: E402
+
+
+@pytest.fixture
+def cliente():
+    """Test client de um app novo, com os dados de exemplo e sem carga nem memória compartilhada"""
+    app = aplicacao.create_app({'IBGE_CARGA': '', 'DADOS_COMPARTILHADOS': '', 'DADOS_SNAPSHOT': '',
+                                'DADOS_BACKEND': 'memoria', 'API_PRELOAD': '1'})
+    return app.test_client()
@@ -0,0 +1,163 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+import backends
+from dados import UFS, BaseDados, Conjunto, montar_estados, montar_municipios
+
+SQL = ['sqlite', pytest.param('duckdb', marks=pytest.mark.skipif(
+    importlib.util.find_spec('duckdb') is None, reason='duckdb não instalado'))]
+
+
+def gerar_tabelas(quantidade=400):
+    """Municípios em todas as UFs, com PIB repetido (empates no ranking) e indicadores ausentes"""
+    rng = np.random.default_rng(7)
+    siglas = list(UFS)
+    estados = montar_estados([
+        {'id': codigo, 'sigla': sigla, 'nome': sigla, 'regiao': regiao, 'populacao': int(rng.integers(1, 10**7))}
+        for sigla, (codigo, regiao) in UFS.items()
+    ])
+    pib = rng.choice([1.5, 2.0, 3.25, 10.0, None], size=quantidade, p=[0.2, 0.2, 0.2, 0.3, 0.1])
+    municipios = montar_municipios([
+        {'codigo': 1000000 + i, 'municipio': f'Município {i}', 'estado': siglas[i % len(siglas)],
+         'pib': pib[i], 'idh': None if i % 17 == 0 else float(rng.uniform(0.5, 0.9))}
+        for i in range(quantidade)
+    ])
+    return estados, municipios
+
+
+@pytest.fixture(scope='module')
+def dados():
+    return Conjunto(*gerar_tabelas(), versao=1)
+
+
+@pytest.fixture(params=SQL)
+def backend(request, tmp_path):
+    backend = backends.configurar({'DADOS_BACKEND': request.param, 'DADOS_BACKEND_CAMINHO': str(tmp_path)})
+    yield backend
+    backend.fechar()
+
+
+@pytest.mark.parametrize('filtros', [{}, {'estado': 'SP'}, {'regiao': 'Nordeste'}])
+@pytest.mark.parametrize('coluna', ['pib', 'idh'])
+@pytest.mark.parametrize('limite,deslocamento', [(None, 0), (20, 0), (15, 40)])
+def test_ranking_igual_ao_da_memoria(backend, dados, coluna, filtros, limite, deslocamento):
+    posicoes, total = backend.ranking(dados, coluna, limite, deslocamento, **filtros)
+    esperadas, esperado = backends.BackendMemoria().ranking(dados, coluna, limite, deslocamento, **filtros)
+
+    assert total == esperado
+    assert posicoes.tolist() == esperadas.tolist()
+
+
+@pytest.mark.parametrize('ordem', [('Inexistente', None), (None, 'Inexistente')])
+def test_recorte_vazio_nao_divide_o_cache_com_o_brasil(ordem):
+    dados = Conjunto(*gerar_tabelas(), versao=1)
+    memoria = backends.BackendMemoria()
+
+    resultados = {regiao: memoria.estatisticas(dados, regiao=regiao) for regiao in ordem}
+
+    assert resultados['Inexistente'] == {}
+    assert resultados[None]['pib']['contagem'] == int(dados.municipios['pib'].notna().sum())
+
+
+def test_recorte_invalido_na_api_da_400(cliente):
+    assert cliente.get('/analise/estatisticas-pib?regiao=sudeste').status_code == 400
+    assert cliente.get('/analise/estatisticas-pib?estado=XX').status_code == 400
+    assert cliente.get('/analise/estatisticas-pib?estado=sp').status_code == 200
+
+
+@pytest.mark.parametrize('filtros', [{}, {'estado': 'RJ'}, {'regiao': 'Sul'}])
+def test_estatisticas_iguais_as_da_memoria(backend, dados, filtros):
+    resultado = backend.estatisticas(dados, **filtros)
+    referencia = backends.BackendMemoria().estatisticas(dados, **filtros)
+    assert set(resultado) == set(referencia)
+
+    # A memória usa um esboço para os quartis; o banco dá o quantil exato
+    mascara = dados.mascara('municipios', **filtros)
+    for metrica, resumo in resultado.items():
+        valores = dados.valores('municipios', metrica)
+        valores = valores[~np.isnan(valores) & (True if mascara is None else mascara)]
+        exatos = dict(zip(('q1', 'mediana', 'q3'), np.quantile(valores, backends.QUANTIS)))
+        for chave, valor in resumo.items():
+            esperado = exatos[chave] if chave in exatos else referencia[metrica][chave]
+            assert valor == pytest.approx(esperado, rel=1e-9, nan_ok=True), (metrica, chave)
+
+
+@pytest.mark.parametrize('metrica,nivel', [('pib', 'estado'), ('idh', 'regiao'), ('populacao', 'regiao')])
+def test_agregado_igual_ao_da_memoria(backend, dados, metrica, nivel):
+    resultado = backend.agregar(dados, metrica, nivel)
+    referencia = backends.BackendMemoria().agregar(dados, metrica, nivel)
+
+    assert list(resultado.index) == list(referencia.index)
+    assert list(resultado.columns) == list(referencia.columns)
+    np.testing.assert_allclose(resultado.to_numpy(dtype='float64'), referencia.to_numpy(dtype='float64'),
+                               rtol=1e-9)
+
+
+def test_correlacao_igual_a_da_memoria(backend, dados):
+    valor, amostra = backend.correlacao(dados, 'pib', 'idh')
+    esperado, esperada = backends.BackendMemoria().correlacao(dados, 'pib', 'idh')
+
+    assert amostra == esperada
+    assert valor == pytest.approx(esperado, rel=1e-9)
+
+
+def test_banco_gravado_ao_publicar_e_aberto_so_para_leitura(backend):
+    base = BaseDados(gerar_tabelas)
+    backend.publicar(base.atual)
+    base.ao_atualizar(backend.publicar)
+
+    conjunto = base.atualizar()
+    caminho = backend._arquivo(conjunto.versao)
+    assert os.path.exists(caminho)
+
+    # A consulta usa o arquivo já gravado, sem regravar
+    modificado = os.stat(caminho).st_mtime_ns
+    backend.ranking(conjunto, 'pib', 10)
+    assert os.stat(caminho).st_mtime_ns == modificado
+    with pytest.raises(Exception):
+        backend._consultar(conjunto, 'DELETE FROM municipios')
+
+
+def test_backend_sql_nao_monta_os_indices_em_memoria(request, tmp_path):
+    base = BaseDados(gerar_tabelas)
+    backend = backends.configurar({'DADOS_BACKEND': 'sqlite', 'DADOS_BACKEND_CAMINHO': str(tmp_path)}, base)
+    request.addfinalizer(backend.fechar)
+
+    conjunto = base.atual
+    assert list(backend.estatisticas(conjunto)) == ['pib', 'idh']  # métricas lidas do esquema do banco
+    backend.ranking(conjunto, 'pib', 10)
+    base.anexar_municipios(conjunto.municipios.tail(3).assign(codigo=[9000001, 9000002, 9000003]))
+    for versao in (conjunto, base.atual):
+        assert not {'estatisticas', 'rankings', 'municipios_por_codigo'} & versao._derivados.keys()
+
+
+def test_backend_memoria_monta_os_indices_ao_publicar():
+    base = BaseDados(gerar_tabelas)
+    backends.configurar({}, base)
+    assert {'estatisticas', 'rankings', 'municipios_por_codigo'} <= base.atual._derivados.keys()
+
+    base.atualizar()
+    assert {'estatisticas', 'rankings', 'municipios_por_codigo'} <= base.atual._derivados.keys()
+
+
+def test_backend_sql_exige_os_metodos_do_banco():
+    class Incompleto(backends._BackendSQL):
+        def _abrir(self, caminho):
+            return None
+
+    with pytest.raises(TypeError):
+        Incompleto('.')
+
+
+def test_versoes_antigas_apagadas(backend):
+    base = BaseDados(gerar_tabelas)
+    backend.publicar(base.atual)
+    base.ao_atualizar(backend.publicar)
+    for _ in range(backend.VERSOES_MANTIDAS + 2):
+        base.atualizar()
+
+    versoes = [v for v in range(1, base.atual.versao + 1) if os.path.exists(backend._arquivo(v))]
+    assert versoes == list(range(base.atual.versao - backend.VERSOES_MANTIDAS, base.atual.versao + 1))
@@ -0,0 +1,39 @@
+from dados import montar_municipios
+
+ROTA = '/analise/distribuicao-regional'
+
+
+def test_if_none_match_igual_responde_304(cliente):
+    primeira = cliente.get(ROTA)
+    etag = primeira.headers['ETag']
+
+    revalidada = cliente.get(ROTA, headers={'If-None-Match': etag})
+
+    assert primeira.status_code == 200 and primeira.data
+    assert revalidada.status_code == 304 and revalidada.data == b''
+    assert revalidada.headers['ETag'] == etag
+    assert revalidada.headers['Cache-Control'] == 'no-cache'
+
+    metricas = cliente.application.extensions['brasil_dados'].cache_respostas.metricas()
+    assert (metricas['falhas'], metricas['acertos'], metricas['nao_modificadas']) == (1, 1, 1)
+
+
+def test_parametros_em_outra_ordem_usam_a_mesma_entrada(cliente):
+    primeira = cliente.get('/analise/correlacoes?metodo=pearson&agrupar=regiao')
+    segunda = cliente.get('/analise/correlacoes?agrupar=regiao&metodo=pearson')
+
+    assert primeira.headers['ETag'] == segunda.headers['ETag']
+    assert segunda.data == primeira.data
+
+
+def test_nova_versao_dos_dados_troca_o_etag(cliente):
+    etag = cliente.get(ROTA).headers['ETag']
+
+    base = cliente.application.extensions['brasil_dados'].base
+    base.anexar_municipios(montar_municipios([
+        {'codigo': 1100205, 'municipio': 'Porto Velho', 'estado': 'RO', 'pib': 17.1, 'idh': 0.736}
+    ]))
+    resposta = cliente.get(ROTA, headers={'If-None-Match': etag})
+
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
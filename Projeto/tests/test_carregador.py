@@ -0,0 +1,148 @@
+import json
+
+import pandas.testing as pdt
+import pytest
+
+import carregador
+import snapshot
+from carregador import DIRETORIO_FIXTURES, CarregadorIBGE, ClienteFixtures, carregar_ibge, ler_anos
+from dados import BaseDados
+from recursos import AnaliseDemografica
+from test_ibge_client import ServidorIBGE, cliente_para
+
+
+@pytest.fixture
+def servidor():
+    """IBGE simulado respondendo com as mesmas gravações de ClienteFixtures (pib.ano-2020 -> pib?ano=2020)"""
+    servidor = ServidorIBGE()
+    for caminho in DIRETORIO_FIXTURES.rglob('*.json'):
+        endpoint, *parametros = caminho.relative_to(DIRETORIO_FIXTURES).with_suffix('').as_posix().split('.')
+        query = '&'.join(parametro.replace('-', '=', 1) for parametro in parametros)
+        servidor.respostas[f'/{endpoint}' + (f'?{query}' if query else '')] = json.loads(
+            caminho.read_text(encoding='utf-8'))
+    yield servidor
+    servidor.fechar()
+
+
+def test_carga_junta_municipios_e_indicadores_pelo_codigo():
+    estados, municipios = carregar_ibge(ClienteFixtures())
+    rio = municipios.set_index('codigo').loc[3304557]
+
+    assert set(estados['sigla']) == {'RJ', 'SP', 'MG', 'DF'}
+    assert (estados['populacao'] > 0).all()
+    assert {'pib', 'idh', 'educacao', 'saude', 'mesorregiao', 'microrregiao'} <= set(municipios.columns)
+    assert (rio['municipio'], rio['estado']) == ('Rio de Janeiro', 'RJ')
+    assert rio['mesorregiao'] == 'Metropolitana do Rio de Janeiro'
+    assert rio[['pib', 'idh', 'educacao', 'saude']].notna().all()
+
+
+@pytest.mark.parametrize('texto,anos', [(None, (2020,)), ('2018-2020', (2018, 2019, 2020)), ('2020, 2018', (2018, 2020))])
+def test_ler_anos(texto, anos):
+    assert ler_anos(texto) == anos
+
+
+def test_carga_de_varios_anos_alimenta_as_tendencias():
+    conjunto = CarregadorIBGE(BaseDados(), ClienteFixtures(), anos=ler_anos('2018-2020')).carregar()
+
+    ranking, total, anos = AnaliseDemografica().calcular_tendencias(conjunto, 'pib', limite=2)
+
+    assert len(conjunto.municipios) == 5 and len(conjunto.historico) == 15
+    assert anos.tolist() == [2018, 2019, 2020] and total == 5
+    assert ranking[0]['municipio'] == 'Campinas'
+    assert ranking[0]['cagr'] == pytest.approx((68.45 / 61.41) ** 0.5 - 1)
+    assert all(linha['inclinacao'] is not None for linha in ranking)
+
+
+def test_carga_pelo_servidor_igual_a_das_fixtures(servidor):
+    with cliente_para(servidor) as cliente:
+        estados, municipios = carregar_ibge(cliente, anos=(2018, 2019, 2020))
+    esperados_estados, esperados_municipios = carregar_ibge(ClienteFixtures(), anos=(2018, 2019, 2020))
+
+    pdt.assert_frame_equal(estados, esperados_estados)
+    pdt.assert_frame_equal(municipios, esperados_municipios)
+
+
+def test_falha_na_carga_mantem_a_versao_atual(servidor):
+    servidor.respostas['/localidades/estados'] = []
+    base = BaseDados()
+    anterior = base.atual
+
+    with cliente_para(servidor) as cliente:
+        assert CarregadorIBGE(base, cliente).carregar() is None
+
+    assert base.atual is anterior
+
+
+@pytest.mark.parametrize('falhas', [
+    {'/localidades/estados/35/municipios'},
+    {'/contasnacionais/municipios/pib'},
+    {'/projecoes/populacao/33'},
+    {'/localidades/estados/35/municipios', '/contasnacionais/municipios/pib'}
+])
+def test_falha_parcial_nao_publica_nem_grava_o_snapshot(servidor, tmp_path, falhas):
+    caminho = str(tmp_path / 'dados.snapshot')
+    base = BaseDados()
+    with cliente_para(servidor) as cliente:
+        anterior = CarregadorIBGE(base, cliente, caminho_snapshot=caminho).carregar()
+    gravado = snapshot.abrir(caminho)[2]['gerado_em']
+
+    servidor.falhas |= falhas
+    with cliente_para(servidor) as cliente:
+        carregador_ibge = CarregadorIBGE(base, cliente, caminho_snapshot=caminho)
+        assert carregador_ibge.carregar() is None
+
+    assert base.atual is anterior
+    assert len(base.atual.municipios) == 5 and base.atual.municipios['pib'].notna().all()
+    assert carregador_ibge.status()['ultimo_erro'].startswith('IBGE não retornou')
+    assert snapshot.abrir(caminho)[2]['gerado_em'] == gravado
+
+
+def test_ouvintes_recebem_o_status_no_inicio_e_no_fim_da_carga():
+    carregador_ibge = CarregadorIBGE(BaseDados(), ClienteFixtures())
+    resumos = []
+    carregador_ibge.ao_mudar(resumos.append)
+
+    carregador_ibge.carregar()
+
+    assert [r['status']['em_andamento'] for r in resumos] == [False, True, False]
+    assert [r['status']['cargas'] for r in resumos] == [0, 0, 1]
+    assert resumos[-1]['status']['ultimo_erro'] is None
+    assert 'cache_acertos' in resumos[-1]['cliente']
+
+
+def test_erro_fica_no_status_ate_a_proxima_carga(servidor):
+    servidor.respostas['/localidades/estados'] = []
+    with cliente_para(servidor) as cliente:
+        carregador_ibge = CarregadorIBGE(BaseDados(), cliente)
+        carregador_ibge.carregar()
+        assert carregador_ibge.status()['ultimo_erro'] == 'IBGE não retornou a lista de estados'
+
+        servidor.respostas['/localidades/estados'] = json.loads(
+            (DIRETORIO_FIXTURES / 'localidades' / 'estados.json').read_text(encoding='utf-8'))
+        cliente.cache.clear()
+        carregador_ibge.carregar()
+
+    assert carregador_ibge.status()['ultimo_erro'] is None
+    assert carregador_ibge.cargas == 1
+
+
+def test_carga_grava_o_snapshot(tmp_path):
+    caminho = str(tmp_path / 'dados.snapshot')
+    base = BaseDados()
+
+    conjunto = CarregadorIBGE(base, ClienteFixtures(), caminho_snapshot=caminho).carregar()
+    estados, municipios, metadados = snapshot.abrir(caminho)
+
+    assert metadados['origem'] == 'ClienteFixtures' and metadados['versao'] == conjunto.versao
+    pdt.assert_frame_equal(municipios, conjunto.historico, check_index_type=False)
+
+
+def test_configurar_conforme_ibge_carga():
+    assert carregador.configurar(BaseDados(), {}) is None
+
+    carregador_ibge = carregador.configurar(BaseDados(), {'IBGE_CARGA': 'fixtures'})
+    try:
+        assert isinstance(carregador_ibge.cliente, ClienteFixtures)
+    finally:
+        carregador_ibge.parar(timeout=5)
+    assert carregador_ibge.cargas == 1
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from coalescencia import VooUnico
+
+
+def _esperar(condicao, limite: float = 5):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, 'condição não atingida'
+        time.sleep(0.001)
+
+
+def _em_paralelo(quantidade, alvo):
+    threads = [threading.Thread(target=alvo) for _ in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    voo = VooUnico()
+    liberar = threading.Event()
+    resultados = []
+
+    def lenta():
+        liberar.wait(5)
+        return 42
+
+    def pedir():
+        resultados.append(voo.executar('chave', lenta))
+
+    lider = threading.Thread(target=pedir)
+    lider.start()
+    _esperar(lambda: voo.metricas()['em_andamento'] == 1)
+
+    seguidores = threading.Thread(target=_em_paralelo, args=(4, pedir))
+    seguidores.start()
+    _esperar(lambda: voo.metricas()['coalescidas'] == 4)
+    liberar.set()
+    lider.join(5)
+    seguidores.join(5)
+
+    assert resultados == [42] * 5
+    assert voo.metricas() == {'execucoes': 1, 'coalescidas': 4, 'em_andamento': 0}
+
+
+def test_erro_do_lider_chega_aos_que_esperavam():
+    voo = VooUnico()
+    liberar = threading.Event()
+    erros = []
+
+    def falha():
+        liberar.wait(5)
+        raise ValueError('IBGE fora do ar')
+
+    def pedir():
+        try:
+            voo.executar('chave', falha)
+        except ValueError as erro:
+            erros.append(erro)
+
+    threads = [threading.Thread(target=pedir) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _esperar(lambda: voo.metricas()['coalescidas'] == 2)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(erros) == 3 and len({id(erro) for erro in erros}) == 1
+    assert voo.metricas()['em_andamento'] == 0
+
+
+def test_chaves_diferentes_e_chamadas_seguidas_nao_coalescem():
+    voo = VooUnico()
+
+    assert voo.executar('a', lambda: 1) == 1
+    assert voo.executar('a', lambda: 2) == 2
+    assert voo.executar('b', lambda: 3) == 3
+    assert voo.metricas() == {'execucoes': 3, 'coalescidas': 0, 'em_andamento': 0}
+
+    with pytest.raises(KeyError):
+        voo.executar('c', lambda: {}['x'])
+    assert voo.executar('c', lambda: 4) == 4
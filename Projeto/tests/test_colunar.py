@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+import colunar
+from dados import carregar_exemplos
+
+
+def test_ida_e_volta_preserva_tabelas_e_metadados():
+    estados, municipios = carregar_exemplos()
+    texto = pd.DataFrame({
+        'nome': pd.array(['São Paulo', None, 'Maceió', ''], dtype='string'),
+        'sigla': pd.Series(['a', 'ç', None, 'b']),
+        'ativo': [True, False, True, True],
+        'valor': [1.5, np.nan, -2.0, 0.0],
+        'inteiro': np.arange(4, dtype='int32'),
+        'faixa': pd.Categorical(['b', 'a', None, 'b'], categories=['b', 'a'], ordered=True)
+    })
+    tabelas = {'estados': estados, 'municipios': municipios, 'texto': texto, 'vazia': texto.iloc[:0]}
+
+    bloco = colunar.empacotar(tabelas, {'versao': 3})
+    lidas, metadados = colunar.desempacotar(bloco)
+
+    assert metadados == {'versao': 3}
+    assert list(lidas) == list(tabelas)
+    for nome, df in tabelas.items():
+        pdt.assert_frame_equal(lidas[nome], df.reset_index(drop=True))
+
+
+def test_colunas_numericas_sao_views_alinhadas_do_buffer():
+    _, municipios = carregar_exemplos()
+    buffer = bytearray(colunar.empacotar({'municipios': municipios}))
+
+    cabecalho, inicio = colunar.ler_cabecalho(buffer)
+    coluna = next(d for d in cabecalho['tabelas']['municipios']['colunas'] if d['nome'] == 'pib')
+    offset = coluna['buffers']['valores']['offset']
+    pib = colunar._montar_coluna(buffer, inicio, coluna)
+
+    assert (inicio + offset) % colunar.ALINHAMENTO == 0
+    assert np.shares_memory(pib, np.frombuffer(buffer, dtype='uint8'))
+    assert not pib.flags.writeable
+    np.testing.assert_array_equal(pib, municipios['pib'].to_numpy())
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from consulta import Consulta
+from dados import UFS, Conjunto, montar_estados, montar_municipios
+
+
+@pytest.fixture(scope='module')
+def dados():
+    """Municípios com PIB repetido (empates) e ausente"""
+    siglas = ['SP', 'RJ', 'BA', 'RS']
+    pibs = [5.0, 2.0, None, 5.0, 2.0, 7.5, 5.0, None, 2.0, 7.5, 1.0, 5.0]
+    municipios = montar_municipios([
+        {'codigo': 100 + i, 'municipio': f'M{i}', 'estado': siglas[i % len(siglas)], 'pib': pib, 'idh': 0.7}
+        for i, pib in enumerate(pibs)
+    ])
+    estados = montar_estados([{'id': UFS[s][0], 'sigla': s, 'nome': s, 'regiao': UFS[s][1]} for s in siglas])
+    return Conjunto(estados, municipios, versao=1)
+
+
+def esperado(dados, decrescente, **filtros):
+    """Posições como no sort estável do pandas, com ausentes no fim"""
+    df = dados.municipios
+    mascara = dados.mascara('municipios', **filtros)
+    if mascara is not None:
+        df = df[mascara]
+    return df['pib'].sort_values(ascending=not decrescente, kind='stable', na_position='last').index.tolist()
+
+
+@pytest.mark.parametrize('decrescente', [False, True])
+@pytest.mark.parametrize('filtros', [{}, {'estado': 'SP'}, {'regiao': 'Sudeste'}])
+def test_ordenacao_estavel_como_no_pandas(dados, decrescente, filtros):
+    posicoes, total = Consulta('municipios', ('pib',), ordenar='pib', decrescente=decrescente,
+                               **filtros).executar(dados)
+
+    assert posicoes.tolist() == esperado(dados, decrescente, **filtros)
+    assert total == len(posicoes)
+
+
+def test_empates_na_ordem_das_linhas_nas_duas_direcoes(dados):
+    crescente, _ = Consulta('municipios', ('pib',), ordenar='pib').executar(dados)
+    decrescente, _ = Consulta('municipios', ('pib',), ordenar='pib', decrescente=True).executar(dados)
+
+    pib = dados.valores('municipios', 'pib')
+    for ordem in (crescente, decrescente):
+        for valor in (2.0, 5.0, 7.5):
+            empatados = [int(p) for p in ordem if pib[p] == valor]
+            assert empatados == sorted(empatados)
+    assert np.isnan(pib[crescente[-2:]]).all() and np.isnan(pib[decrescente[-2:]]).all()
+
+
+def test_paginas_sobre_empates(dados):
+    completo, _ = Consulta('municipios', ('pib',), ordenar='pib').executar(dados)
+    paginas = [Consulta('municipios', ('pib',), ordenar='pib', limite=3, deslocamento=d).executar(dados)[0]
+               for d in range(0, len(completo), 3)]
+
+    assert np.concatenate(paginas).tolist() == completo.tolist()
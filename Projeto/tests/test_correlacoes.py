@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize('query', ['bootstrap=2000', 'bootstrap=150', 'nivel=0.951', 'bootstrap=-1'])
+def test_opcoes_fora_das_aceitas_dao_400(cliente, query):
+    assert cliente.get(f'/analise/correlacoes?{query}').status_code == 400
+
+
+def test_intervalos_com_as_opcoes_aceitas(cliente):
+    resposta = cliente.get('/analise/correlacoes?metodo=pearson&bootstrap=100&nivel=0.9')
+
+    assert resposta.status_code == 200
+    pearson = resposta.get_json()['correlacoes']['pearson']
+    assert {'matriz', 'ic_inferior', 'ic_superior'} <= set(pearson)
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backends
+from carregador import CarregadorIBGE, ClienteFixtures
+from dados import ANO_REFERENCIA, PIB_IDH_EXEMPLO, BaseDados, Conjunto, carregar_exemplos, montar_municipios
+
+
+def resumos(conjunto):
+    """Estatísticas por (estado, métrica, campo), comparáveis com pytest.approx (NaN vira None)"""
+    return {
+        (sigla, metrica, campo): None if valor != valor else valor
+        for sigla, particao in conjunto.estatisticas.particoes.items()
+        for metrica, resumo in particao.items()
+        for campo, valor in resumo.para_dict().items()
+    }
+
+
+def nos_cubo(cubo):
+    return {nivel: cubo.nos(nivel) for nivel in ('regiao', 'estado')}
+
+
+@pytest.fixture
+def base():
+    base = BaseDados()
+    backends.configurar({}, base)  # backend em memória: monta as estatísticas de cada versão
+    base.atual.cubo  # monta o cubo, que as atualizações incrementais reaproveitam
+    return base
+
+
+def test_anexar_municipios_atualiza_indices_estatisticas_e_cubo(base):
+    anterior = base.atual
+    novos = montar_municipios([
+        {'codigo': 3548708, 'municipio': 'São Bernardo do Campo', 'estado': 'SP', 'pib': 49.7, 'idh': 0.805},
+        {'codigo': 1100205, 'municipio': 'Porto Velho', 'estado': 'RO', 'pib': 17.1, 'idh': 0.736}
+    ])
+    limpas = []
+    base.ao_atualizar(limpas.append)
+
+    conjunto = base.anexar_municipios(novos)
+    completo = BaseDados(lambda: (anterior.estados, conjunto.historico)).atual
+
+    assert conjunto.versao == anterior.versao + 1 and limpas == [conjunto]
+    assert conjunto.municipios_por_codigo.get(1100205) == len(PIB_IDH_EXEMPLO) + 1
+    assert conjunto.rankings['pib'].fatia(1, estado='RO')[0].tolist() == [len(PIB_IDH_EXEMPLO) + 1]
+    assert resumos(conjunto) == pytest.approx(resumos(completo))
+    assert nos_cubo(conjunto.cubo) == nos_cubo(completo.cubo)
+
+    # Partições sem linhas novas são reaproveitadas
+    assert conjunto.cubo.particoes['RJ'] is anterior.cubo.particoes['RJ']
+
+
+def test_atualizar_estados_recalcula_so_os_estados_pedidos(base):
+    anterior = base.atual
+    sp = montar_municipios([
+        {'codigo': 3550308, 'municipio': 'São Paulo', 'estado': 'SP', 'pib': 748.8, 'idh': 0.805}
+    ])
+
+    conjunto = base.atualizar_estados({'SP': sp})
+    completo = BaseDados(lambda: (anterior.estados, conjunto.historico)).atual
+
+    assert conjunto.municipios_por_codigo.get(3509502) is None  # Campinas saiu junto com o estado
+    assert conjunto.municipios['pib'].iloc[conjunto.municipios_por_codigo[3550308]] == 748.8
+    assert len(conjunto.municipios) == len(anterior.municipios) - 1
+    assert resumos(conjunto) == pytest.approx(resumos(completo))
+    assert nos_cubo(conjunto.cubo) == nos_cubo(completo.cubo)
+    assert conjunto.estatisticas.particoes['RJ'] is anterior.estatisticas.particoes['RJ']
+    assert conjunto.cubo.particoes['RJ'] is anterior.cubo.particoes['RJ']
+
+
+def test_recarregar_igual_nao_publica(base):
+    anterior = base.atual
+    assert base.recarregar(*carregar_exemplos()) is anterior
+
+
+def test_recarregar_com_linhas_novas_anexa(base):
+    estados, municipios = carregar_exemplos()
+    novos = montar_municipios([{'codigo': 2800308, 'municipio': 'Aracaju', 'estado': 'SE', 'pib': 16.4,
+                                'idh': 0.770}])
+    anterior = base.atual
+
+    conjunto = base.recarregar(estados, pd.concat([municipios, novos], ignore_index=True))
+
+    assert conjunto.versao == anterior.versao + 1
+    assert conjunto.municipios_por_codigo.get(2800308) == len(anterior.municipios)
+    assert conjunto.estatisticas.particoes['SP'] is not anterior.estatisticas.particoes['SP']  # copiadas
+    assert conjunto.cubo.particoes['SP'] is anterior.cubo.particoes['SP']
+
+
+def test_recarregar_com_um_estado_diferente_substitui_so_ele(base):
+    estados, municipios = carregar_exemplos()
+    municipios.loc[(municipios['estado'] == 'CE') & (municipios['ano'] == ANO_REFERENCIA), 'pib'] = 70.0
+    anterior = base.atual
+
+    conjunto = base.recarregar(estados, municipios)
+
+    assert conjunto.municipios['pib'].iloc[conjunto.municipios_por_codigo[2304400]] == 70.0
+    assert conjunto.estatisticas.particoes['CE'] is not anterior.estatisticas.particoes['CE']
+    assert conjunto.estatisticas.particoes['SP'] is anterior.estatisticas.particoes['SP']
+
+
+def test_recarregar_com_outras_colunas_monta_do_zero(base):
+    estados, municipios = carregar_exemplos()
+    municipios['educacao'] = 1.0
+
+    conjunto = base.recarregar(estados, municipios)
+
+    assert 'educacao' in conjunto.municipios.columns
+    assert conjunto.historico['codigo'].tolist() == municipios['codigo'].tolist()
+
+
+def test_recarregar_com_anos_anteriores_diferentes_monta_do_zero(base):
+    estados, municipios = carregar_exemplos()
+    municipios.loc[municipios['ano'] < ANO_REFERENCIA, 'pib'] *= 2
+    anterior = base.atual
+
+    conjunto = base.recarregar(estados, municipios)
+
+    assert conjunto.estatisticas.particoes['SP'] is not anterior.estatisticas.particoes['SP']
+    assert conjunto.anteriores['pib'].tolist() == municipios.loc[municipios['ano'] < ANO_REFERENCIA, 'pib'].tolist()
+
+
+def test_conjunto_analisa_o_ano_mais_recente_e_guarda_os_anteriores():
+    estados, municipios = carregar_exemplos()
+    embaralhados = municipios.sample(frac=1, random_state=3).reset_index(drop=True)
+
+    for tabela in (municipios, embaralhados):
+        conjunto = Conjunto(estados, tabela, versao=1)
+
+        assert len(conjunto.municipios) == len(PIB_IDH_EXEMPLO)
+        assert (conjunto.municipios['ano'] == ANO_REFERENCIA).all()
+        assert conjunto.rankings['pib'].fatia()[1] == len(PIB_IDH_EXEMPLO)
+        assert sorted(conjunto.anteriores['ano'].unique().tolist()) == [2018, 2019]
+        assert len(conjunto.historico) == len(municipios)
+        assert conjunto.series.anos.tolist() == [2018, 2019, 2020]
+
+    # Na ordem da carga, o ano mais recente é uma fatia da tabela publicada, sem cópia
+    conjunto = Conjunto(estados, municipios, versao=1)
+    assert conjunto.historico is municipios
+    assert np.shares_memory(conjunto.municipios['pib'].to_numpy(), municipios['pib'].to_numpy())
+
+
+def test_carregador_so_publica_o_que_mudou():
+    base = BaseDados()
+    carregador = CarregadorIBGE(base, ClienteFixtures())
+
+    primeira = carregador.carregar()
+    segunda = carregador.carregar()
+
+    assert carregador.cargas == 2
+    assert segunda is primeira
+    assert base.atual.versao == primeira.versao
@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ibge_client import IBGEClient
+
+ETAG = '"v1"'
+
+
+class ServidorIBGE:
+    """IBGE simulado: responde um JSON por caminho (com a query, se houver uma resposta para ela),
+    com ETag e 304 para If-None-Match igual; os caminhos em `falhas` respondem 500"""
+
+    def __init__(self, atraso: float = 0.0):
+        self.atraso = atraso
+        self.pedidos = []
+        self.respostas = {}
+        self.falhas = set()
+        self.simultaneos = 0
+        self.pico = 0
+        trava = threading.Lock()
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor.pedidos.append((self.path, self.headers.get('If-None-Match')))
+                with trava:
+                    servidor.simultaneos += 1
+                    servidor.pico = max(servidor.pico, servidor.simultaneos)
+                time.sleep(servidor.atraso)
+                with trava:
+                    servidor.simultaneos -= 1
+                if self.path.split('?')[0] in servidor.falhas:
+                    self.send_response(500)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.headers.get('If-None-Match') == ETAG:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+
+                resposta = servidor.respostas.get(self.path) or servidor.respostas.get(self.path.split('?')[0])
+                corpo = json.dumps(resposta if resposta is not None else {'caminho': self.path}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', ETAG)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.http.server_port}'
+
+    def fechar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorIBGE()
+    yield servidor
+    servidor.fechar()
+
+
+def cliente_para(servidor, **opcoes):
+    return IBGEClient(base_url=servidor.url, requisicoes_por_segundo=1000, timeout=5, **opcoes)
+
+
+def test_cache_em_memoria(servidor):
+    with cliente_para(servidor) as cliente:
+        primeiro = cliente.get_estados()
+        segundo = cliente.get_estados()
+
+    assert primeiro == segundo == {'caminho': '/localidades/estados'}
+    assert len(servidor.pedidos) == 1
+    assert cliente.metricas()['cache_acertos'] == 1
+
+
+def test_cache_em_disco_sobrevive_ao_processo(servidor, tmp_path):
+    caminho = str(tmp_path / 'cache.sqlite')
+    with cliente_para(servidor, caminho_cache=caminho) as cliente:
+        cliente.get_pib_municipios(2020)
+
+    # Outro cliente (como um reinício) lê do disco sem ir ao IBGE
+    with cliente_para(servidor, caminho_cache=caminho) as cliente:
+        assert cliente.get_pib_municipios(2020) == {'caminho': '/contasnacionais/municipios/pib?ano=2020'}
+    assert len(servidor.pedidos) == 1
+
+
+def test_entrada_vencida_servida_e_revalidada_com_304(servidor, tmp_path):
+    caminho = str(tmp_path / 'cache.sqlite')
+    with cliente_para(servidor, caminho_cache=caminho) as cliente:
+        dados = cliente.get_estados()
+
+    with cliente_para(servidor, caminho_cache=caminho, ttl=0.05) as cliente:
+        time.sleep(0.1)
+        obter = cliente.cache_disco.obter
+        leituras = []
+        cliente.cache_disco.obter = lambda chave: leituras.append(chave) or obter(chave)
+
+        # A entrada vencida sai na hora e passa para a memória; a revalidação roda em segundo plano
+        assert cliente.get_estados() == dados
+        assert cliente.get_estados() == dados
+        assert leituras == ['localidades/estados']
+
+        limite = time.monotonic() + 5
+        while len(servidor.pedidos) < 2 and time.monotonic() < limite:
+            time.sleep(0.01)
+        while cliente._revalidando and time.monotonic() < limite:
+            time.sleep(0.01)
+
+        assert servidor.pedidos[-1] == ('/localidades/estados', ETAG)
+        assert cliente.cache_disco.fresca(cliente.cache_disco.obter('localidades/estados'))
+
+
+def test_reserva_de_outro_processo_nao_e_liberada(servidor, tmp_path):
+    with cliente_para(servidor, caminho_cache=str(tmp_path / 'cache.sqlite')) as cliente:
+        cliente.timeout = 0.3
+
+        # Outro processo reservou a chave e não gravou a tempo
+        alheia = cliente.cache_disco.reservar('localidades/estados', duracao=60)
+        assert alheia is not None
+
+        assert cliente.get_estados() == {'caminho': '/localidades/estados'}
+        assert cliente.cache_disco.reservar('localidades/estados') is None
+
+        cliente.cache_disco.liberar('localidades/estados', alheia)
+        assert cliente.cache_disco.reservar('localidades/estados') is not None
+
+
+def test_pedidos_simultaneos_viram_uma_requisicao():
+    servidor = ServidorIBGE(atraso=0.2)
+    try:
+        with cliente_para(servidor) as cliente:
+            resultados = []
+            threads = [threading.Thread(target=lambda: resultados.append(cliente.get_estados())) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        assert resultados == [{'caminho': '/localidades/estados'}] * 5
+        assert len(servidor.pedidos) == 1
+        metricas = cliente.metricas()
+        assert metricas['requisicoes_executadas'] == 1
+        assert metricas['requisicoes_coalescidas'] + metricas['cache_acertos'] == 4
+    finally:
+        servidor.fechar()
+
+
+def test_municipios_de_todos_os_estados_em_paralelo():
+    servidor = ServidorIBGE(atraso=0.1)
+    servidor.respostas['/localidades/estados'] = [{'id': codigo} for codigo in range(11, 17)]
+    try:
+        with cliente_para(servidor, max_concorrencia=3) as cliente:
+            municipios = cliente.get_municipios_todos_estados()
+
+        assert list(municipios) == [str(codigo) for codigo in range(11, 17)]
+        assert municipios['13'] == {'caminho': '/localidades/estados/13/municipios'}
+        assert len(servidor.pedidos) == 7
+
+        # Mais de um pedido ao mesmo tempo, sem passar do limite de concorrência
+        assert 1 < servidor.pico <= 3
+    finally:
+        servidor.fechar()
+
+
+def test_indicadores_de_varios_estados_em_paralelo_sem_repetir():
+    servidor = ServidorIBGE(atraso=0.1)
+    try:
+        with cliente_para(servidor, max_concorrencia=3) as cliente:
+            indicadores = cliente.get_indicadores_estados([35, '33', '35', 31, 53, 41, '33', 43])
+
+        assert list(indicadores) == ['35', '33', '31', '53', '41', '43']
+        assert indicadores['33'] == {'populacao': {'caminho': '/projecoes/populacao/33'}, 'estado_id': '33'}
+        assert sorted(caminho for caminho, _ in servidor.pedidos) == sorted(
+            f'/projecoes/populacao/{codigo}' for codigo in indicadores)
+        assert 1 < servidor.pico <= 3
+    finally:
+        servidor.fechar()
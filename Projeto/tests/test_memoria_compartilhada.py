@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import memoria_compartilhada
+from dados import BaseDados
+
+
+@pytest.fixture
+def publicador():
+    publicador = memoria_compartilhada.PublicadorSegmentos(f'teste_{os.getpid()}_{id(object())}')
+    yield publicador
+    publicador.fechar()
+
+
+def test_seguidor_usa_versao_e_horario_de_quem_publicou(publicador):
+    base = BaseDados()
+    publicador.publicar(base.atual)
+    base.ao_atualizar(publicador.publicar)
+
+    seguidor = BaseDados()
+    seguidor.seguir(memoria_compartilhada.LeitorSegmentos(publicador.prefixo))
+    base.atualizar()
+
+    assert seguidor.atual.versao == base.atual.versao
+    assert seguidor.atual.carregado_em == base.atual.carregado_em
+
+
+def test_seguir_troca_a_copia_herdada_pelo_segmento(publicador):
+    base = BaseDados()
+    publicador.publicar(base.atual)
+
+    # Mesma versão, mas montada neste processo (como a cópia herdada no fork)
+    seguidor = BaseDados()
+    assert seguidor.atual.versao == base.atual.versao
+    seguidor.seguir(memoria_compartilhada.LeitorSegmentos(publicador.prefixo))
+
+    assert seguidor.atual.carregado_em == base.atual.carregado_em
+
+
+def test_status_da_carga_publicado_para_o_leitor(publicador):
+    leitor = memoria_compartilhada.LeitorSegmentos(publicador.prefixo)
+    assert leitor.status() is None
+
+    publicador.publicar_status({'status': {'em_andamento': True, 'cargas': 0}})
+    publicador.publicar_status({'status': {'em_andamento': False, 'cargas': 1}})
+
+    assert leitor.status() == {'status': {'em_andamento': False, 'cargas': 1}}
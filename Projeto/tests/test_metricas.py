@@ -0,0 +1,37 @@
+import pytest
+
+import app as aplicacao
+
+
+def test_metrics_com_um_unico_charset(cliente):
+    resposta = cliente.get('/metrics')
+
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    assert 'brasil_dados_versao' in resposta.get_data(as_text=True)
+
+
+def test_perfil_desligado_por_padrao(cliente):
+    resposta = cliente.get('/estados/?profile=1', headers={'X-Profile': '1'})
+
+    assert 'perfil' not in resposta.get_json()
+    assert 'X-Profile' not in resposta.headers
+
+
+@pytest.mark.parametrize('perfil', ['1', 'sim'])
+def test_perfil_habilitado_pela_configuracao_do_app(perfil, monkeypatch):
+    monkeypatch.delenv('PERFIL', raising=False)
+    cliente = aplicacao.create_app({'IBGE_CARGA': '', 'DADOS_COMPARTILHADOS': '', 'DADOS_SNAPSHOT': '',
+                                    'DADOS_BACKEND': 'memoria', 'PERFIL': perfil}).test_client()
+    resposta = cliente.get('/estados/?profile=1')
+
+    assert resposta.get_json()['perfil']
+
+
+def test_configuracao_do_app_desliga_o_perfil_do_ambiente(monkeypatch):
+    monkeypatch.setenv('PERFIL', '1')
+    cliente = aplicacao.create_app({'IBGE_CARGA': '', 'DADOS_COMPARTILHADOS': '', 'DADOS_SNAPSHOT': '',
+                                    'DADOS_BACKEND': 'memoria', 'PERFIL': '0'}).test_client()
+    resposta = cliente.get('/estados/?profile=1')
+
+    assert 'perfil' not in resposta.get_json()
@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+import serializacao
+
+PAYLOAD = {
+    'valor': float('nan'),
+    'infinito': float('inf'),
+    'numpy': np.float64('nan'),
+    'lista': [1.5, float('nan'), None],
+    'vetor': np.array([1.0, np.nan]),
+    'serie': pd.Series([np.nan, 2.0]),
+    'aninhado': {'tupla': (np.nan, 3)}
+}
+
+ESPERADO = {
+    'valor': None,
+    'infinito': None,
+    'numpy': None,
+    'lista': [1.5, None, None],
+    'vetor': [1.0, None],
+    'serie': [None, 2.0],
+    'aninhado': {'tupla': [None, 3]}
+}
+
+
+def test_json_padrao_troca_nan_por_null():
+    assert json.loads(serializacao._serializar_json(PAYLOAD)) == ESPERADO
+
+
+@pytest.mark.skipif(serializacao.orjson is None, reason='orjson não instalado')
+def test_serializadores_concordam():
+    assert json.loads(serializacao._serializar_orjson(PAYLOAD)) == json.loads(serializacao._serializar_json(PAYLOAD))
+
+
+def test_resposta_sem_orjson_e_json_valido(monkeypatch):
+    monkeypatch.setattr(serializacao, 'serializar', serializacao._serializar_json)
+
+    with Flask(__name__).test_request_context():
+        resposta = serializacao.resposta_json(PAYLOAD)
+
+    assert json.loads(resposta.get_data(as_text=True), parse_constant=pytest.fail) == ESPERADO
@@ -0,0 +1,17 @@
+def test_tendencias_dos_dados_de_exemplo(cliente):
+    resposta = cliente.get('/analise/tendencias?limit=3&janela=2')
+
+    assert resposta.status_code == 200
+    corpo = resposta.get_json()
+    assert corpo['anos'] == [2018, 2019, 2020] and corpo['total'] == 15
+    assert len(corpo['ranking']) == 3
+    cagrs = [linha['cagr'] for linha in corpo['ranking']]
+    assert cagrs == sorted(cagrs, reverse=True)
+    assert all(len(linha['medias_moveis']) == 3 for linha in corpo['ranking'])
+
+
+def test_tendencias_com_recorte_de_anos_e_estado(cliente):
+    corpo = cliente.get('/analise/tendencias?de=2019&estado=SP&order_by=inclinacao').get_json()
+
+    assert corpo['anos'] == [2019, 2020]
+    assert {linha['estado'] for linha in corpo['ranking']} == {'SP'} and corpo['total'] == 2